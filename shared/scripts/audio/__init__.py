@@ -1,2 +1,5 @@
 # Audio Scripts
 from .tts_generator import TTSGenerator, generate_narration
+from .voice_catalog import VoiceCatalog, get_catalog
+from .music_mixer import MusicMixer
+from .ducking import DEFAULT_DUCKING, load_envelope
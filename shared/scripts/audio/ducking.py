@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Ducking
+Baja la música mientras suena la voz y la sube en las pausas.
+
+Dos modos:
+- sidechain: sidechaincompress con la voz como señal de control, dentro
+  del mismo filter_complex de la mezcla (sin análisis previo)
+- envelope: envolvente de actividad de voz calculada una vez desde el PCM
+  de la narración (ventanas RMS vectorizadas con NumPy, ataque/release
+  como rampas) y cacheada por hash del contenido y parámetros (namespace
+  "ducking" de la caché de medios); se aplica como curva de ganancia con
+  asendcmd + volume
+
+En ambos la música sube gap_boost_db en las pausas respecto al nivel
+fijo de antes: más presencia sin tapar la voz ni pasada de masterizado.
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+try:
+    from ..utils.media_cache import MediaCache
+    from ..utils.loudness import get_analyzer
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import MediaCache
+    from utils.loudness import get_analyzer
+
+
+DEFAULT_DUCKING = {
+    "mode": "sidechain",     # sidechain | envelope | off
+    "gap_boost_db": 4.0,     # Subida de la música en las pausas
+    "attack": 20,            # ms hasta bajar la música al empezar la voz
+    "release": 400,          # ms hasta recuperarla al acabar la voz
+    # sidechain
+    "threshold": 0.03,       # Nivel de la voz que activa el compresor (lineal)
+    "ratio": 8,
+    # envelope
+    "depth_db": 10.0,        # Reducción de la música con voz
+    "threshold_db": -40.0,   # RMS (dBFS) a partir del que hay voz
+    "window_ms": 20
+}
+
+# Parámetros que cambian la envolvente (invalidan la caché)
+_ENVELOPE_KEYS = ("attack", "release", "depth_db", "threshold_db", "window_ms")
+
+# Frecuencia de decodificación para el análisis (suficiente para RMS de voz)
+_ANALYSIS_RATE = 8000
+
+
+def resolve_ducking(params: Optional[Dict]) -> Dict:
+    """Parámetros de ducking completos (None o {} = valores por defecto)"""
+    return {**DEFAULT_DUCKING, **(params or {})}
+
+
+def sidechain_filter(params: Dict) -> str:
+    """Filtro sidechaincompress (entradas: [música][voz])"""
+    return (
+        f"sidechaincompress=threshold={params['threshold']}:ratio={params['ratio']}"
+        f":attack={params['attack']}:release={params['release']}:makeup=1"
+    )
+
+
+def _ramp_max(active, length: int, forward: bool):
+    """
+    Máximo de la actividad ponderada por una rampa lineal (vectorizado).
+
+    forward=True extiende cada tramo con voz hacia delante (release);
+    forward=False lo adelanta (ataque: la música baja antes de la voz).
+    """
+    if length <= 1:
+        return active.astype(float)
+    ramp = np.linspace(1.0, 0.0, length, endpoint=False)
+    pad = np.zeros(length - 1)
+    if forward:
+        windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([pad, active]), length)
+        return (windows * ramp[::-1]).max(axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([active, pad]), length)
+    return (windows * ramp).max(axis=1)
+
+
+def compute_envelope(narration_path: str, params: Dict) -> Optional[Dict]:
+    """
+    Envolvente de ganancia (dB) de la música a partir del PCM de la voz.
+
+    Args:
+        narration_path: Audio de la narración
+        params: Parámetros de ducking (resolve_ducking)
+
+    Returns:
+        {"window": s, "gains": [dB por ventana]} o None sin NumPy o si falla
+    """
+    if not HAS_NUMPY:
+        return None
+
+    try:
+        result = subprocess.run([
+            "ffmpeg", "-v", "error",
+            "-i", str(narration_path),
+            "-map", "0:a:0", "-ac", "1", "-ar", str(_ANALYSIS_RATE),
+            "-f", "f32le", "-"
+        ], capture_output=True, timeout=300)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+
+    samples = np.frombuffer(result.stdout, dtype=np.float32)
+    window = max(1, int(_ANALYSIS_RATE * params["window_ms"] / 1000))
+    count = len(samples) // window
+    if count == 0:
+        return None
+
+    # RMS por ventana en dBFS
+    frames = samples[:count * window].reshape(count, window).astype(np.float64)
+    rms_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    active = (rms_db > params["threshold_db"]).astype(float)
+
+    attack = max(1, round(params["attack"] / params["window_ms"]))
+    release = max(1, round(params["release"] / params["window_ms"]))
+    amount = np.maximum(_ramp_max(active, release, True), _ramp_max(active, attack, False))
+
+    gains = np.round(-params["depth_db"] * amount, 1)
+    return {"window": window / _ANALYSIS_RATE, "gains": gains.tolist()}
+
+
+_cache: Optional[MediaCache] = None
+
+
+def _envelope_cache() -> MediaCache:
+    """Caché de envolventes (namespace "ducking")"""
+    global _cache
+    if _cache is None:
+        _cache = MediaCache(namespace="ducking")
+    return _cache
+
+
+def load_envelope(
+    narration_path: str,
+    params: Dict,
+    cache: Optional[MediaCache] = None
+) -> Optional[Dict]:
+    """
+    Envolvente de una narración: de la caché o calculada ahora.
+
+    La clave es el hash del contenido del audio (el mismo que usa la caché
+    de sonoridad) más los parámetros de la envolvente: no se escribe nada
+    junto a la narración, y una copia o renombrado reutiliza la entrada.
+
+    Args:
+        narration_path: Audio de la narración
+        params: Parámetros de ducking (resolve_ducking)
+        cache: Caché de medios (default: namespace "ducking")
+
+    Returns:
+        Envolvente o None si no se pudo calcular
+    """
+    digest = get_analyzer().content_hash(str(narration_path))
+    if digest is None:
+        return None
+    cache = cache or _envelope_cache()
+    key = MediaCache.make_key(
+        "ducking", digest, {k: params[k] for k in _ENVELOPE_KEYS}
+    )
+
+    cached = cache.get(key, ".json")
+    if cached:
+        try:
+            with open(cached, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    envelope = compute_envelope(narration_path, params)
+    if envelope is None:
+        return None
+
+    try:
+        with cache.open_for_write(key, ".json") as f:
+            f.write(json.dumps(envelope, separators=(",", ":")).encode("utf-8"))
+    except OSError:
+        pass
+    return envelope
+
+
+def write_commands(envelope: Dict, output_path: str, target: str = "volume@duck") -> str:
+    """
+    Curva de ganancia como archivo de asendcmd (solo los cambios de nivel).
+
+    Args:
+        envelope: Envolvente de load_envelope()
+        output_path: Archivo de comandos
+        target: Filtro volume que recibe los comandos
+
+    Returns:
+        Ruta del archivo
+    """
+    window = envelope["window"]
+    lines: List[str] = []
+    last = None
+    for i, gain in enumerate(envelope["gains"]):
+        if last is None or abs(gain - last) >= 0.5 or (gain == 0 and last != 0):
+            lines.append(f"{i * window:.3f} {target} volume {gain}dB;\n")
+            last = gain
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    return output_path
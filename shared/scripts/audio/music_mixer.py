@@ -5,17 +5,38 @@ Añade música de fondo a archivos de audio/video.
 
 Incluye:
 - Música libre de derechos de Pixabay
-- Ajuste automático de volumen (ducking)
+- Ajuste automático de volumen (ducking): sidechaincompress con la voz
+  como control o envolvente de voz precalculada (ver ducking.py)
+- Ganancias exactas desde la sonoridad medida (LUFS cacheados por contenido):
+  la voz llega al objetivo de la plataforma y la música queda music_volume
+  por debajo, sin pasada correctiva de normalización
 - Fade in/out suave
+- Música en bucle (-stream_loop): cubre voces más largas que la pista
 - Categorías: tension, happy, epic, chill, dramatic
 """
 
 import subprocess
 import os
+import sys
 import json
+import math
+import tempfile
 import urllib.request
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from ..utils.media_info import get_duration
+    from ..utils.loudness import get_analyzer, DEFAULT_TARGET_LUFS
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_info import get_duration
+    from utils.loudness import get_analyzer, DEFAULT_TARGET_LUFS
+
+try:
+    from .ducking import resolve_ducking, sidechain_filter, load_envelope, write_commands
+except ImportError:
+    from ducking import resolve_ducking, sidechain_filter, load_envelope, write_commands
 
 
 class MusicMixer:
@@ -62,15 +83,112 @@ class MusicMixer:
         }
     }
     
-    def __init__(self, music_dir: Optional[str] = None):
+    # Duración del tono ambiental de respaldo (uno por mood, se repite en bucle)
+    AMBIENT_TONE_SECONDS = 60
+    
+    def __init__(
+        self,
+        music_dir: Optional[str] = None,
+        target_lufs: Optional[float] = DEFAULT_TARGET_LUFS,
+        ducking: Optional[Dict] = None
+    ):
         """
         Inicializa el mezclador.
         
         Args:
             music_dir: Directorio con archivos de música
+            target_lufs: Sonoridad objetivo de la mezcla (None = volúmenes fijos)
+            ducking: Parámetros de ducking (mode sidechain | envelope | off, ver DEFAULT_DUCKING)
         """
         self.music_dir = Path(music_dir) if music_dir else Path(__file__).parent / "music"
         self.music_dir.mkdir(exist_ok=True)
+        self.target_lufs = target_lufs
+        self.loudness = get_analyzer()
+        self.ducking = resolve_ducking(ducking)
+    
+    def duck_params(self, voice_path: str, work_dir: Optional[str] = None) -> Optional[Dict]:
+        """
+        Ducking a aplicar en la mezcla con esta voz.
+        
+        En modo envelope calcula (o lee de caché) la envolvente de la voz y
+        escribe sus comandos en work_dir (o en un temporal que borra
+        discard_commands()); si no se puede (sin NumPy, audio ilegible) se
+        usa sidechain.
+        
+        Args:
+            voice_path: Voz (o video con la voz)
+            work_dir: Directorio de trabajo para el archivo de comandos (default: temporal)
+            
+        Returns:
+            Parámetros para build_mix_filter(ducking=...) o None si está desactivado
+        """
+        params = dict(self.ducking)
+        mode = params.get("mode")
+        if not mode or mode == "off":
+            return None
+        
+        if mode == "envelope":
+            envelope = load_envelope(str(voice_path), params)
+            if envelope is not None:
+                if work_dir:
+                    commands = str(Path(work_dir) / f"{Path(voice_path).stem}.duck.cmd")
+                else:
+                    fd, commands = tempfile.mkstemp(prefix="duck_", suffix=".cmd")
+                    os.close(fd)
+                    params["temporary"] = True
+                params["commands"] = write_commands(envelope, commands)
+                return params
+            print("⚠️ No se pudo calcular la envolvente de voz, usando sidechain")
+            params["mode"] = "sidechain"
+        
+        return params
+    
+    @staticmethod
+    def discard_commands(ducking: Optional[Dict]):
+        """Borra el archivo de comandos temporal de duck_params() (si lo hay)"""
+        if ducking and ducking.get("temporary") and ducking.get("commands"):
+            Path(ducking["commands"]).unlink(missing_ok=True)
+    
+    def mix_gains(
+        self,
+        voice_path: str,
+        music_path: Optional[str] = None,
+        music_volume: float = 0.12,
+        voice_volume: float = 1.0
+    ) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        Ganancias exactas (dB) de voz y música desde sus medidas cacheadas.
+        
+        La voz se lleva a target_lufs (acotada por el true peak) y la música
+        a target_lufs + 20·log10(music_volume): con 0.12, unos 18 LU por
+        debajo de la voz, sea cual sea el nivel de la pista original.
+        
+        Args:
+            voice_path: Voz (o video con la voz)
+            music_path: Pista de música (None = solo voz)
+            music_volume: Nivel de la música relativo a la voz (lineal)
+            voice_volume: Nivel de la voz relativo al objetivo (lineal)
+            
+        Returns:
+            (ganancia voz, ganancia música o None) o None si no hay objetivo o medidas
+        """
+        if self.target_lufs is None or music_volume <= 0 or voice_volume <= 0:
+            return None
+        
+        voice = self.loudness.analyze(str(voice_path))
+        if voice is None:
+            return None
+        target = self.target_lufs + 20 * math.log10(voice_volume)
+        voice_gain = voice.gain_to(target)
+        
+        if music_path is None:
+            return voice_gain, None
+        
+        music = self.loudness.analyze(str(music_path))
+        if music is None:
+            return None
+        music_target = self.target_lufs + 20 * math.log10(music_volume)
+        return voice_gain, music.gain_to(music_target)
     
     def mix_audio_with_music(
         self,
@@ -97,15 +215,9 @@ class MusicMixer:
         Returns:
             Ruta al archivo mezclado o None si falla
         """
-        music_info = self.MUSIC_LIBRARY.get(music_type, self.MUSIC_LIBRARY["tension"])
-        music_path = self.music_dir / music_info["local_file"]
+        music_path = self.resolve_music(music_type, verbose=True)
         
-        # Si no existe la música local, generar tono ambiental
-        if not music_path.exists():
-            print(f"⚠️ Música '{music_type}' no encontrada, generando tono ambiental...")
-            music_path = self._generate_ambient_tone(music_type, voice_path)
-        
-        if not music_path or not music_path.exists():
+        if not music_path:
             print("❌ No se pudo obtener música de fondo")
             # Retornar el audio original sin música
             import shutil
@@ -113,25 +225,34 @@ class MusicMixer:
             return output_path
         
         # Obtener duración del audio de voz
-        duration = self._get_duration(voice_path)
+        duration = get_duration(voice_path, 30.0)
         
         # Crear filtro complejo para mezclar
         # - La voz mantiene su volumen
         # - La música se reduce significativamente
         # - Fade in al inicio, fade out al final
         
-        filter_complex = (
-            f"[0:a]volume={voice_volume}[voice];"
-            f"[1:a]volume={music_volume},"
-            f"afade=t=in:st=0:d={fade_in},"
-            f"afade=t=out:st={max(0, duration - fade_out)}:d={fade_out}[music];"
-            f"[voice][music]amix=inputs=2:duration=first:dropout_transition=2[out]"
+        gains = self.mix_gains(voice_path, music_path, music_volume, voice_volume)
+        ducking = self.duck_params(voice_path)
+        
+        filter_complex = self.build_mix_filter(
+            voice_input="0:a",
+            music_input="1:a",
+            duration=duration,
+            music_volume=music_volume,
+            voice_volume=voice_volume,
+            fade_in=fade_in,
+            fade_out=fade_out,
+            output_label="out",
+            extra_amix=":dropout_transition=2",
+            gains_db=gains,
+            ducking=ducking
         )
         
         cmd = [
             "ffmpeg", "-y",
             "-i", str(voice_path),
-            "-i", str(music_path),
+            *self.music_input_args(music_path),
             "-filter_complex", filter_complex,
             "-map", "[out]",
             "-c:a", "libmp3lame", "-b:a", "192k",
@@ -139,7 +260,10 @@ class MusicMixer:
             output_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        finally:
+            self.discard_commands(ducking)
         
         if result.returncode == 0:
             return output_path
@@ -170,30 +294,30 @@ class MusicMixer:
         Returns:
             Ruta al video con música o None si falla
         """
-        music_info = self.MUSIC_LIBRARY.get(music_type, self.MUSIC_LIBRARY["tension"])
-        music_path = self.music_dir / music_info["local_file"]
-        
-        if not music_path.exists():
-            music_path = self._generate_ambient_tone(music_type, video_path)
+        music_path = self.resolve_music(music_type)
         
         if not music_path:
             return video_path
         
-        duration = self._get_duration(video_path)
+        duration = get_duration(video_path, 30.0)
         
         # Mezclar audio del video con música
-        filter_complex = (
-            f"[0:a]volume=1.0[voice];"
-            f"[1:a]volume={music_volume},"
-            f"afade=t=in:st=0:d={fade_in},"
-            f"afade=t=out:st={max(0, duration - fade_out)}:d={fade_out}[music];"
-            f"[voice][music]amix=inputs=2:duration=first[aout]"
+        ducking = self.duck_params(video_path)
+        filter_complex = self.build_mix_filter(
+            voice_input="0:a",
+            music_input="1:a",
+            duration=duration,
+            music_volume=music_volume,
+            fade_in=fade_in,
+            fade_out=fade_out,
+            gains_db=self.mix_gains(video_path, music_path, music_volume),
+            ducking=ducking
         )
         
         cmd = [
             "ffmpeg", "-y",
             "-i", video_path,
-            "-i", str(music_path),
+            *self.music_input_args(music_path),
             "-filter_complex", filter_complex,
             "-map", "0:v",
             "-map", "[aout]",
@@ -204,7 +328,10 @@ class MusicMixer:
             output_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        finally:
+            self.discard_commands(ducking)
         
         if result.returncode == 0:
             return output_path
@@ -212,23 +339,143 @@ class MusicMixer:
             print(f"❌ Error: {result.stderr}")
             return None
     
-    def _generate_ambient_tone(
+    def resolve_music(
         self,
-        mood: str,
-        reference_file: str
+        music_type: str,
+        verbose: bool = False
     ) -> Optional[Path]:
+        """
+        Obtiene la pista de música a usar, generando un tono ambiental si falta.
+        
+        La pista se usa con music_input_args(): se repite en bucle hasta
+        cubrir la voz, sea cual sea su duración.
+        
+        Args:
+            music_type: Tipo de música (tension, dramatic, epic, etc.)
+            verbose: Avisar cuando se genera el tono ambiental
+            
+        Returns:
+            Ruta a la música o None si no se pudo obtener
+        """
+        music_info = self.MUSIC_LIBRARY.get(music_type, self.MUSIC_LIBRARY["tension"])
+        music_path = self.music_dir / music_info["local_file"]
+        
+        if not music_path.exists():
+            if verbose:
+                print(f"⚠️ Música '{music_type}' no encontrada, generando tono ambiental...")
+            music_path = self._generate_ambient_tone(music_type)
+        
+        if not music_path or not music_path.exists():
+            return None
+        return music_path
+    
+    @staticmethod
+    def music_input_args(music_path) -> List[str]:
+        """Argumentos de input de la música, en bucle (la mezcla corta con la voz)"""
+        return ["-stream_loop", "-1", "-i", str(music_path)]
+    
+    @staticmethod
+    def build_mix_filter(
+        voice_input: str,
+        music_input: str,
+        duration: float,
+        music_volume: float = 0.12,
+        voice_volume: float = 1.0,
+        fade_in: float = 0.5,
+        fade_out: float = 2.0,
+        output_label: str = "aout",
+        extra_amix: str = "",
+        gains_db: Optional[Tuple[float, Optional[float]]] = None,
+        ducking: Optional[Dict] = None
+    ) -> str:
+        """
+        Construye el filtro de mezcla voz + música con fades.
+        
+        Reutilizable dentro de un filter_complex mayor (render en una pasada).
+        
+        Args:
+            voice_input: Etiqueta del stream de voz (ej. "0:a")
+            music_input: Etiqueta del stream de música (ej. "1:a")
+            duration: Duración total de la mezcla
+            music_volume: Volumen de la música
+            voice_volume: Volumen de la voz
+            fade_in: Segundos de fade in
+            fade_out: Segundos de fade out
+            output_label: Etiqueta de salida del filtro
+            extra_amix: Opciones extra para amix (ej. ":dropout_transition=2")
+            gains_db: Ganancias medidas de mix_gains() (sustituyen a los volúmenes)
+            ducking: Parámetros de duck_params() (None = música a nivel fijo)
+            
+        Returns:
+            Cadena de filtro para -filter_complex
+        """
+        # Con ducking la música sube en las pausas y baja bajo la voz
+        boost = ducking.get("gap_boost_db", 0.0) if ducking else 0.0
+        
+        voice_gain = f"{voice_volume}"
+        music_gain = f"{round(music_volume * 10 ** (boost / 20), 4)}"
+        if gains_db and gains_db[1] is not None:
+            # Ganancias exactas: amix sin normalizar (si no, divide entre las entradas)
+            voice_gain = f"{gains_db[0]}dB"
+            music_gain = f"{round(gains_db[1] + boost, 2)}dB"
+            extra_amix += ":normalize=0"
+        
+        music_chain = (
+            f"[{music_input}]volume={music_gain},"
+            f"afade=t=in:st=0:d={fade_in},"
+            f"afade=t=out:st={max(0, duration - fade_out)}:d={fade_out}"
+        )
+        mix = f"[voice][music]amix=inputs=2:duration=first{extra_amix}[{output_label}]"
+        
+        if ducking and ducking.get("mode") == "sidechain":
+            # La voz se divide: una copia a la mezcla y otra como control del compresor
+            return (
+                f"[{voice_input}]volume={voice_gain},asplit=2[voice][duckkey];"
+                f"{music_chain}[musicpre];"
+                f"[musicpre][duckkey]{sidechain_filter(ducking)}[music];"
+                f"{mix}"
+            )
+        
+        if ducking and ducking.get("commands"):
+            # Curva de ganancia precalculada desde la envolvente de la voz
+            music_chain += f",asendcmd=f={ducking['commands']},volume@duck=volume=0dB"
+        
+        return (
+            f"[{voice_input}]volume={voice_gain}[voice];"
+            f"{music_chain}[music];"
+            f"{mix}"
+        )
+    
+    @staticmethod
+    def build_gain_filter(input_label: str, gain_db: float, output_label: str = "aout") -> str:
+        """Filtro de ganancia fija (voz sin música llevada al objetivo)"""
+        return f"[{input_label}]volume={gain_db}dB[{output_label}]"
+    
+    def _generate_ambient_tone(self, mood: str) -> Optional[Path]:
         """
         Genera un tono ambiental con FFmpeg cuando no hay música disponible.
         
+        Un único archivo por mood de AMBIENT_TONE_SECONDS (frecuencias
+        enteras: el bucle no tiene saltos), que se repite hasta la duración
+        de la voz con music_input_args().
+        
         Args:
             mood: Estado de ánimo (tension, dramatic, etc.)
-            reference_file: Archivo de referencia para duración
             
         Returns:
             Ruta al archivo generado
         """
-        duration = self._get_duration(reference_file) + 5  # Extra para fade
+        duration = self.AMBIENT_TONE_SECONDS
+        
+        # Uno por mood: reutilizable; el temporal por PID no pisa a otros trabajos
         output = self.music_dir / f"generated_{mood}.mp3"
+        if output.exists():
+            return output
+        tmp_output = self.music_dir / f".generated_{mood}.{os.getpid()}.mp3"
+        
+        # Tonos de versiones anteriores (uno por duración)
+        for stale in self.music_dir.glob(f"generated_{mood}_*s.mp3"):
+            stale.unlink(missing_ok=True)
         
         # Configuración de tonos por mood
         tone_configs = {
@@ -283,28 +530,34 @@ class MusicMixer:
             "-i", filter_str,
             "-c:a", "libmp3lame", "-b:a", "128k",
             "-t", str(duration),
-            str(output)
+            str(tmp_output)
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode == 0:
+            os.replace(tmp_output, output)
             return output
+        tmp_output.unlink(missing_ok=True)
         return None
     
-    def _get_duration(self, file_path: str) -> float:
-        """Obtiene duración de un archivo multimedia"""
-        result = subprocess.run([
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            file_path
-        ], capture_output=True, text=True)
+    def analyze_library(self) -> Dict[str, Optional[Dict]]:
+        """
+        Mide (una sola vez, con caché por contenido) las pistas disponibles.
         
-        try:
-            return float(result.stdout.strip())
-        except:
-            return 30.0
+        Returns:
+            Diccionario tipo -> medidas (integrated, true_peak, lra, threshold) o None
+        """
+        paths = {
+            name: str(self.music_dir / info["local_file"])
+            for name, info in self.MUSIC_LIBRARY.items()
+            if (self.music_dir / info["local_file"]).exists()
+        }
+        measured = self.loudness.analyze_many(paths.values())
+        return {
+            name: (vars(measured[path]) if measured.get(path) else None)
+            for name, path in paths.items()
+        }
     
     def list_available_music(self) -> Dict[str, Dict]:
         """Lista música disponible y su estado"""
@@ -324,15 +577,23 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="Añade música de fondo")
-    parser.add_argument("--input", required=True, help="Archivo de entrada (audio/video)")
-    parser.add_argument("--output", required=True, help="Archivo de salida")
+    parser.add_argument("--input", help="Archivo de entrada (audio/video)")
+    parser.add_argument("--output", help="Archivo de salida")
     parser.add_argument("--music", default="tension", help="Tipo de música")
     parser.add_argument("--volume", type=float, default=0.15, help="Volumen música (0-1)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Medir la sonoridad de la biblioteca (se cachea)")
     
     args = parser.parse_args()
     
     mixer = MusicMixer()
     
+    if args.analyze:
+        print(json.dumps(mixer.analyze_library(), indent=2))
+        return
+    if not args.input or not args.output:
+        parser.error("--input y --output son obligatorios")
+    
     if args.input.endswith(('.mp4', '.mov', '.mkv')):
         result = mixer.add_music_to_video(
             args.input, args.output,
@@ -8,12 +8,187 @@ Edge-TTS ofrece:
 - Múltiples idiomas y acentos
 - Gratis sin límites
 - Sin API key necesaria
+
+Backends:
+- library: librería edge_tts en el mismo proceso (asyncio), sin arrancar
+  un intérprete ni importar módulos en cada llamada
+- cli: comando edge-tts como subproceso (si la librería no está instalada)
+
+La API síncrona (generate, generate_with_srt) se ejecuta sobre un event
+loop persistente en un hilo de fondo; agenerate / agenerate_with_srt
+permiten lanzar muchas narraciones a la vez en un mismo loop.
+
+Los guiones largos se dividen en bloques de oraciones que se sintetizan
+en paralelo (con límite de concurrencia y reintentos por bloque) y se
+unen sin huecos, desplazando los tiempos de cada SRT parcial.
+
+astream() entrega el MP3 por trozos a medida que llega, para que el
+encoder pueda empezar antes de que termine la narración.
+
+Las síntesis se guardan en una caché en disco (audio + SRT) indexada por
+texto, voz, velocidad, tono y volumen: reintentos, re-renders tras la
+revisión y hooks/CTAs repetidos no vuelven a llamar al servicio.
 """
 
+import os
+import re
+import sys
+import shutil
 import asyncio
-import subprocess
+import tempfile
+import inspect
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, AsyncIterator
+
+try:
+    import edge_tts
+    HAS_EDGE_TTS = True
+except ImportError:
+    edge_tts = None
+    HAS_EDGE_TTS = False
+
+try:
+    from ..utils.media_cache import MediaCache
+    from ..utils.media_info import get_duration
+    from ..utils.text_utils import split_into_sentences, chunk_sentences
+    from ..utils.word_timings import WordTimings, words_path_for
+    from ..utils.subtitle_cues import CueList, parse_srt, to_srt
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import MediaCache
+    from utils.media_info import get_duration
+    from utils.text_utils import split_into_sentences, chunk_sentences
+    from utils.word_timings import WordTimings, words_path_for
+    from utils.subtitle_cues import CueList, parse_srt, to_srt
+
+try:
+    from .voice_catalog import get_catalog
+except ImportError:
+    from voice_catalog import get_catalog
+
+
+# Event loop persistente compartido por todas las llamadas síncronas
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop en un hilo daemon, creado en el primer uso"""
+    global _loop
+
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="tts-event-loop", daemon=True
+            )
+            thread.start()
+        return _loop
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """
+    Ejecuta una corrutina en el loop de fondo y espera el resultado.
+
+    Si se agota el timeout la corrutina se cancela (cierra conexiones y
+    subprocesos) antes de lanzar TimeoutError.
+
+    Args:
+        coro: Corrutina a ejecutar
+        timeout: Segundos máximos de espera
+
+    Returns:
+        Resultado de la corrutina
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _background_loop())
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"Corrutina TTS sin terminar tras {timeout}s")
+
+
+def _word_boundary_kwargs() -> Dict:
+    """
+    Pide marcas por palabra: edge_tts >= 7 usa SentenceBoundary por defecto
+    (parámetro boundary); las versiones anteriores siempre dan WordBoundary.
+    """
+    try:
+        params = inspect.signature(edge_tts.Communicate.__init__).parameters
+    except (TypeError, ValueError):
+        return {}
+    return {"boundary": "WordBoundary"} if "boundary" in params else {}
+
+
+def boundaries_to_srt(boundaries: List[Tuple[int, int, str]], words_per_cue: int = 10) -> str:
+    """
+    Agrupa marcas de tiempo de Edge-TTS en cues SRT.
+
+    Un cue termina al llegar a words_per_cue palabras o en fin de frase.
+
+    Args:
+        boundaries: Lista (offset, duración, texto) en unidades de 100 ns
+        words_per_cue: Palabras máximas por cue
+
+    Returns:
+        Contenido SRT
+    """
+    cues = CueList()
+    current: List[Tuple[int, int, str]] = []
+    words = 0
+
+    for i, boundary in enumerate(boundaries):
+        current.append(boundary)
+        words += len(boundary[2].split())
+        if (
+            words >= words_per_cue
+            or boundary[2].rstrip().endswith(('.', '!', '?', '…'))
+            or i == len(boundaries) - 1
+        ):
+            start = current[0][0]
+            end = current[-1][0] + current[-1][1]
+            cues.append(start / 10_000_000, end / 10_000_000, " ".join(b[2] for b in current))
+            current = []
+            words = 0
+
+    return to_srt(cues)
+
+
+def merge_srt(parts: List[Tuple[str, float]]) -> str:
+    """
+    Une varios SRT desplazando cada uno por su offset y renumerando.
+
+    Args:
+        parts: Lista (contenido SRT, offset en segundos)
+
+    Returns:
+        Contenido SRT combinado
+    """
+    cues = CueList()
+    for content, offset in parts:
+        cues.extend(parse_srt(content), offset)
+    return to_srt(cues)
+
+
+def estimate_duration(text: str, rate: str = "+0%") -> float:
+    """
+    Cota superior de la duración de una narración (sin sintetizarla).
+
+    Las voces neuronales rondan 15 caracteres/s a velocidad normal; se
+    asume 10 caracteres/s para que la cota no se quede corta.
+
+    Args:
+        text: Texto a narrar
+        rate: Velocidad de Edge-TTS (ej. "+10%")
+
+    Returns:
+        Segundos máximos esperados
+    """
+    match = re.fullmatch(r"\s*([+-]?\d+)%\s*", rate or "")
+    speed = 1 + int(match.group(1)) / 100 if match else 1.0
+    return len(text) / 10 / max(speed, 0.25) + 2.0
 
 
 class TTSGenerator:
@@ -48,7 +223,14 @@ class TTSGenerator:
         voice: str = "es-ES-AlvaroNeural",
         rate: str = "+0%",
         pitch: str = "+0Hz",
-        volume: str = "+0%"
+        volume: str = "+0%",
+        use_cache: bool = True,
+        cache: Optional[MediaCache] = None,
+        backend: str = "auto",
+        timeout: float = 120,
+        chunk_chars: int = 1000,
+        max_concurrency: int = 4,
+        chunk_retries: int = 2
     ):
         """
         Inicializa el generador TTS.
@@ -58,11 +240,29 @@ class TTSGenerator:
             rate: Velocidad (-50% a +100%)
             pitch: Tono (-50Hz a +50Hz)
             volume: Volumen (-50% a +50%)
+            use_cache: Reutilizar síntesis anteriores idénticas
+            cache: Caché a usar (default: namespace "tts", límite MEDIA_CACHE_MAX_MB)
+            backend: auto | library | cli (auto = librería si está instalada)
+            timeout: Segundos máximos por síntesis (por bloque en modo por bloques)
+            chunk_chars: Textos más largos se sintetizan por bloques (0 = nunca)
+            max_concurrency: Bloques sintetizados a la vez
+            chunk_retries: Reintentos de cada bloque fallido
         """
+        if backend not in ("auto", "library", "cli"):
+            raise ValueError(f"Backend TTS desconocido: {backend}")
+        if backend == "library" and not HAS_EDGE_TTS:
+            raise ValueError("Backend 'library' requiere: pip install edge-tts")
+        
         self.voice = voice
         self.rate = rate
         self.pitch = pitch
         self.volume = volume
+        self.cache = (cache or MediaCache(namespace="tts")) if use_cache else None
+        self.backend = backend
+        self.timeout = timeout
+        self.chunk_chars = chunk_chars
+        self.max_concurrency = max(1, max_concurrency)
+        self.chunk_retries = max(0, chunk_retries)
     
     def generate(
         self,
@@ -81,7 +281,30 @@ class TTSGenerator:
             voice: Voz a usar (override del default)
             rate: Velocidad (override)
             pitch: Tono (override)
-            
+        
+        Returns:
+            Ruta al archivo generado o None si falla
+        """
+        try:
+            return run_sync(
+                self.agenerate(text, output_path, voice, rate, pitch),
+                self._sync_timeout(text)
+            )
+        except TimeoutError:
+            print("Timeout generando audio")
+            return None
+    
+    async def agenerate(
+        self,
+        text: str,
+        output_path: str,
+        voice: Optional[str] = None,
+        rate: Optional[str] = None,
+        pitch: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Versión asíncrona de generate().
+        
         Returns:
             Ruta al archivo generado o None si falla
         """
@@ -92,37 +315,299 @@ class TTSGenerator:
         # Asegurar directorio existe
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
-        # Construir comando
+        key = self._cache_key(text, voice, rate, pitch, self.volume)
+        if self._from_cache(key, ".mp3", output_path):
+            return output_path
+        
+        if not await self._synthesize(text, output_path, None, voice, rate, pitch, self.volume):
+            return None
+        
+        self._to_cache(key, ".mp3", output_path)
+        return output_path
+    
+    async def _synthesize(
+        self,
+        text: str,
+        audio_path: str,
+        srt_path: Optional[str],
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> bool:
+        """Sintetiza (por bloques si el texto es largo) audio y, opcionalmente, SRT"""
+        if self.chunk_chars and len(text) > self.chunk_chars:
+            chunks = chunk_sentences(split_into_sentences(text), self.chunk_chars)
+            if len(chunks) > 1:
+                return await self._synthesize_chunked(
+                    chunks, audio_path, srt_path, voice, rate, pitch, volume
+                )
+        
+        return await self._synthesize_single(text, audio_path, srt_path, voice, rate, pitch, volume)
+    
+    async def _synthesize_single(
+        self,
+        text: str,
+        audio_path: str,
+        srt_path: Optional[str],
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> bool:
+        """Sintetiza un texto en una sola petición con el backend configurado"""
+        args = (text, audio_path, srt_path, voice, rate, pitch, volume)
+        
+        if self.backend == "cli" or not HAS_EDGE_TTS:
+            return await self._synthesize_cli(*args)
+        
+        try:
+            return await asyncio.wait_for(self._synthesize_library(*args), self.timeout)
+        except asyncio.TimeoutError:
+            print("Timeout generando audio")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error TTS (edge_tts): {e}")
+        
+        # En modo auto, un fallo de la librería se reintenta con el CLI
+        if self.backend == "auto":
+            return await self._synthesize_cli(*args)
+        return False
+    
+    async def _synthesize_library(
+        self,
+        text: str,
+        audio_path: str,
+        srt_path: Optional[str],
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> bool:
+        """Sintetiza en proceso con la librería edge_tts"""
+        communicate = edge_tts.Communicate(
+            text, voice, rate=rate, pitch=pitch, volume=volume, **_word_boundary_kwargs()
+        )
+        
+        boundaries = []
+        tmp_path = f"{audio_path}.part"
+        
+        try:
+            with open(tmp_path, 'wb') as f:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        f.write(chunk["data"])
+                    elif chunk["type"].endswith("Boundary"):
+                        boundaries.append((chunk["offset"], chunk["duration"], chunk["text"]))
+            
+            if os.path.getsize(tmp_path) == 0:
+                return False
+            os.replace(tmp_path, audio_path)
+        finally:
+            Path(tmp_path).unlink(missing_ok=True)
+        
+        if srt_path:
+            with open(srt_path, 'w', encoding='utf-8') as f:
+                f.write(boundaries_to_srt(boundaries))
+            # Tiempos por palabra reales (karaoke / grupos de palabras)
+            if boundaries:
+                WordTimings.from_boundaries(boundaries).save(words_path_for(srt_path))
+        
+        return True
+    
+    async def _synthesize_cli(
+        self,
+        text: str,
+        audio_path: str,
+        srt_path: Optional[str],
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> bool:
+        """Sintetiza con el CLI de edge-tts (subproceso cancelable)"""
         cmd = [
             "edge-tts",
             "--voice", voice,
             "--rate", rate,
             "--pitch", pitch,
-            "--volume", self.volume,
+            "--volume", volume,
             "--text", text,
-            "--write-media", output_path
+            "--write-media", audio_path
         ]
+        if srt_path:
+            cmd += ["--write-subtitles", srt_path]
         
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
             )
-            
-            if result.returncode == 0 and Path(output_path).exists():
-                return output_path
-            else:
-                print(f"Error TTS: {result.stderr}")
-                return None
-                
-        except subprocess.TimeoutExpired:
-            print("Timeout generando audio")
-            return None
-        except Exception as e:
+        except OSError as e:
             print(f"Error: {e}")
+            return False
+        
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            proc.kill()
+            await proc.wait()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            print("Timeout generando audio")
+            return False
+        
+        if proc.returncode == 0 and Path(audio_path).exists():
+            return True
+        
+        print(f"Error TTS: {stderr.decode(errors='replace')}")
+        return False
+    
+    async def _synthesize_chunked(
+        self,
+        chunks: List[str],
+        audio_path: str,
+        srt_path: Optional[str],
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> bool:
+        """
+        Sintetiza bloques en paralelo y los une en un solo MP3 + SRT.
+        
+        Cada bloque se cachea por separado (los bloques repetidos entre
+        guiones no se vuelven a pedir) y se reintenta individualmente.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        work_dir = tempfile.mkdtemp(prefix=".tts-chunks-", dir=Path(audio_path).parent)
+        
+        async def synthesize_chunk(index: int, chunk: str) -> Optional[Tuple[str, Optional[str]]]:
+            chunk_audio = os.path.join(work_dir, f"chunk_{index:03d}.mp3")
+            chunk_srt = os.path.join(work_dir, f"chunk_{index:03d}.srt") if srt_path else None
+            key = self._cache_key(chunk, voice, rate, pitch, volume)
+            
+            if self._from_cache(key, ".mp3", chunk_audio) and (
+                not chunk_srt or self._from_cache(key, ".srt", chunk_srt)
+            ):
+                if chunk_srt:
+                    self._from_cache(key, ".words.json", words_path_for(chunk_srt))
+                return chunk_audio, chunk_srt
+            
+            for attempt in range(self.chunk_retries + 1):
+                if attempt:
+                    await asyncio.sleep(2 ** (attempt - 1))
+                async with semaphore:
+                    ok = await self._synthesize_single(
+                        chunk, chunk_audio, chunk_srt, voice, rate, pitch, volume
+                    )
+                if ok and (not chunk_srt or Path(chunk_srt).exists()):
+                    self._to_cache(key, ".mp3", chunk_audio)
+                    if chunk_srt:
+                        self._to_cache(key, ".srt", chunk_srt)
+                        if Path(words_path_for(chunk_srt)).exists():
+                            self._to_cache(key, ".words.json", words_path_for(chunk_srt))
+                    return chunk_audio, chunk_srt
+            
+            print(f"❌ Bloque TTS {index + 1}/{len(chunks)} falló tras {self.chunk_retries + 1} intentos")
             return None
+        
+        try:
+            results = await asyncio.gather(
+                *(synthesize_chunk(i, chunk) for i, chunk in enumerate(chunks))
+            )
+            if not all(results):
+                return False
+            
+            # MP3 de Edge-TTS = tramas sin cabecera: concatenar bytes no deja huecos
+            parts = []
+            words = WordTimings()
+            offset = 0.0
+            tmp_audio = f"{audio_path}.part"
+            with open(tmp_audio, 'wb') as out:
+                for chunk_audio, chunk_srt in results:
+                    with open(chunk_audio, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+                    if chunk_srt:
+                        with open(chunk_srt, 'r', encoding='utf-8') as f:
+                            parts.append((f.read(), offset))
+                        words.extend(WordTimings.for_narration(chunk_srt), offset)
+                    offset += self._mp3_duration(chunk_audio)
+            os.replace(tmp_audio, audio_path)
+            
+            if srt_path:
+                with open(srt_path, 'w', encoding='utf-8') as f:
+                    f.write(merge_srt(parts))
+                if len(words):
+                    words.save(words_path_for(srt_path))
+            
+            return True
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _attempt_timeout(self) -> float:
+        """Tiempo máximo de un intento (en auto: librería y después CLI, cada uno con timeout)"""
+        if self.backend == "auto" and HAS_EDGE_TTS:
+            return 2 * self.timeout
+        return self.timeout
+    
+    def _sync_timeout(self, text: str) -> float:
+        """Límite de espera de la API síncrona (por tandas de bloques si el texto es largo)"""
+        attempt = self._attempt_timeout()
+        if not self.chunk_chars or len(text) <= self.chunk_chars:
+            return attempt + 5
+        
+        # Los mismos bloques que _synthesize (no parte oraciones: puede haber más
+        # de len/chunk_chars)
+        chunks = len(chunk_sentences(split_into_sentences(text), self.chunk_chars))
+        if chunks <= 1:
+            return attempt + 5
+        
+        # Todos los intentos repartidos en max_concurrency huecos, más el más
+        # largo y las esperas entre reintentos (1, 2, 4... s) de un bloque
+        attempts = chunks * (self.chunk_retries + 1)
+        rounds = -(-attempts // self.max_concurrency) + 1
+        backoff = 2 ** self.chunk_retries - 1
+        return rounds * attempt + backoff + 30
+    
+    @staticmethod
+    def _mp3_duration(path: str) -> float:
+        """Duración de un MP3 (ffprobe; si no, estimada a 48 kbps de Edge-TTS)"""
+        duration = get_duration(path)
+        if duration > 0:
+            return duration
+        return os.path.getsize(path) * 8 / 48_000
+    
+    @staticmethod
+    def _cache_key(text: str, voice: str, rate: str, pitch: str, volume: str) -> str:
+        """Clave de caché de una síntesis"""
+        return MediaCache.make_key("tts", text, voice, rate, pitch, volume)
+    
+    def _from_cache(self, key: str, suffix: str, output_path: str) -> bool:
+        """Copia una entrada cacheada a output_path si existe"""
+        if not self.cache:
+            return False
+        cached = self.cache.get(key, suffix)
+        if not cached:
+            return False
+        # Copia (no hardlink): la narración puede reescribirse después (normalización)
+        self.cache.materialize(cached, output_path, link=False)
+        return True
+    
+    def _to_cache(self, key: str, suffix: str, path: str):
+        """Guarda un resultado en la caché (los fallos de caché no son fatales)"""
+        if not self.cache:
+            return
+        try:
+            self.cache.put(key, path, suffix)
+        except OSError as e:
+            print(f"⚠️ No se pudo cachear TTS: {e}")
+    
+    def cache_stats(self) -> Dict:
+        """Estadísticas de la caché de TTS"""
+        return self.cache.stats() if self.cache else {}
     
     def generate_from_file(
         self,
@@ -137,7 +622,7 @@ class TTSGenerator:
             input_path: Ruta al archivo de texto
             output_path: Ruta de salida
             voice: Voz a usar
-            
+        
         Returns:
             Ruta al archivo generado
         """
@@ -161,99 +646,238 @@ class TTSGenerator:
             audio_path: Ruta para el audio
             srt_path: Ruta para subtítulos SRT
             voice: Voz a usar
-            
+        
+        Returns:
+            Dict con rutas a audio, srt y words (tiempos por palabra, ver word_timings)
+        """
+        try:
+            return run_sync(
+                self.agenerate_with_srt(text, audio_path, srt_path, voice),
+                self._sync_timeout(text)
+            )
+        except TimeoutError:
+            print("Timeout generando audio")
+            return {"audio": None, "srt": None, "words": None}
+    
+    async def agenerate_with_srt(
+        self,
+        text: str,
+        audio_path: str,
+        srt_path: str,
+        voice: Optional[str] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Versión asíncrona de generate_with_srt().
+        
         Returns:
-            Dict con rutas a audio y srt
+            Dict con rutas a audio, srt y words
         """
         voice = voice or self.voice
+        words_path = words_path_for(srt_path)
         
         Path(audio_path).parent.mkdir(parents=True, exist_ok=True)
         Path(srt_path).parent.mkdir(parents=True, exist_ok=True)
         
+        key = self._cache_key(text, voice, self.rate, self.pitch, self.volume)
+        if self._from_cache(key, ".srt", srt_path) and self._from_cache(key, ".mp3", audio_path):
+            has_words = self._from_cache(key, ".words.json", words_path)
+            return {"audio": audio_path, "srt": srt_path, "words": words_path if has_words else None}
+        
+        # No reutilizar tiempos de una síntesis anterior en la misma ruta
+        Path(words_path).unlink(missing_ok=True)
+        
+        if not await self._synthesize(text, audio_path, srt_path, voice, self.rate, self.pitch, self.volume):
+            return {"audio": None, "srt": None, "words": None}
+        
+        if not Path(srt_path).exists():
+            return {"audio": audio_path, "srt": None, "words": None}
+        
+        self._to_cache(key, ".mp3", audio_path)
+        self._to_cache(key, ".srt", srt_path)
+        
+        has_words = Path(words_path).exists()
+        if has_words:
+            self._to_cache(key, ".words.json", words_path)
+        
+        return {"audio": audio_path, "srt": srt_path, "words": words_path if has_words else None}
+    
+    async def astream(
+        self,
+        text: str,
+        save_path: Optional[str] = None,
+        voice: Optional[str] = None,
+        block_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """
+        Entrega el MP3 de la narración por trozos según se sintetiza.
+        
+        Si la narración está en caché se lee del disco; si no, se emite lo
+        que va llegando de Edge-TTS (librería o stdout del CLI). Con
+        save_path se guarda también una copia completa, que se cachea al
+        terminar.
+        
+        Args:
+            text: Texto a convertir
+            save_path: Ruta donde guardar el MP3 completo (opcional)
+            voice: Voz a usar
+            block_size: Tamaño de lectura en caché / CLI
+        
+        Yields:
+            Bytes de MP3
+        """
+        voice = voice or self.voice
+        key = self._cache_key(text, voice, self.rate, self.pitch, self.volume)
+        
+        cached = self.cache.get(key, ".mp3") if self.cache else None
+        if cached:
+            if save_path:
+                Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+                self.cache.materialize(cached, save_path, link=False)
+            with open(cached, 'rb') as f:
+                while True:
+                    data = f.read(block_size)
+                    if not data:
+                        return
+                    yield data
+        
+        if self.backend == "cli" or not HAS_EDGE_TTS:
+            source = self._stream_cli(text, voice, block_size)
+        else:
+            source = self._stream_library(text, voice)
+        
+        tmp_path = f"{save_path}.part" if save_path else None
+        out = None
+        if tmp_path:
+            Path(tmp_path).parent.mkdir(parents=True, exist_ok=True)
+            out = open(tmp_path, 'wb')
+        
+        complete = False
+        try:
+            async for data in source:
+                if out:
+                    out.write(data)
+                yield data
+            complete = True
+        finally:
+            await source.aclose()
+            if out:
+                out.close()
+                if complete and os.path.getsize(tmp_path) > 0:
+                    os.replace(tmp_path, save_path)
+                    self._to_cache(key, ".mp3", save_path)
+                Path(tmp_path).unlink(missing_ok=True)
+    
+    async def _stream_library(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        """Trozos de audio de la librería edge_tts (timeout por lectura, como el CLI)"""
+        communicate = edge_tts.Communicate(
+            text, voice, rate=self.rate, pitch=self.pitch, volume=self.volume
+        )
+        stream = communicate.stream()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                except StopAsyncIteration:
+                    break
+                if chunk["type"] == "audio":
+                    yield chunk["data"]
+        finally:
+            await stream.aclose()
+    
+    async def _stream_cli(self, text: str, voice: str, block_size: int) -> AsyncIterator[bytes]:
+        """Trozos de audio del CLI de edge-tts (sin --write-media escribe en stdout)"""
         cmd = [
             "edge-tts",
             "--voice", voice,
             "--rate", self.rate,
             "--pitch", self.pitch,
-            "--text", text,
-            "--write-media", audio_path,
-            "--write-subtitles", srt_path
+            "--volume", self.volume,
+            "--text", text
         ]
         
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-            
-            return {
-                "audio": audio_path if result.returncode == 0 and Path(audio_path).exists() else None,
-                "srt": srt_path if result.returncode == 0 and Path(srt_path).exists() else None
-            }
-            
-        except Exception as e:
-            print(f"Error: {e}")
-            return {"audio": None, "srt": None}
+            while True:
+                data = await asyncio.wait_for(proc.stdout.read(block_size), self.timeout)
+                if not data:
+                    break
+                yield data
+            if await proc.wait() != 0:
+                raise RuntimeError(f"edge-tts terminó con código {proc.returncode}")
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
     
     @staticmethod
     def list_voices(language: Optional[str] = None) -> List[Dict]:
         """
-        Lista todas las voces disponibles.
+        Lista todas las voces disponibles (catálogo cacheado, ver voice_catalog).
         
         Args:
-            language: Filtrar por código de idioma (es, en, pt, etc.)
-            
+            language: Filtrar por código de idioma (es, en, pt...) o locale (es-MX)
+        
         Returns:
-            Lista de voces con info
+            Lista de voces con info (id, locale, language, region, gender...)
         """
-        try:
-            result = subprocess.run(
-                ["edge-tts", "--list-voices"],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            voices = []
-            for line in result.stdout.strip().split('\n'):
-                if not line.strip():
-                    continue
-                    
-                # Parse formato: Name: es-ES-AlvaroNeural
-                parts = line.split(':')
-                if len(parts) >= 2:
-                    voice_id = parts[1].strip()
-                    
-                    if language:
-                        if not voice_id.lower().startswith(language.lower()):
-                            continue
-                    
-                    voices.append({
-                        "id": voice_id,
-                        "language": voice_id.split('-')[0] if '-' in voice_id else "",
-                        "region": voice_id.split('-')[1] if voice_id.count('-') >= 1 else ""
-                    })
-            
-            return voices
-            
-        except Exception as e:
-            print(f"Error listando voces: {e}")
-            return []
+        catalog = get_catalog()
+        if not language:
+            return catalog.all()
+        if "-" in language:
+            return catalog.by_locale(language)
+        return catalog.by_language(language)
     
     @staticmethod
-    def get_recommended_voice(language: str = "es", gender: str = "male") -> str:
+    def is_valid_voice(voice: str) -> bool:
+        """
+        Comprueba que una voz existe (sin llamada de red si el catálogo está fresco).
+        
+        Args:
+            voice: ID de voz (ej. es-ES-AlvaroNeural)
+        
+        Returns:
+            True si existe (o si no hay catálogo con el que comprobarlo)
+        """
+        return get_catalog().is_valid(voice)
+    
+    @staticmethod
+    def get_recommended_voice(
+        language: str = "es",
+        gender: str = "male",
+        region: Optional[str] = None
+    ) -> str:
         """
         Obtiene una voz recomendada para el idioma y género.
         
+        Primero las voces curadas de RECOMMENDED_VOICES (que sigan
+        existiendo); si el idioma no está curado, cualquiera del catálogo.
+        
         Args:
-            language: Código de idioma (es, en, pt, fr, de)
+            language: Código de idioma (es, en, pt, fr, de...)
             gender: male | female
+            region: Región preferida (ES, MX...)
             
         Returns:
             ID de voz recomendada
         """
-        lang_voices = TTSGenerator.RECOMMENDED_VOICES.get(language, {})
-        voices = lang_voices.get(gender, [])
+        catalog = get_catalog()
+        curated = TTSGenerator.RECOMMENDED_VOICES.get(language, {}).get(gender, [])
+        if region:
+            curated = sorted(curated, key=lambda v: v.split("-")[1].upper() != region.upper())
+        
+        for voice in curated:
+            if catalog.is_valid(voice):
+                return voice
         
-        if voices:
-            return voices[0]
+        for key in ((language, region, gender), (language, None, gender), (language, None, None)):
+            voices = catalog.find(*key)
+            if voices:
+                return voices[0]["id"]
         
         # Fallback
         return "es-ES-AlvaroNeural"
@@ -318,7 +942,7 @@ Comandos:
         voices = TTSGenerator.list_voices(lang)
         print(f"\n🎤 Voces disponibles" + (f" ({lang})" if lang else "") + ":")
         for v in voices[:20]:
-            print(f"  - {v['id']}")
+            print(f"  - {v['id']} ({v.get('gender', '?')})")
         if len(voices) > 20:
             print(f"  ... y {len(voices) - 20} más")
     
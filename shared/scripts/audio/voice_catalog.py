@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Voice Catalog
+Catálogo de voces de Edge-TTS con metadatos completos y caché en disco.
+
+- Snapshot JSON persistente (<repo>/.cache/voices.json) con TTL: validar
+  una voz o buscar una recomendada no hace una llamada de red por ejecución
+- Índices en memoria por id, idioma, locale y (idioma, región, género)
+  para búsquedas O(1)
+- Si el servicio no responde se usa el snapshot caducado
+- Entiende la salida de `edge-tts --list-voices` de la v6 (bloques
+  Name:/Gender:) y de la v7 (tabla)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import edge_tts
+    HAS_EDGE_TTS = True
+except ImportError:
+    edge_tts = None
+    HAS_EDGE_TTS = False
+
+try:
+    from ..utils.media_cache import DEFAULT_CACHE_ROOT
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import DEFAULT_CACHE_ROOT
+
+
+DEFAULT_CATALOG_PATH = DEFAULT_CACHE_ROOT / "voices.json"
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def _write_json_atomic(path: Path, data: Dict):
+    """Escribe JSON en disco de forma atómica"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def parse_cli_output(output: str) -> List[Dict]:
+    """
+    Parsea la salida de `edge-tts --list-voices`.
+
+    Formatos:
+        v6: bloques "Name: es-ES-AlvaroNeural" / "Gender: Male" separados por línea vacía
+        v7: tabla "Name  Gender  ContentCategories  VoicePersonalities"
+
+    Args:
+        output: Texto de stdout del CLI
+
+    Returns:
+        Lista de voces normalizadas
+    """
+    lines = [line.rstrip() for line in output.replace("\r\n", "\n").split("\n")]
+    voices = []
+
+    # v7: cabecera de tabla + línea de guiones
+    header = next((i for i, line in enumerate(lines) if re.match(r"^Name\s{2,}Gender", line)), None)
+    if header is not None:
+        for line in lines[header + 1:]:
+            if not line.strip() or set(line.strip()) <= {"-", " "}:
+                continue
+            columns = re.split(r"\s{2,}", line.strip())
+            voices.append(normalize_voice({
+                "ShortName": columns[0],
+                "Gender": columns[1] if len(columns) > 1 else "",
+                "VoiceTag": {
+                    "ContentCategories": _split_list(columns[2] if len(columns) > 2 else ""),
+                    "VoicePersonalities": _split_list(columns[3] if len(columns) > 3 else "")
+                }
+            }))
+        return voices
+
+    # v6: bloques clave: valor
+    current: Dict = {}
+    for line in lines + [""]:
+        if not line.strip():
+            if current.get("Name"):
+                voices.append(normalize_voice({**current, "ShortName": current["Name"]}))
+            current = {}
+            continue
+        key, sep, value = line.partition(":")
+        if sep:
+            current[key.strip()] = value.strip()
+
+    return voices
+
+
+def _split_list(value: str) -> List[str]:
+    """'News, Novel' -> ['News', 'Novel']"""
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def normalize_voice(raw: Dict) -> Dict:
+    """
+    Convierte una voz de Edge-TTS (librería o CLI) al formato del catálogo.
+
+    Args:
+        raw: Diccionario con ShortName, Gender, Locale, VoiceTag...
+
+    Returns:
+        Voz con id, locale, language, region, gender, categories, personalities
+    """
+    voice_id = raw.get("ShortName") or raw.get("Name", "")
+    parts = voice_id.split("-")
+    locale = raw.get("Locale") or voice_id.rsplit("-", 1)[0]
+    tags = raw.get("VoiceTag") or {}
+
+    return {
+        "id": voice_id,
+        "locale": locale,
+        "language": parts[0].lower() if parts else "",
+        "region": parts[1].upper() if len(parts) > 2 else "",
+        "gender": (raw.get("Gender") or "").lower(),
+        "name": raw.get("FriendlyName", ""),
+        "categories": list(tags.get("ContentCategories", [])),
+        "personalities": list(tags.get("VoicePersonalities", []))
+    }
+
+
+class VoiceCatalog:
+    """Catálogo de voces con snapshot en disco e índices en memoria"""
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        """
+        Inicializa el catálogo (se carga bajo demanda).
+
+        Args:
+            path: Snapshot JSON (default: <repo>/.cache/voices.json)
+            ttl: Segundos antes de refrescar el snapshot
+        """
+        self.path = Path(path) if path else DEFAULT_CATALOG_PATH
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.fetched_at = 0.0
+        self._by_id: Dict[str, Dict] = {}
+        self._by_language: Dict[str, List[Dict]] = {}
+        self._by_locale: Dict[str, List[Dict]] = {}
+        self._by_group: Dict[Tuple[str, str, str], List[Dict]] = {}
+
+    def _ensure_loaded(self):
+        """Carga el snapshot y lo refresca si caducó"""
+        if self._loaded and time.time() - self.fetched_at < self.ttl:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self._load_snapshot()
+                self._loaded = True
+            if time.time() - self.fetched_at >= self.ttl:
+                self._refresh_locked()
+
+    def refresh(self) -> bool:
+        """
+        Vuelve a descargar el catálogo y actualiza el snapshot.
+
+        Returns:
+            True si se obtuvo un catálogo nuevo
+        """
+        with self._lock:
+            self._loaded = True
+            return self._refresh_locked()
+
+    def _refresh_locked(self) -> bool:
+        """Descarga y reindexa (con el lock tomado)"""
+        try:
+            voices = self._fetch()
+        except Exception as e:
+            print(f"⚠️ No se pudo obtener el catálogo de voces: {e}")
+            voices = []
+
+        if not voices:
+            # Mantener el snapshot anterior (caducado) y no reintentar en cada llamada
+            self.fetched_at = time.time() - self.ttl + min(self.ttl, 3600)
+            return False
+
+        self.fetched_at = time.time()
+        self._index(voices)
+
+        try:
+            _write_json_atomic(self.path, {"fetched_at": self.fetched_at, "voices": voices})
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el catálogo de voces: {e}")
+
+        return True
+
+    def _load_snapshot(self):
+        """Lee el snapshot JSON si existe"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+
+        self.fetched_at = float(data.get("fetched_at", 0))
+        self._index(data.get("voices", []))
+
+    @staticmethod
+    def _fetch() -> List[Dict]:
+        """Obtiene las voces de Edge-TTS (librería o CLI)"""
+        if HAS_EDGE_TTS:
+            try:
+                from .tts_generator import run_sync
+            except ImportError:
+                from audio.tts_generator import run_sync
+            return [normalize_voice(v) for v in run_sync(edge_tts.list_voices(), 30)]
+
+        result = subprocess.run(
+            ["edge-tts", "--list-voices"],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"código {result.returncode}")
+        return parse_cli_output(result.stdout)
+
+    def _index(self, voices: List[Dict]):
+        """Construye los índices de búsqueda"""
+        by_id, by_language, by_locale, by_group = {}, {}, {}, {}
+
+        for voice in voices:
+            by_id[voice["id"].lower()] = voice
+            by_language.setdefault(voice["language"], []).append(voice)
+            by_locale.setdefault(voice["locale"].lower(), []).append(voice)
+
+            for region in ("", voice["region"]):
+                for gender in ("", voice["gender"]):
+                    by_group.setdefault((voice["language"], region, gender), []).append(voice)
+
+        self._by_id = by_id
+        self._by_language = by_language
+        self._by_locale = by_locale
+        self._by_group = by_group
+
+    def get(self, voice_id: str) -> Optional[Dict]:
+        """Metadatos de una voz (None si no existe)"""
+        self._ensure_loaded()
+        return self._by_id.get(voice_id.lower())
+
+    def is_valid(self, voice_id: str) -> bool:
+        """
+        Comprueba si una voz existe.
+
+        Sin catálogo disponible (sin red y sin snapshot) no se bloquea:
+        devuelve True.
+        """
+        self._ensure_loaded()
+        if not self._by_id:
+            return True
+        return voice_id.lower() in self._by_id
+
+    def by_language(self, language: str) -> List[Dict]:
+        """Voces de un idioma (es, en, pt...)"""
+        self._ensure_loaded()
+        return list(self._by_language.get(language.lower(), []))
+
+    def by_locale(self, locale: str) -> List[Dict]:
+        """Voces de un locale (es-ES, es-MX...)"""
+        self._ensure_loaded()
+        return list(self._by_locale.get(locale.lower(), []))
+
+    def find(
+        self,
+        language: str,
+        region: Optional[str] = None,
+        gender: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Voces por idioma y, opcionalmente, región y género.
+
+        Args:
+            language: Código de idioma (es, en...)
+            region: Código de región (ES, MX...)
+            gender: male | female
+
+        Returns:
+            Lista de voces
+        """
+        self._ensure_loaded()
+        key = (language.lower(), (region or "").upper(), (gender or "").lower())
+        return list(self._by_group.get(key, []))
+
+    def all(self) -> List[Dict]:
+        """Todas las voces"""
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def stats(self) -> Dict:
+        """Resumen del catálogo"""
+        self._ensure_loaded()
+        return {
+            "voices": len(self._by_id),
+            "languages": len(self._by_language),
+            "fetched_at": self.fetched_at,
+            "age_hours": round((time.time() - self.fetched_at) / 3600, 1) if self.fetched_at else None,
+            "path": str(self.path)
+        }
+
+
+_default_catalog: Optional[VoiceCatalog] = None
+_default_lock = threading.Lock()
+
+
+def get_catalog() -> VoiceCatalog:
+    """Catálogo compartido del proceso"""
+    global _default_catalog
+    with _default_lock:
+        if _default_catalog is None:
+            _default_catalog = VoiceCatalog()
+        return _default_catalog
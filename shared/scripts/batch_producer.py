@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Batch Producer
+Producción de muchos videos TikTok en una sola ejecución.
+
+Lee un manifiesto JSON/JSONL de trabajos y los reparte en un pool de
+procesos dimensionado según los núcleos disponibles y el presupuesto de
+hilos de FFmpeg por render.
+
+Formato del manifiesto (JSONL, un trabajo por línea):
+    {"id": "idea-001", "script": "Texto...", "keywords": ["space"], "caption": "..."}
+
+También se acepta JSON con una lista de trabajos o {"jobs": [...]}.
+
+Uso:
+    python batch_producer.py --manifest jobs.jsonl --output "/tiktok/assets" \
+        --config tiktok/config/config.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional
+
+# Añadir el directorio del script al path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tiktok_producer import TikTokProducer, load_platform_config
+
+
+# Productor del proceso worker (uno por proceso, reutilizado entre trabajos)
+_producer: Optional[TikTokProducer] = None
+
+
+def load_manifest(manifest_path: str) -> List[Dict]:
+    """
+    Carga los trabajos de un manifiesto JSON o JSONL.
+
+    Args:
+        manifest_path: Ruta al manifiesto
+
+    Returns:
+        Lista de trabajos {id, script, keywords, caption}
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    if manifest_path.endswith(".jsonl"):
+        jobs = [json.loads(line) for line in content.splitlines() if line.strip()]
+    else:
+        data = json.loads(content)
+        jobs = data.get("jobs", []) if isinstance(data, dict) else data
+
+    for i, job in enumerate(jobs):
+        if not job.get("id") or not job.get("script"):
+            raise ValueError(f"Trabajo {i} sin 'id' o 'script' en {manifest_path}")
+
+    return jobs
+
+
+def plan_workers(ffmpeg_threads: int = 2, max_workers: Optional[int] = None) -> int:
+    """
+    Calcula el número de procesos según núcleos y hilos de FFmpeg por render.
+
+    Args:
+        ffmpeg_threads: Hilos asignados a cada invocación de FFmpeg
+        max_workers: Límite superior opcional
+
+    Returns:
+        Número de workers (mínimo 1)
+    """
+    cores = os.cpu_count() or 1
+    workers = max(1, cores // max(1, ffmpeg_threads))
+    if max_workers:
+        workers = min(workers, max_workers)
+    return workers
+
+
+def _init_worker(output_dir: str, config: Dict, pexels_api_key: Optional[str]):
+    """Inicializa el productor de este proceso (cada trabajo usa su propio workspace)"""
+    global _producer
+
+    _producer = TikTokProducer(output_dir, pexels_api_key=pexels_api_key, config=config)
+
+
+def _run_job(job: Dict) -> Dict:
+    """Produce un trabajo en el proceso worker"""
+    return _producer.produce(
+        script_text=job["script"],
+        video_id=job["id"],
+        keywords=job.get("keywords"),
+        caption=job.get("caption")
+    )
+
+
+def run_batch(
+    jobs: List[Dict],
+    output_dir: str,
+    config: Optional[Dict] = None,
+    pexels_api_key: Optional[str] = None,
+    workers: Optional[int] = None,
+    results_path: Optional[str] = None
+) -> List[Dict]:
+    """
+    Produce una lista de trabajos en paralelo.
+
+    Args:
+        jobs: Trabajos {id, script, keywords, caption}
+        output_dir: Directorio base de salida
+        config: Configuración para TikTokProducer (incluye ffmpeg_threads)
+        pexels_api_key: API key de Pexels (opcional)
+        workers: Procesos a usar (default: núcleos / ffmpeg_threads)
+        results_path: Archivo JSONL donde registrar cada resultado
+
+    Returns:
+        Lista de resultados con el mismo formato que TikTokProducer.produce()
+    """
+    config = {"ffmpeg_threads": 2, **(config or {})}
+    workers = workers or plan_workers(config["ffmpeg_threads"], len(jobs))
+
+    if not results_path:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        results_path = str(Path(output_dir) / f"batch-results-{stamp}.jsonl")
+    Path(results_path).parent.mkdir(parents=True, exist_ok=True)
+
+    print(f"🏭 Batch: {len(jobs)} videos | {workers} workers x {config['ffmpeg_threads']} hilos FFmpeg")
+
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(output_dir, config, pexels_api_key)
+    ) as pool, open(results_path, 'a', encoding='utf-8') as log:
+        futures = {pool.submit(_run_job, job): job for job in jobs}
+
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {
+                    "video_id": job["id"],
+                    "success": False,
+                    "files": {},
+                    "errors": [f"Worker falló: {e}"]
+                }
+
+            results.append(result)
+            log.write(json.dumps(result, ensure_ascii=False) + "\n")
+            log.flush()
+
+            status = "✅" if result.get("success") else "❌"
+            print(f"{status} [{len(results)}/{len(jobs)}] {job['id']}")
+
+    ok = sum(1 for r in results if r.get("success"))
+    print(f"\n📊 Batch terminado: {ok}/{len(jobs)} correctos | Log: {results_path}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Produce muchos videos TikTok en paralelo")
+    parser.add_argument("--manifest", required=True, help="Manifiesto JSON/JSONL de trabajos")
+    parser.add_argument("--output", required=True, help="Directorio de salida")
+    parser.add_argument("--workers", type=int, help="Procesos en paralelo (default: núcleos / hilos)")
+    parser.add_argument("--ffmpeg-threads", type=int, default=2, help="Hilos por render de FFmpeg")
+    parser.add_argument("--results", help="Archivo JSONL de resultados")
+    parser.add_argument("--tmpfs", action="store_true", help="Intermedios en /dev/shm")
+    parser.add_argument("--profile", choices=["draft", "publish", "archive"],
+                        help="Perfil de codificación (default: el del config)")
+    parser.add_argument("--config", help="config.json de plataforma (encoding, subtítulos y audio)")
+
+    args = parser.parse_args()
+
+    # Config de plataforma para todos los workers; los flags tienen prioridad
+    config = load_platform_config(args.config) if args.config else {}
+    config["ffmpeg_threads"] = args.ffmpeg_threads
+    config["use_tmpfs"] = args.tmpfs or None
+    if args.profile:
+        config["encoder_profile"] = args.profile
+
+    jobs = load_manifest(args.manifest)
+    results = run_batch(
+        jobs,
+        args.output,
+        config=config,
+        workers=args.workers,
+        results_path=args.results
+    )
+
+    sys.exit(0 if all(r.get("success") for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
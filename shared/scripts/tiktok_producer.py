@@ -18,9 +18,12 @@ import os
 import sys
 import subprocess
 import json
+import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
 # Añadir el directorio padre al path
@@ -29,11 +32,29 @@ sys.path.insert(0, str(Path(__file__).parent))
 from audio.tts_generator import TTSGenerator
 from audio.music_mixer import MusicMixer
 from video.pexels_client import PexelsClient
+from video.clip_ingest import ClipIngest
+from utils.workspace import make_workspace
+from utils.media_info import get_duration
+from utils.word_timings import WordTimings
+from utils.subtitle_cues import CueList, read_cues
+from video.subtitle_styles import style_from_section
+from video.subtitle_overlays import SubtitleOverlays
+from utils.ffmpeg_utils import can_stream_copy
+from utils.encoder_profiles import (
+    get_profile, load_encoding_config, intermediate_profile,
+    video_args, audio_args, scaled_resolution
+)
+
+# Hooks exitosos de TikTok: sus palabras se resaltan en los subtítulos
+INSIGHTS_PATH = Path(__file__).parents[2] / "tiktok" / "analytics" / "insights.json"
 
 
 class TikTokProducer:
     """Pipeline de producción de videos TikTok"""
     
+    # Keywords genéricas cuando el guion no trae ninguna
+    DEFAULT_KEYWORDS = ["abstract", "technology", "nature"]
+    
     # Configuración por defecto - OPTIMIZADA PARA TIKTOK
     DEFAULT_CONFIG = {
         "resolution": (1080, 1920),  # 9:16 vertical
@@ -42,13 +63,38 @@ class TikTokProducer:
         "voice_rate": "+20%",         # Más rápido para TikTok
         "voice_pitch": "+5Hz",        # Ligeramente más agudo = más energía
         "max_duration": 60,
-        "subtitle_style": "viral",
+        "subtitle_style": "viral",    # Preset de video/subtitle_styles.py
+        "subtitles": {},              # Sección "subtitles" del config (effects, keywords, styles)
+        "insights_path": None,        # Hooks para resaltar (default: tiktok/analytics/insights.json)
+        # Subtítulos: words (grupos alineados a la voz) | karaoke | sentences (cues del SRT)
+        "subtitle_mode": "words",
+        "subtitle_words": 3,          # Palabras máximas por evento
+        # Quemado: ass (libass en cada frame) | overlay (PNGs pre-rasterizados y cacheados)
+        "subtitle_render": "ass",
         # Música de fondo
         "background_music": True,
         "music_type": "tension",      # tension, dramatic, curiosity, epic
-        "music_volume": 0.12,         # Volumen bajo para no tapar voz
+        "music_volume": 0.12,         # Volumen bajo para no tapar voz (relativo a la voz)
+        "loudness_target": -14.0,     # LUFS de la mezcla final (None = volúmenes fijos)
+        "ducking": {"mode": "sidechain"},  # Música bajo la voz: sidechain | envelope | off
         "music_fade_in": 0.5,
-        "music_fade_out": 1.5
+        "music_fade_out": 1.5,
+        # Render: single_pass (una sola codificación) | multi_pass (legacy)
+        "render_mode": "single_pass",
+        # Descarga concurrente de clips
+        "fetch_workers": 6,           # Búsquedas/descargas en paralelo
+        "clip_timeout": 90,           # Deadline por clip (segundos)
+        "normalize_workers": 2,       # Clips recodificados a la vez (tras las descargas)
+        # Perfil de codificación: draft (preview de revisión) | publish | archive
+        "encoder_profile": "publish",
+        "encoder_profiles": {},       # Ajustes por perfil (sección "encoding")
+        # Hilos por invocación de FFmpeg (0 = el del perfil)
+        "ffmpeg_threads": 0,
+        # Directorio temporal base (default: <output_dir>/.temp)
+        "temp_dir": None,
+        # Workspace por trabajo en /dev/shm (None = variable USE_TMPFS)
+        "use_tmpfs": None,
+        "keep_temp": False            # Conservar el workspace (depuración)
     }
     
     def __init__(
@@ -70,6 +116,35 @@ class TikTokProducer:
         
         self.config = {**self.DEFAULT_CONFIG, **(config or {})}
         
+        # Perfil de codificación y resolución efectiva (draft = media resolución)
+        self.encoder = get_profile(
+            self.config["encoder_profile"],
+            self.config.get("encoder_profiles")
+        )
+        if self.config.get("ffmpeg_threads"):
+            self.encoder["threads"] = int(self.config["ffmpeg_threads"])
+        self.resolution = scaled_resolution(self.encoder, *self.config["resolution"])
+        
+        # Clips de stock normalizados una vez al formato intermedio (cacheados)
+        self.ingest = ClipIngest(*self.resolution, fps=self.config["fps"], profile=self.encoder)
+        
+        # Estilo de subtítulos compilado una vez (cabecera + resaltados)
+        insights = self.config.get("insights_path") or INSIGHTS_PATH
+        self.subtitle_style = style_from_section(
+            self.config["subtitle_style"],
+            self.config.get("subtitles"),
+            str(insights) if Path(insights).exists() else None
+        )
+        
+        # Eventos de subtítulos rasterizados una vez (modo overlay)
+        self.overlays = SubtitleOverlays(*self.resolution)
+        
+        # Validar la voz contra el catálogo cacheado (sin red si está fresco)
+        if not TTSGenerator.is_valid_voice(self.config["voice"]):
+            fallback = TTSGenerator.get_recommended_voice(self.config["voice"].split("-")[0])
+            print(f"⚠️ Voz desconocida {self.config['voice']} - usando {fallback}")
+            self.config["voice"] = fallback
+        
         # Inicializar generadores
         self.tts = TTSGenerator(
             voice=self.config["voice"],
@@ -79,7 +154,9 @@ class TikTokProducer:
         
         # Mezclador de música
         self.music_mixer = MusicMixer(
-            music_dir=str(self.output_dir / "music")
+            music_dir=str(self.output_dir / "music"),
+            target_lufs=self.config.get("loudness_target"),
+            ducking=self.config.get("ducking")
         )
         
         try:
@@ -91,10 +168,10 @@ class TikTokProducer:
         # Directorios de trabajo
         self.audio_dir = self.output_dir / "audio"
         self.video_dir = self.output_dir / "video"
-        self.temp_dir = self.output_dir / ".temp"
+        self.temp_dir = Path(self.config["temp_dir"]) if self.config.get("temp_dir") else self.output_dir / ".temp"
         
         for d in [self.audio_dir, self.video_dir, self.temp_dir]:
-            d.mkdir(exist_ok=True)
+            d.mkdir(parents=True, exist_ok=True)
     
     def produce(
         self,
@@ -122,9 +199,28 @@ class TikTokProducer:
             "errors": []
         }
         
+        # Workspace aislado: varios trabajos pueden ejecutarse a la vez
+        workspace = make_workspace(self.temp_dir, video_id, self.config.get("use_tmpfs"))
+        workspace.keep = self.config.get("keep_temp", False)
+        
+        # Etapa de stock en segundo plano: solo necesita keywords y una estimación
+        stock_stage = ThreadPoolExecutor(max_workers=1)
+        cancel = threading.Event()
+        fetch_pools: List[ThreadPoolExecutor] = []
+        
         try:
-            # 1. Generar audio TTS
-            print(f"🎙️ Generando audio TTS...")
+            if not keywords:
+                keywords = self.DEFAULT_KEYWORDS
+            
+            estimated = self._estimate_duration(script_text)
+            clips_estimated = self._clips_needed(estimated)
+            clips_future = stock_stage.submit(
+                self._fetch_clips, keywords[:clips_estimated], workspace.path, 0,
+                cancel, fetch_pools
+            )
+            
+            # 1. Generar audio TTS (en paralelo con la descarga de stock)
+            print(f"🎙️ Generando audio TTS (stock en paralelo, ~{estimated:.0f}s estimados)...")
             audio_path = str(self.audio_dir / f"narration-{video_id}.mp3")
             vtt_path = str(self.audio_dir / f"narration-{video_id}.vtt")
             
@@ -142,13 +238,21 @@ class TikTokProducer:
             result["files"]["subtitles_srt"] = tts_result.get("srt")
             
             # Obtener duración del audio
-            duration = self._get_duration(audio_path)
+            duration = get_duration(audio_path, 30.0)
             result["duration"] = duration
             print(f"   ✓ Audio generado: {duration:.1f}s")
             
-            # 2. Obtener videos de stock
+            # 2. Recoger videos de stock y ajustar al número real de clips
             print(f"📹 Obteniendo videos de stock...")
-            clips = self._get_stock_clips(keywords or [], duration)
+            clips = clips_future.result()
+            clips_needed = self._clips_needed(duration)
+            
+            if clips_needed > clips_estimated:
+                clips += self._fetch_clips(
+                    keywords[clips_estimated:clips_needed], workspace.path, clips_estimated,
+                    cancel, fetch_pools
+                )
+            clips = clips[:clips_needed]
             
             if not clips:
                 result["errors"].append("No se pudieron obtener clips de stock")
@@ -157,59 +261,50 @@ class TikTokProducer:
             result["files"]["clips"] = clips
             print(f"   ✓ {len(clips)} clips descargados")
             
-            # 3. Componer video
-            print(f"🎬 Componiendo video...")
-            video_no_subs = str(self.temp_dir / f"{video_id}_no_subs.mp4")
-            
-            if not self._compose_video(clips, audio_path, video_no_subs, duration):
-                result["errors"].append("Error componiendo video")
-                return result
-            
-            print(f"   ✓ Video base creado")
-            
-            # 4. Generar subtítulos ASS
+            # 3. Generar subtítulos ASS
             print(f"📝 Generando subtítulos...")
             ass_path = str(self.video_dir / f"subtitles-{video_id}.ass")
             
             if tts_result.get("srt"):
                 self._create_viral_ass(tts_result["srt"], ass_path)
                 result["files"]["subtitles_ass"] = ass_path
-            
-            # 5. Añadir subtítulos al video
-            video_with_subs = str(self.temp_dir / f"{video_id}_with_subs.mp4")
-            
-            if ass_path and Path(ass_path).exists():
-                if not self._add_subtitles(video_no_subs, ass_path, video_with_subs):
-                    # Si falla, usar video sin subs
-                    import shutil
-                    shutil.copy(video_no_subs, video_with_subs)
+                result["files"]["word_timings"] = tts_result.get("words")
             else:
-                import shutil
-                shutil.copy(video_no_subs, video_with_subs)
+                ass_path = None
             
-            # 6. Añadir música de fondo
-            final_path = str(self.video_dir / f"final" / f"{video_id}-final.mp4")
+            # Los drafts no sobrescriben el render final
+            suffix = "draft" if self.encoder["name"] == "draft" else "final"
+            final_path = str(self.video_dir / f"final" / f"{video_id}-{suffix}.mp4")
             Path(final_path).parent.mkdir(exist_ok=True)
+            result["encoder_profile"] = self.encoder["name"]
             
-            if self.config.get("background_music", True):
-                print(f"🎵 Añadiendo música de fondo ({self.config.get('music_type', 'tension')})...")
-                music_result = self.music_mixer.add_music_to_video(
-                    video_with_subs,
-                    final_path,
-                    music_type=self.config.get("music_type", "tension"),
-                    music_volume=self.config.get("music_volume", 0.12),
-                    fade_in=self.config.get("music_fade_in", 0.5),
-                    fade_out=self.config.get("music_fade_out", 1.5)
+            # 4. Render en una sola pasada (clips + subs + música)
+            rendered = False
+            if self.config.get("render_mode", "single_pass") == "single_pass":
+                print(f"🎬 Renderizando video (una pasada)...")
+                music_path = None
+                if self.config.get("background_music", True):
+                    music_path = self.music_mixer.resolve_music(
+                        self.config.get("music_type", "tension")
+                    )
+                
+                rendered = self._render_single_pass(
+                    clips, audio_path, ass_path, music_path, final_path, duration,
+                    workspace.path
                 )
-                if music_result:
-                    print(f"   ✓ Música añadida")
-                    result["music_added"] = True
+                if rendered:
+                    print(f"   ✓ Video renderizado")
+                    if music_path:
+                        result["music_added"] = True
                 else:
-                    import shutil
-                    shutil.copy(video_with_subs, final_path)
-            else:
-                import shutil
-                shutil.copy(video_with_subs, final_path)
+                    print(f"   ⚠️ Render en una pasada falló, usando pipeline multi-pasada")
+            
+            if not rendered and not self._render_multi_pass(
+                clips, audio_path, ass_path, final_path, video_id, duration, result,
+                workspace.path
+            ):
+                result["errors"].append("Error componiendo video")
+                return result
             
             result["files"]["video"] = final_path
             result["success"] = True
@@ -221,54 +316,303 @@ class TikTokProducer:
             print(f"✅ Video producido: {final_path}")
             print(f"   📊 Duración: {duration:.1f}s | Tamaño: {size_mb:.1f}MB")
             
-            # Limpiar temporales
-            self._cleanup()
-            
         except Exception as e:
             result["errors"].append(str(e))
             print(f"❌ Error: {e}")
         
+        finally:
+            # Si se abortó antes de recoger los clips, no lanzar más descargas
+            # y esperar a las que estén en curso antes de borrar el workspace
+            cancel.set()
+            stock_stage.shutdown(wait=True, cancel_futures=True)
+            # Descargas rezagadas (pasado el deadline) que aún escriben en el workspace
+            for pool in fetch_pools:
+                pool.shutdown(wait=True, cancel_futures=True)
+            
+            # Guardar las búsquedas nuevas: los workers de batch_producer
+            # salen con os._exit y no ejecutan atexit
+            if self.pexels and self.pexels.search_cache:
+                self.pexels.search_cache.flush()
+            
+            # Limpiar temporales (solo los de este trabajo)
+            workspace.cleanup()
+        
         return result
     
-    def _get_stock_clips(self, keywords: List[str], duration: float) -> List[str]:
-        """Descarga clips de stock de Pexels"""
-        if not self.pexels:
-            return []
-        
-        clips = []
-        clips_needed = max(3, int(duration / 8))  # ~8 segundos por clip
-        
+    def _get_stock_clips(
+        self,
+        keywords: List[str],
+        duration: float,
+        work_dir: Optional[Path] = None
+    ) -> List[str]:
+        """Descarga clips de stock de Pexels para una duración dada"""
         # Si no hay keywords, usar genéricos
         if not keywords:
-            keywords = ["abstract", "technology", "nature"]
+            keywords = self.DEFAULT_KEYWORDS
+        
+        return self._fetch_clips(
+            keywords[:self._clips_needed(duration)], work_dir or self.temp_dir
+        )
+    
+    def _clips_needed(self, duration: float) -> int:
+        """Número de clips para una duración (~8 segundos por clip)"""
+        return max(3, int(duration / 8))
+    
+    def _estimate_duration(self, text: str) -> float:
+        """
+        Estima la duración de la narración antes de sintetizarla.
+        
+        Usa ~2.6 palabras/segundo (Edge-TTS en español a +0%) ajustado
+        por el voice_rate configurado.
+        """
+        rate = str(self.config.get("voice_rate", "+0%")).strip().rstrip("%")
+        try:
+            speed = 1 + float(rate) / 100
+        except ValueError:
+            speed = 1.0
         
-        for i, kw in enumerate(keywords[:clips_needed]):
-            videos = self.pexels.search_videos(kw, orientation="portrait", count=2)
+        words = len(text.split())
+        return words / (2.6 * max(speed, 0.1))
+    
+    def _fetch_clips(
+        self,
+        keywords: List[str],
+        work_dir: Path,
+        start_index: int = 0,
+        cancel: Optional[threading.Event] = None,
+        pools: Optional[List[ThreadPoolExecutor]] = None
+    ) -> List[str]:
+        """
+        Busca y descarga clips en paralelo.
+        
+        Todas las búsquedas salen a la vez y cada descarga empieza en cuanto
+        llega su resultado. Cada clip tiene su propio deadline; los que fallan
+        o no llegan a tiempo se descartan (éxito parcial). La normalización
+        de los descargados es una etapa aparte, fuera del deadline.
+        
+        Args:
+            keywords: Una keyword por clip
+            work_dir: Directorio del trabajo donde guardar los clips
+            start_index: Índice inicial para los nombres de archivo
+            cancel: Evento para no iniciar más descargas (trabajo abortado)
+            pools: Donde registrar el pool si se devuelve con descargas aún en
+                curso (quien borra work_dir debe esperarlas); None = esperarlas aquí
             
-            if videos:
-                video = videos[0]
-                clip_path = str(self.temp_dir / f"clip_{i:02d}.mp4")
-                
-                if self.pexels.download_video(video, clip_path):
-                    clips.append(clip_path)
+        Returns:
+            Rutas de los clips descargados, en el orden de las keywords
+        """
+        if not self.pexels or not keywords:
+            return []
+        
+        clip_timeout = self.config.get("clip_timeout", 90)
+        deadline = time.monotonic() + clip_timeout
+        workers = max(1, min(self.config.get("fetch_workers", 6), len(keywords)))
+        
+        pool = ThreadPoolExecutor(max_workers=workers)
+        futures = {
+            pool.submit(self._fetch_clip, start_index + i, kw, deadline, work_dir, cancel): i
+            for i, kw in enumerate(keywords)
+        }
         
-        return clips
+        # Margen para que las descargas detecten su deadline y terminen
+        done, pending = wait(futures, timeout=clip_timeout + 5)
+        
+        if pending:
+            print(f"   ⚠️ {len(pending)} clips sin completar antes del deadline")
+        
+        # Sin esperar a los rezagados, pero sin perderlos: comprueban cancel
+        # antes de escribir y el dueño del workspace los espera al limpiar
+        if pools is not None:
+            pools.append(pool)
+            pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            pool.shutdown(wait=True, cancel_futures=True)
+        
+        results = {}
+        raw = {}
+        for future in done:
+            try:
+                fetched = future.result()
+            except Exception as e:
+                print(f"   ⚠️ Error obteniendo clip: {e}")
+                continue
+            if not fetched:
+                continue
+            path, source_key = fetched
+            if source_key is None:
+                results[futures[future]] = path
+            else:
+                raw[futures[future]] = (path, source_key)
+        
+        # Normalización de los descargados (sin deadline de descarga; ffmpeg con timeout)
+        if raw and not (cancel and cancel.is_set()):
+            order = sorted(raw)
+            workers = max(1, min(self.config.get("normalize_workers", 2), len(order)))
+            with ThreadPoolExecutor(max_workers=workers) as normalize_pool:
+                normalized = normalize_pool.map(
+                    lambda i: self._normalize_clip(start_index + i, *raw[i], work_dir, cancel),
+                    order
+                )
+                for i, path in zip(order, normalized):
+                    if path:
+                        results[i] = path
+        
+        return [results[i] for i in sorted(results)]
     
-    def _compose_video(
+    def _fetch_clip(
+        self,
+        index: int,
+        keyword: str,
+        deadline: float,
+        work_dir: Path,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[Tuple[str, Optional[Tuple]]]:
+        """
+        Busca y descarga el clip de una keyword (ejecutado en un worker).
+        
+        Returns:
+            (clip normalizado de la caché, None) | (descarga original, source_key
+            pendiente de normalizar) | None si no hay clip
+        """
+        videos = self.pexels.search_videos(keyword, orientation="portrait", count=2)
+        
+        if not videos or time.monotonic() > deadline or (cancel and cancel.is_set()):
+            return None
+        
+        video = videos[0]
+        clip_path = str(Path(work_dir) / f"clip_{index:02d}.mp4")
+        
+        # Cada escritura en work_dir, solo si el trabajo sigue vivo
+        if cancel and cancel.is_set():
+            return None
+        
+        # Clip ya normalizado en una producción anterior: ni descarga ni recodificación
+        source_key = ("pexels", video.get("id"), video.get("url"))
+        normalized = self.ingest.get(source_key, clip_path)
+        if normalized:
+            return normalized, None
+        
+        raw_path = str(Path(work_dir) / f"raw_{index:02d}.mp4")
+        if not self.pexels.download_video(video, raw_path, deadline=deadline):
+            return None
+        if cancel and cancel.is_set():
+            return None
+        
+        return raw_path, source_key
+    
+    def _normalize_clip(
+        self,
+        index: int,
+        raw_path: str,
+        source_key: Tuple,
+        work_dir: Path,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[str]:
+        """Normaliza un clip descargado (si falla se usa el original: el render lo escalará)"""
+        if cancel and cancel.is_set():
+            return None
+        clip_path = str(Path(work_dir) / f"clip_{index:02d}.mp4")
+        return self.ingest.normalize(raw_path, source_key, clip_path) or raw_path
+    
+    def _render_multi_pass(
         self,
         clips: List[str],
         audio_path: str,
-        output_path: str,
-        duration: float
+        ass_path: Optional[str],
+        final_path: str,
+        video_id: str,
+        duration: float,
+        result: Dict,
+        work_dir: Path
     ) -> bool:
-        """Compone el video concatenando clips con audio"""
-        width, height = self.config["resolution"]
-        fps = self.config["fps"]
+        """Pipeline clásico: componer, quemar subtítulos y añadir música por separado"""
+        import shutil
+        
+        print(f"🎬 Componiendo video...")
+        video_no_subs = str(Path(work_dir) / f"{video_id}_no_subs.mp4")
+        
+        if not self._compose_video(clips, audio_path, video_no_subs, duration, work_dir):
+            return False
+        
+        print(f"   ✓ Video base creado")
+        
+        # Añadir subtítulos al video
+        video_with_subs = str(Path(work_dir) / f"{video_id}_with_subs.mp4")
+        
+        if ass_path and Path(ass_path).exists():
+            if not self._add_subtitles(video_no_subs, ass_path, video_with_subs, work_dir):
+                # Si falla, usar video sin subs
+                shutil.copy(video_no_subs, video_with_subs)
+        else:
+            shutil.copy(video_no_subs, video_with_subs)
+        
+        # Añadir música de fondo
+        if self.config.get("background_music", True):
+            print(f"🎵 Añadiendo música de fondo ({self.config.get('music_type', 'tension')})...")
+            music_result = self.music_mixer.add_music_to_video(
+                video_with_subs,
+                final_path,
+                music_type=self.config.get("music_type", "tension"),
+                music_volume=self.config.get("music_volume", 0.12),
+                fade_in=self.config.get("music_fade_in", 0.5),
+                fade_out=self.config.get("music_fade_out", 1.5)
+            )
+            if music_result:
+                print(f"   ✓ Música añadida")
+                result["music_added"] = True
+            else:
+                shutil.copy(video_with_subs, final_path)
+        else:
+            shutil.copy(video_with_subs, final_path)
+        
+        return True
+    
+    def _concat_input(
+        self,
+        clips: List[str],
+        duration: float,
+        work_dir: Path
+    ) -> Optional[List[str]]:
+        """
+        Input del demuxer concat si todos los clips están normalizados.
+        
+        Returns:
+            Argumentos de input (-f concat ... -i lista) o None si hay que escalar
+        """
+        compatible, _ = can_stream_copy(clips, *self.resolution)
+        if not compatible:
+            return None
+        
+        list_path = str(Path(work_dir) / "clips.ffconcat")
+        self.ingest.write_concat_list(clips, duration / len(clips), list_path)
+        return ["-f", "concat", "-safe", "0", "-i", list_path]
+    
+    def _build_clip_filters(
+        self,
+        clips: List[str],
+        duration: float,
+        output_label: str,
+        work_dir: Optional[Path] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Construye inputs y filtros trim/scale/crop/concat para los clips.
+        
+        Con clips normalizados (y work_dir) se usa el demuxer concat y no
+        hace falta ningún filtro por clip.
+        
+        Returns:
+            Tupla (argumentos de input, lista de filtros)
+        """
+        if work_dir is not None:
+            concat_input = self._concat_input(clips, duration, work_dir)
+            if concat_input:
+                return concat_input, [f"[0:v]null[{output_label}]"]
+        
+        width, height = self.resolution
         
         # Calcular tiempo por clip
         time_per_clip = duration / len(clips)
         
-        # Construir filtro complejo
         inputs = []
         filters = []
         concat_inputs = []
@@ -283,12 +627,116 @@ class TikTokProducer:
             )
             concat_inputs.append(f"[{filter_name}]")
         
-        # Añadir audio
+        filters.append(
+            f"{''.join(concat_inputs)}concat=n={len(clips)}:v=1:a=0[{output_label}]"
+        )
+        
+        return inputs, filters
+    
+    def _render_single_pass(
+        self,
+        clips: List[str],
+        audio_path: str,
+        ass_path: Optional[str],
+        music_path: Optional[Path],
+        output_path: str,
+        duration: float,
+        work_dir: Optional[Path] = None
+    ) -> bool:
+        """
+        Renderiza el video final con una única invocación de FFmpeg.
+        
+        Un solo filter_complex cubre trim/scale/crop/concat de los clips,
+        el quemado de subtítulos ASS y la mezcla voz + música con fades,
+        evitando las tres codificaciones libx264 del pipeline multi-pasada.
+        """
+        fps = self.config["fps"]
+        
+        has_subs = bool(ass_path) and Path(ass_path).exists()
+        video_label = "base" if has_subs else "outv"
+        inputs, filters = self._build_clip_filters(clips, duration, video_label, work_dir)
+        
+        if has_subs:
+            filters.extend(self._subtitle_filters(ass_path, "base", "outv", inputs, work_dir))
+        
+        # Voz
+        voice_index = inputs.count("-i")
         inputs.extend(["-i", audio_path])
+        audio_map = f"{voice_index}:a"
         
-        # Concatenar
-        concat_filter = f"{''.join(concat_inputs)}concat=n={len(clips)}:v=1:a=0[outv]"
-        filters.append(concat_filter)
+        # Ganancias desde la sonoridad medida (voz al objetivo, música por debajo)
+        music_volume = self.config.get("music_volume", 0.12)
+        gains = self.music_mixer.mix_gains(audio_path, music_path, music_volume)
+        
+        # Música
+        if music_path:
+            inputs.extend(self.music_mixer.music_input_args(music_path))
+            filters.append(self.music_mixer.build_mix_filter(
+                voice_input=f"{voice_index}:a",
+                music_input=f"{voice_index + 1}:a",
+                duration=duration,
+                music_volume=music_volume,
+                fade_in=self.config.get("music_fade_in", 0.5),
+                fade_out=self.config.get("music_fade_out", 1.5),
+                gains_db=gains,
+                ducking=self.music_mixer.duck_params(audio_path, work_dir or self.temp_dir)
+            ))
+            audio_map = "[aout]"
+        elif gains:
+            filters.append(self.music_mixer.build_gain_filter(f"{voice_index}:a", gains[0]))
+            audio_map = "[aout]"
+        
+        cmd = [
+            "ffmpeg", "-y",
+            *inputs,
+            "-filter_complex", ";".join(filters),
+            "-map", "[outv]",
+            "-map", audio_map,
+            *video_args(self.encoder),
+            *audio_args(self.encoder),
+            "-r", str(fps),
+            "-t", str(duration),
+            "-movflags", "+faststart",
+            output_path
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True)
+        return result.returncode == 0
+    
+    def _compose_video(
+        self,
+        clips: List[str],
+        audio_path: str,
+        output_path: str,
+        duration: float,
+        work_dir: Optional[Path] = None
+    ) -> bool:
+        """Compone el video concatenando clips con audio"""
+        fps = self.config["fps"]
+        
+        # Clips normalizados: concat por stream copy, solo se codifica el audio
+        concat_input = self._concat_input(clips, duration, work_dir) if work_dir else None
+        if concat_input:
+            cmd = [
+                "ffmpeg", "-y",
+                *concat_input,
+                "-i", audio_path,
+                "-map", "0:v",
+                "-map", "1:a",
+                "-c:v", "copy",
+                *audio_args(self.encoder),
+                "-t", str(duration),
+                "-movflags", "+faststart",
+                output_path
+            ]
+            
+            if subprocess.run(cmd, capture_output=True).returncode == 0:
+                return True
+        
+        inputs, filters = self._build_clip_filters(clips, duration, "outv")
+        
+        # Añadir audio
+        inputs.extend(["-i", audio_path])
         
         cmd = [
             "ffmpeg", "-y",
@@ -296,8 +744,8 @@ class TikTokProducer:
             "-filter_complex", ";".join(filters),
             "-map", "[outv]",
             "-map", f"{len(clips)}:a",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            "-c:a", "aac", "-b:a", "192k",
+            *video_args(intermediate_profile(self.encoder)),
+            *audio_args(self.encoder),
             "-r", str(fps),
             "-t", str(duration),
             "-movflags", "+faststart",
@@ -308,77 +756,78 @@ class TikTokProducer:
         return result.returncode == 0
     
     def _create_viral_ass(self, srt_path: str, ass_path: str):
-        """Convierte SRT a ASS con estilo viral"""
-        # Leer SRT
-        with open(srt_path, 'r', encoding='utf-8') as f:
-            srt_content = f.read()
-        
-        # Crear ASS básico
-        ass_header = """[Script Info]
-Title: TikTok Subtitles
-ScriptType: v4.00+
-PlayResX: 1080
-PlayResY: 1920
-WrapStyle: 0
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,Montserrat ExtraBold,72,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,4,0,2,50,50,400,1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
+        """Convierte SRT (o los tiempos por palabra) a ASS con estilo viral"""
+        mode = self.config.get("subtitle_mode", "words")
+        style = self.subtitle_style
         
-        # Parsear SRT y convertir a ASS
-        events = []
-        blocks = srt_content.strip().split('\n\n')
-        
-        for block in blocks:
-            lines = block.strip().split('\n')
-            if len(lines) >= 3:
-                time_line = lines[1]
-                text = ' '.join(lines[2:])
-                
-                # Parsear tiempos
-                start, end = time_line.split(' --> ')
-                start = self._srt_to_ass_time(start)
-                end = self._srt_to_ass_time(end)
-                
-                # Añadir colores a palabras clave
-                text = self._highlight_keywords(text)
-                
-                events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}")
+        # Eventos alineados a la voz desde los tiempos por palabra
+        timings = WordTimings.for_narration(srt_path) if mode != "sentences" else None
+        if timings:
+            events = timings.ass_events(
+                mode,
+                int(self.config.get("subtitle_words", 3)),
+                transform=style.decorate
+            )
+            content = style.render(
+                events,
+                "Karaoke" if mode == "karaoke" else "Default",
+                escape=False,
+                decorate=False
+            )
+        else:
+            # Un evento por cue del SRT (líneas unidas), con palabras clave resaltadas
+            cues = CueList.from_segments(
+                (text.replace("\n", " "), start, end) for start, end, text in read_cues(srt_path)
+            )
+            content = style.render(cues)
         
         with open(ass_path, 'w', encoding='utf-8') as f:
-            f.write(ass_header + '\n'.join(events))
-    
-    def _srt_to_ass_time(self, srt_time: str) -> str:
-        """Convierte tiempo SRT a formato ASS"""
-        srt_time = srt_time.strip().replace(',', '.')
-        parts = srt_time.split(':')
-        if len(parts) == 3:
-            h, m, s = parts
-            return f"{int(h)}:{m}:{s[:5]}"
-        return "0:00:00.00"
+            f.write(content)
     
-    def _highlight_keywords(self, text: str) -> str:
-        """Resalta palabras clave en mayúsculas"""
-        # Palabras en mayúsculas se colorean
-        import re
+    def _subtitle_filters(
+        self,
+        ass_path: str,
+        source: str,
+        output: str,
+        inputs: List[str],
+        work_dir: Optional[Path] = None
+    ) -> List[str]:
+        """
+        Filtros de quemado de subtítulos según subtitle_render.
+        
+        En modo overlay añade a inputs los PNGs pre-rasterizados; si no se
+        pueden preparar se vuelve a ass=.
         
-        def colorize(match):
-            word = match.group(0)
-            return f"{{\\c&H00FFFF&}}{word}{{\\c&HFFFFFF&}}"
+        Returns:
+            Lista de filtros de [source] a [output]
+        """
+        if self.config.get("subtitle_render") == "overlay":
+            plan = self.overlays.plan(ass_path, work_dir or self.temp_dir)
+            if plan:
+                first_input = inputs.count("-i")
+                inputs.extend(plan.input_args())
+                return plan.filters(source, output, first_input)
         
-        return re.sub(r'\b[A-ZÁÉÍÓÚÑ]{2,}\b', colorize, text)
+        return [f"[{source}]ass={ass_path}[{output}]"]
     
-    def _add_subtitles(self, video_path: str, ass_path: str, output_path: str) -> bool:
+    def _add_subtitles(
+        self,
+        video_path: str,
+        ass_path: str,
+        output_path: str,
+        work_dir: Optional[Path] = None
+    ) -> bool:
         """Añade subtítulos ASS al video"""
+        inputs = ["-i", video_path]
+        filters = self._subtitle_filters(ass_path, "0:v", "outv", inputs, work_dir)
+        
         cmd = [
             "ffmpeg", "-y",
-            "-i", video_path,
-            "-vf", f"ass={ass_path}",
-            "-c:v", "libx264", "-preset", "medium", "-crf", "22",
+            *inputs,
+            "-filter_complex", ";".join(filters),
+            "-map", "[outv]",
+            "-map", "0:a?",
+            *video_args(self.encoder),
             "-c:a", "copy",
             "-movflags", "+faststart",
             output_path
@@ -386,28 +835,46 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         
         result = subprocess.run(cmd, capture_output=True)
         return result.returncode == 0
+
+
+def load_platform_config(config_path: str, review: bool = False) -> Dict:
+    """
+    Configuración de TikTokProducer desde un config.json de plataforma.
+    
+    Lee las secciones encoding, subtitles, audio y el subtitle_style de video.
     
-    def _get_duration(self, file_path: str) -> float:
-        """Obtiene duración de un archivo multimedia"""
-        result = subprocess.run([
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            file_path
-        ], capture_output=True, text=True)
+    Args:
+        config_path: Ruta a tiktok/config/config.json
+        review: Usar el review_profile (render de revisión) en vez del profile
         
-        try:
-            return float(result.stdout.strip())
-        except:
-            return 30.0
+    Returns:
+        Diccionario de overrides para TikTokProducer(config=...)
+    """
+    config = {}
+    encoding = load_encoding_config(config_path)
+    if encoding:
+        config["encoder_profile"] = encoding["review_profile" if review else "profile"]
+        config["encoder_profiles"] = encoding["profiles"]
     
-    def _cleanup(self):
-        """Limpia archivos temporales"""
-        import shutil
-        if self.temp_dir.exists():
-            for f in self.temp_dir.iterdir():
-                if f.is_file():
-                    f.unlink()
+    with open(config_path, 'r', encoding='utf-8') as f:
+        platform = json.load(f)
+    subtitles = platform.get("subtitles") or {}
+    config["subtitle_style"] = platform.get("video", {}).get("subtitle_style", "viral")
+    config["subtitles"] = subtitles
+    if "mode" in subtitles:
+        config["subtitle_mode"] = subtitles["mode"]
+    if "words_per_event" in subtitles:
+        config["subtitle_words"] = subtitles["words_per_event"]
+    if "render" in subtitles:
+        config["subtitle_render"] = subtitles["render"]
+    audio = platform.get("audio") or {}
+    if "music_volume" in audio:
+        config["music_volume"] = audio["music_volume"]
+    if "target_lufs" in audio:
+        config["loudness_target"] = audio["target_lufs"]
+    if "ducking" in audio:
+        config["ducking"] = audio["ducking"]
+    return config
 
 
 def main():
@@ -416,10 +883,21 @@ def main():
     parser.add_argument("--id", required=True, help="ID del video")
     parser.add_argument("--output", required=True, help="Directorio de salida")
     parser.add_argument("--keywords", nargs="+", help="Keywords para stock")
+    parser.add_argument("--profile", choices=["draft", "publish", "archive"],
+                        help="Perfil de codificación (default: el del config)")
+    parser.add_argument("--config", help="config.json de plataforma (encoding y subtítulos)")
+    parser.add_argument("--review", action="store_true",
+                        help="Render de revisión con el review_profile (draft)")
     
     args = parser.parse_args()
     
-    producer = TikTokProducer(args.output)
+    config = load_platform_config(args.config, args.review) if args.config else {}
+    if args.review and not args.config:
+        config["encoder_profile"] = "draft"
+    if args.profile:
+        config["encoder_profile"] = args.profile
+    
+    producer = TikTokProducer(args.output, config=config)
     result = producer.produce(
         script_text=args.script,
         video_id=args.id,
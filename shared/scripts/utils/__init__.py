@@ -4,6 +4,8 @@ from .ffmpeg_utils import (
     get_video_info,
     get_audio_info,
     normalize_audio,
+    has_closed_gop,
+    can_stream_copy,
     concat_videos,
     add_audio_to_video,
     scale_video,
@@ -14,3 +16,11 @@ from .ffmpeg_utils import (
     create_color_video,
     check_ffmpeg_installed
 )
+# Media Metadata / Cache / Workspaces / Encoding
+from .media_info import MediaInfo, probe, probe_many
+from .media_cache import MediaCache
+from .workspace import JobWorkspace, make_workspace
+from .encoder_profiles import PROFILES, get_profile, load_profile
+from .word_timings import WordTimings
+from .subtitle_cues import CueList, read_cues, write_cues, convert_many
+from .loudness import Loudness, LoudnessAnalyzer, analyze_loudness, loudnorm_filter
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Encoder Profiles
+Perfiles de codificación con nombre para todos los renders.
+
+Perfiles incluidos:
+- draft:   preview rápido a media resolución (flujo require_review)
+- publish: calidad de publicación (default)
+- archive: máxima calidad para guardar másters
+
+Los perfiles se pueden ajustar desde la sección "encoding" de
+tiktok/config/config.json o youtube/config/config.json:
+
+    "encoding": {
+        "profile": "publish",
+        "review_profile": "draft",
+        "profiles": {"publish": {"crf": 21}}
+    }
+
+El codec es configurable (libx264, libx265, h264_nvenc, h264_qsv,
+h264_videotoolbox...) y los parámetros se traducen a las opciones de
+cada encoder.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+PROFILES = {
+    "draft": {
+        "codec": "libx264",
+        "preset": "ultrafast",
+        "crf": 30,
+        "tune": "fastdecode",
+        "threads": 0,
+        "x264_params": "",
+        "pix_fmt": "yuv420p",
+        "audio_codec": "aac",
+        "audio_bitrate": "96k",
+        "scale": 0.5  # 1080x1920 -> 540x960
+    },
+    "publish": {
+        "codec": "libx264",
+        "preset": "medium",
+        "crf": 22,
+        "tune": None,
+        "threads": 0,
+        "x264_params": "",
+        "pix_fmt": "yuv420p",
+        "audio_codec": "aac",
+        "audio_bitrate": "192k",
+        "scale": 1.0
+    },
+    "archive": {
+        "codec": "libx264",
+        "preset": "slow",
+        "crf": 18,
+        "tune": None,
+        "threads": 0,
+        "x264_params": "",
+        "pix_fmt": "yuv420p",
+        "audio_codec": "aac",
+        "audio_bitrate": "256k",
+        "scale": 1.0
+    }
+}
+
+DEFAULT_PROFILE = "publish"
+
+# Presets de x264 de más rápido a más lento
+PRESET_ORDER = [
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow"
+]
+
+# Traducción de presets x264 a otros encoders
+NVENC_PRESETS = {
+    "ultrafast": "p1", "superfast": "p1", "veryfast": "p2", "faster": "p3",
+    "fast": "p3", "medium": "p4", "slow": "p5", "slower": "p6", "veryslow": "p7"
+}
+QSV_PRESETS = {
+    "ultrafast": "veryfast", "superfast": "veryfast", "veryfast": "veryfast",
+    "faster": "faster", "fast": "fast", "medium": "medium",
+    "slow": "slow", "slower": "slower", "veryslow": "veryslow"
+}
+
+
+def get_profile(name: Optional[str] = None, overrides: Optional[Dict] = None) -> Dict:
+    """
+    Obtiene un perfil de codificación.
+
+    Args:
+        name: draft | publish | archive (o un perfil definido en overrides)
+        overrides: Diccionario {nombre_perfil: {clave: valor}} con ajustes
+
+    Returns:
+        Diccionario del perfil (copia), con la clave "name"
+    """
+    name = name or DEFAULT_PROFILE
+    overrides = overrides or {}
+
+    if name not in PROFILES and name not in overrides:
+        print(f"⚠️ Perfil de codificación '{name}' desconocido, usando '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE
+
+    base = PROFILES.get(name, PROFILES[DEFAULT_PROFILE])
+    return {**base, **overrides.get(name, {}), "name": name}
+
+
+def load_encoding_config(config_path: str) -> Dict:
+    """
+    Lee la sección "encoding" de un config.json de plataforma.
+
+    Args:
+        config_path: Ruta a tiktok/config/config.json o youtube/config/config.json
+
+    Returns:
+        Diccionario con profile, review_profile y profiles
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    encoding = data.get("encoding", {})
+    require_review = data.get("automation", {}).get("require_review", False)
+
+    return {
+        "profile": encoding.get("profile", DEFAULT_PROFILE),
+        "review_profile": encoding.get("review_profile", "draft"),
+        "profiles": encoding.get("profiles", {}),
+        "require_review": require_review
+    }
+
+
+def load_profile(config_path: str, name: Optional[str] = None) -> Dict:
+    """
+    Obtiene un perfil aplicando los ajustes de un config.json de plataforma.
+
+    Args:
+        config_path: Ruta al config.json
+        name: Perfil a usar (default: "profile" del config)
+
+    Returns:
+        Diccionario del perfil
+    """
+    encoding = load_encoding_config(config_path)
+    return get_profile(name or encoding.get("profile"), encoding.get("profiles"))
+
+
+def intermediate_profile(profile: Dict) -> Dict:
+    """
+    Variante para intermedios que se volverán a codificar: nunca más lenta
+    que el preset "fast".
+
+    Args:
+        profile: Perfil final
+
+    Returns:
+        Perfil para intermedios
+    """
+    preset = profile.get("preset", "fast")
+    if preset in PRESET_ORDER and PRESET_ORDER.index(preset) > PRESET_ORDER.index("fast"):
+        return {**profile, "preset": "fast"}
+    return dict(profile)
+
+
+def _codec_family(codec: str) -> str:
+    """Familia del encoder para traducir parámetros"""
+    if codec in ("libx264", "libx265"):
+        return codec[3:]
+    for family in ("nvenc", "qsv", "videotoolbox"):
+        if codec.endswith(family):
+            return family
+    return "other"
+
+
+def video_args(profile: Dict, threads: Optional[int] = None) -> List[str]:
+    """
+    Argumentos de FFmpeg para el encoder de video del perfil.
+
+    Args:
+        profile: Perfil de codificación
+        threads: Forzar número de hilos (default: el del perfil)
+
+    Returns:
+        Lista de argumentos (-c:v ... -crf ... -pix_fmt ...)
+    """
+    codec = profile.get("codec", "libx264")
+    preset = profile.get("preset", "medium")
+    crf = profile.get("crf", 23)
+    family = _codec_family(codec)
+
+    args = ["-c:v", codec]
+
+    if family in ("x264", "x265"):
+        args += ["-preset", preset, "-crf", str(crf)]
+        if profile.get("tune"):
+            args += ["-tune", profile["tune"]]
+        if profile.get("x264_params"):
+            args += [f"-{family}-params", profile["x264_params"]]
+    elif family == "nvenc":
+        args += ["-preset", NVENC_PRESETS.get(preset, "p4"), "-rc", "vbr", "-cq", str(crf), "-b:v", "0"]
+    elif family == "qsv":
+        args += ["-preset", QSV_PRESETS.get(preset, "medium"), "-global_quality", str(crf)]
+    elif family == "videotoolbox":
+        args += ["-q:v", str(max(1, min(100, 100 - int(crf) * 2)))]
+
+    if profile.get("pix_fmt"):
+        args += ["-pix_fmt", profile["pix_fmt"]]
+
+    # Sin B-frames: los cortes por paquete (outpoint) no dejan referencias colgando
+    if profile.get("bframes") is not None:
+        args += ["-bf", str(profile["bframes"])]
+
+    # GOP fijo y cerrado: permite cortar/encadenar por stream copy
+    if profile.get("gop"):
+        gop = str(profile["gop"])
+        args += ["-g", gop, "-keyint_min", gop, "-flags", "+cgop"]
+        if family in ("x264", "x265"):
+            args += ["-sc_threshold", "0"]
+
+    threads = threads if threads is not None else profile.get("threads", 0)
+    if threads:
+        args += ["-threads", str(threads)]
+
+    return args
+
+
+def audio_args(profile: Dict) -> List[str]:
+    """
+    Argumentos de FFmpeg para el encoder de audio del perfil.
+
+    Args:
+        profile: Perfil de codificación
+
+    Returns:
+        Lista de argumentos (-c:a ... -b:a ...)
+    """
+    return [
+        "-c:a", profile.get("audio_codec", "aac"),
+        "-b:a", profile.get("audio_bitrate", "192k")
+    ]
+
+
+def scaled_resolution(profile: Dict, width: int, height: int) -> Tuple[int, int]:
+    """
+    Resolución de salida según el factor "scale" del perfil (siempre par).
+
+    Args:
+        profile: Perfil de codificación
+        width: Ancho objetivo a escala 1
+        height: Alto objetivo a escala 1
+
+    Returns:
+        Tupla (ancho, alto)
+    """
+    scale = float(profile.get("scale", 1.0) or 1.0)
+    if scale == 1.0:
+        return width, height
+    return (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
@@ -4,11 +4,137 @@ FFmpeg Utilities
 Funciones helper para operaciones comunes con FFmpeg.
 """
 
+import os
 import subprocess
-import json
+import tempfile
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
 
+try:
+    from .media_info import probe, probe_many, get_duration as media_duration
+    from .encoder_profiles import get_profile, intermediate_profile, video_args, audio_args
+    from .loudness import analyze_loudness, loudnorm_filter, DEFAULT_TRUE_PEAK
+except ImportError:
+    from media_info import probe, probe_many, get_duration as media_duration
+    from encoder_profiles import get_profile, intermediate_profile, video_args, audio_args
+    from loudness import analyze_loudness, loudnorm_filter, DEFAULT_TRUE_PEAK
+
+
+def _encoder_args(profile: Optional[Dict], final: bool = False) -> List[str]:
+    """Argumentos de video del perfil (default: publish; intermedios nunca más lentos que fast)"""
+    profile = profile or get_profile()
+    return video_args(profile if final else intermediate_profile(profile))
+
+
+# Codecs que se pueden repetir/encadenar por stream copy en MP4
+COPY_SAFE_CODECS = {"h264", "hevc", "mpeg4", "vp9", "av1"}
+
+# Parámetros de video que deben coincidir para concatenar sin recodificar
+# (perfil y nivel H.264 distintos dan un MP4 roto aunque FFmpeg no falle)
+COPY_MATCH_KEYS = ("codec", "profile", "level", "width", "height", "pix_fmt", "time_base", "fps")
+AUDIO_MATCH_KEYS = ("codec", "sample_rate", "channels")
+
+
+def _report(report: Optional[Dict], mode: str, reason: str):
+    """Registra en report el camino elegido (copy | transcode) y el motivo"""
+    if report is not None:
+        report["mode"] = mode
+        report["reason"] = reason
+
+
+def has_closed_gop(video_path: str, max_seconds: float = 120.0) -> bool:
+    """
+    Comprueba que un video se puede repetir por stream copy sin artefactos.
+    
+    Exige que empiece en keyframe y que ningún frame (en orden de
+    decodificación) se muestre antes del último keyframe: esos frames
+    "leading" de un GOP abierto referencian el GOP anterior, que en el
+    bucle es el final del archivo.
+    
+    Args:
+        video_path: Ruta al video
+        max_seconds: Segundos analizados como máximo
+        
+    Returns:
+        True si el GOP es cerrado (False si no se puede comprobar)
+    """
+    try:
+        result = subprocess.run([
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-read_intervals", f"%+{max_seconds}",
+            "-show_entries", "packet=pts,flags",
+            "-of", "csv=p=0",
+            video_path
+        ], capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    if result.returncode != 0:
+        return False
+    
+    key_pts = None
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        try:
+            pts = int(pts)
+        except ValueError:
+            return False
+        if "K" in flags:
+            key_pts = pts
+        elif key_pts is None or pts < key_pts:
+            return False
+    return key_pts is not None
+
+
+def can_stream_copy(
+    video_paths: List[str],
+    width: Optional[int] = None,
+    height: Optional[int] = None
+) -> Tuple[bool, str]:
+    """
+    Comprueba si varios videos se pueden concatenar por stream copy.
+    
+    Args:
+        video_paths: Rutas a los videos
+        width: Ancho exigido (opcional)
+        height: Alto exigido (opcional)
+        
+    Returns:
+        Tupla (compatible, motivo)
+    """
+    infos = probe_many(video_paths)
+    
+    videos = []
+    for path in video_paths:
+        info = infos.get(str(path))
+        if info is None or not info.has_video:
+            return False, f"no se pudo analizar {Path(path).name}"
+        videos.append(info)
+    
+    first = videos[0].video_dict()
+    if first["codec"] not in COPY_SAFE_CODECS:
+        return False, f"codec {first['codec']} no apto para copy"
+    if first.get("sar") not in (None, "1:1", "0:1"):
+        return False, f"SAR {first['sar']} distinto de 1:1"
+    if width and height and (first["width"], first["height"]) != (width, height):
+        return False, f"resolución {first['width']}x{first['height']} != {width}x{height}"
+    
+    first_audio = videos[0].audio_dict() if videos[0].has_audio else None
+    
+    for info in videos[1:]:
+        current = info.video_dict()
+        for key in COPY_MATCH_KEYS:
+            if current[key] != first[key]:
+                return False, f"{key} distinto en {Path(info.path).name} ({current[key]} != {first[key]})"
+        
+        audio = info.audio_dict() if info.has_audio else None
+        if (audio is None) != (first_audio is None):
+            return False, f"pistas de audio distintas en {Path(info.path).name}"
+        if audio and any(audio[k] != first_audio[k] for k in AUDIO_MATCH_KEYS):
+            return False, f"audio distinto en {Path(info.path).name}"
+    
+    return True, "parámetros compatibles"
+
 
 def get_duration(file_path: str) -> float:
     """
@@ -20,17 +146,7 @@ def get_duration(file_path: str) -> float:
     Returns:
         Duración en segundos
     """
-    result = subprocess.run([
-        "ffprobe", "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        file_path
-    ], capture_output=True, text=True)
-    
-    try:
-        return float(result.stdout.strip())
-    except ValueError:
-        return 0.0
+    return media_duration(file_path, 0.0)
 
 
 def get_video_info(file_path: str) -> Dict:
@@ -43,38 +159,8 @@ def get_video_info(file_path: str) -> Dict:
     Returns:
         Diccionario con info del video
     """
-    result = subprocess.run([
-        "ffprobe", "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height,duration,r_frame_rate,codec_name",
-        "-show_entries", "format=duration,size,bit_rate",
-        "-of", "json",
-        file_path
-    ], capture_output=True, text=True)
-    
-    try:
-        data = json.loads(result.stdout)
-        stream = data.get("streams", [{}])[0]
-        format_info = data.get("format", {})
-        
-        # Parse frame rate
-        fps = stream.get("r_frame_rate", "0/1")
-        if "/" in fps:
-            num, den = fps.split("/")
-            fps = float(num) / float(den) if float(den) > 0 else 0
-        
-        return {
-            "width": stream.get("width"),
-            "height": stream.get("height"),
-            "duration": float(format_info.get("duration", 0)),
-            "fps": round(fps, 2),
-            "codec": stream.get("codec_name"),
-            "size_bytes": int(format_info.get("size", 0)),
-            "size_mb": round(int(format_info.get("size", 0)) / (1024 * 1024), 2),
-            "bitrate": int(format_info.get("bit_rate", 0))
-        }
-    except:
-        return {}
+    info = probe(file_path)
+    return info.video_dict() if info and info.has_video else {}
 
 
 def get_audio_info(file_path: str) -> Dict:
@@ -87,54 +173,43 @@ def get_audio_info(file_path: str) -> Dict:
     Returns:
         Diccionario con info del audio
     """
-    result = subprocess.run([
-        "ffprobe", "-v", "error",
-        "-select_streams", "a:0",
-        "-show_entries", "stream=codec_name,sample_rate,channels,bit_rate",
-        "-show_entries", "format=duration,size",
-        "-of", "json",
-        file_path
-    ], capture_output=True, text=True)
-    
-    try:
-        data = json.loads(result.stdout)
-        stream = data.get("streams", [{}])[0]
-        format_info = data.get("format", {})
-        
-        return {
-            "duration": float(format_info.get("duration", 0)),
-            "codec": stream.get("codec_name"),
-            "sample_rate": int(stream.get("sample_rate", 0)),
-            "channels": stream.get("channels"),
-            "bitrate": int(stream.get("bit_rate", 0)),
-            "size_mb": round(int(format_info.get("size", 0)) / (1024 * 1024), 2)
-        }
-    except:
-        return {}
+    info = probe(file_path)
+    return info.audio_dict() if info and info.has_audio else {}
 
 
 def normalize_audio(
     input_path: str,
     output_path: str,
-    target_level: float = -16.0
+    target_level: float = -16.0,
+    true_peak: float = DEFAULT_TRUE_PEAK
 ) -> bool:
     """
     Normaliza el volumen del audio.
     
+    Con las medidas cacheadas del archivo (utils.loudness) aplica la
+    segunda pasada de loudnorm en modo lineal: una ganancia fija, sin
+    compresión dinámica. Si no se pudo medir, loudnorm de una pasada.
+    
     Args:
         input_path: Audio de entrada
         output_path: Audio de salida
         target_level: Nivel objetivo en LUFS
+        true_peak: True peak máximo (dBTP)
         
     Returns:
         True si exitoso
     """
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
+    measured = analyze_loudness(input_path)
+    info = probe(input_path)
+    
     cmd = [
         "ffmpeg", "-y",
         "-i", input_path,
-        "-af", f"loudnorm=I={target_level}:TP=-1.5:LRA=11",
+        "-af", loudnorm_filter(measured, target_level, true_peak),
+        # loudnorm dinámico remuestrea a 192 kHz: conservar la frecuencia original
+        "-ar", str(info.sample_rate if info and info.sample_rate else 48000),
         "-c:a", "libmp3lame", "-b:a", "192k",
         output_path
     ]
@@ -146,42 +221,60 @@ def normalize_audio(
 def concat_videos(
     video_paths: List[str],
     output_path: str,
-    transition: Optional[str] = None
+    transition: Optional[str] = None,
+    profile: Optional[Dict] = None,
+    report: Optional[Dict] = None
 ) -> bool:
     """
     Concatena múltiples videos.
     
+    Si todos comparten codec, perfil, nivel, resolución, pix_fmt, timebase
+    y fps se unen por stream copy; si no (o si el copy falla), se recodifican.
+    
     Args:
         video_paths: Lista de rutas a videos
         output_path: Video de salida
         transition: Tipo de transición (fade, none)
+        profile: Perfil de codificación (default: publish)
+        report: Diccionario donde registrar el camino tomado (mode, reason)
         
     Returns:
         True si exitoso
     """
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
-    # Crear archivo de lista
-    list_file = Path(output_path).parent / "concat_list.txt"
-    with open(list_file, 'w') as f:
+    # Crear archivo de lista (nombre único: varias concatenaciones en paralelo)
+    fd, list_name = tempfile.mkstemp(
+        prefix=".concat_list-", suffix=".txt", dir=Path(output_path).parent
+    )
+    list_file = Path(list_name)
+    with os.fdopen(fd, 'w') as f:
         for path in video_paths:
             f.write(f"file '{path}'\n")
     
-    cmd = [
-        "ffmpeg", "-y",
-        "-f", "concat", "-safe", "0",
-        "-i", str(list_file),
-        "-c:v", "libx264", "-preset", "fast",
-        "-c:a", "aac",
-        output_path
-    ]
+    base = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", str(list_file)]
     
-    result = subprocess.run(cmd, capture_output=True)
-    
-    # Limpiar
-    list_file.unlink(missing_ok=True)
-    
-    return result.returncode == 0
+    try:
+        compatible, reason = can_stream_copy(video_paths)
+        if compatible:
+            result = subprocess.run(base + ["-c", "copy", output_path], capture_output=True)
+            if result.returncode == 0:
+                _report(report, "copy", reason)
+                return True
+            reason = "stream copy falló"
+        
+        cmd = base + [
+            *_encoder_args(profile),
+            *audio_args(profile or get_profile()),
+            output_path
+        ]
+        
+        result = subprocess.run(cmd, capture_output=True)
+        _report(report, "transcode", reason)
+        return result.returncode == 0
+    finally:
+        # Limpiar
+        list_file.unlink(missing_ok=True)
 
 
 def add_audio_to_video(
@@ -238,7 +331,9 @@ def scale_video(
     output_path: str,
     width: int,
     height: int,
-    mode: str = "crop"
+    mode: str = "crop",
+    profile: Optional[Dict] = None,
+    report: Optional[Dict] = None
 ) -> bool:
     """
     Redimensiona un video.
@@ -249,12 +344,25 @@ def scale_video(
         width: Ancho objetivo
         height: Alto objetivo
         mode: crop | pad | stretch
+        profile: Perfil de codificación (default: publish)
+        report: Diccionario donde registrar el camino tomado (mode, reason)
         
     Returns:
         True si exitoso
     """
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
+    # Si ya tiene la resolución pedida, no hay nada que escalar
+    info = get_video_info(input_path)
+    if (info.get("width"), info.get("height")) == (width, height) and info.get("sar") in (None, "1:1", "0:1"):
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-i", input_path, "-c", "copy", output_path],
+            capture_output=True
+        )
+        if result.returncode == 0:
+            _report(report, "copy", f"ya es {width}x{height}")
+            return True
+    
     if mode == "crop":
         vf = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
     elif mode == "pad":
@@ -266,44 +374,58 @@ def scale_video(
         "ffmpeg", "-y",
         "-i", input_path,
         "-vf", f"{vf},setsar=1",
-        "-c:v", "libx264", "-preset", "fast",
+        *_encoder_args(profile),
         "-c:a", "copy",
         output_path
     ]
     
     result = subprocess.run(cmd, capture_output=True)
+    _report(report, "transcode", f"{info.get('width')}x{info.get('height')} -> {width}x{height}")
     return result.returncode == 0
 
 
 def loop_video(
     input_path: str,
     output_path: str,
-    duration: float
+    duration: float,
+    profile: Optional[Dict] = None,
+    report: Optional[Dict] = None
 ) -> bool:
     """
     Hace loop de un video hasta alcanzar la duración deseada.
     
+    Por stream copy solo si el codec lo admite y el GOP es cerrado
+    (has_closed_gop); si no, se recodifica.
+    
     Args:
         input_path: Video de entrada
         output_path: Video de salida
         duration: Duración objetivo en segundos
+        profile: Perfil de codificación (default: publish)
+        report: Diccionario donde registrar el camino tomado (mode, reason)
         
     Returns:
         True si exitoso
     """
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
     
-    cmd = [
-        "ffmpeg", "-y",
-        "-stream_loop", "-1",
-        "-i", input_path,
-        "-t", str(duration),
-        "-c:v", "libx264", "-preset", "fast",
-        "-an",
-        output_path
-    ]
+    base = ["ffmpeg", "-y", "-stream_loop", "-1", "-i", input_path, "-t", str(duration)]
     
-    result = subprocess.run(cmd, capture_output=True)
+    # Con GOP cerrado cada repetición empieza en un keyframe independiente
+    codec = get_video_info(input_path).get("codec")
+    if codec not in COPY_SAFE_CODECS:
+        reason = f"codec {codec} no apto para copy"
+    elif not has_closed_gop(input_path):
+        reason = "GOP abierto o sin keyframe inicial"
+    else:
+        result = subprocess.run(base + ["-c:v", "copy", "-an", output_path], capture_output=True)
+        if result.returncode == 0:
+            _report(report, "copy", f"loop de {codec} por stream copy (GOP cerrado)")
+            return True
+        reason = "stream copy falló"
+    
+    result = subprocess.run(base + [*_encoder_args(profile), "-an", output_path], capture_output=True)
+    _report(report, "transcode", reason)
     return result.returncode == 0
 
 
@@ -346,7 +468,8 @@ def extract_audio(
 def burn_subtitles(
     video_path: str,
     subtitle_path: str,
-    output_path: str
+    output_path: str,
+    profile: Optional[Dict] = None
 ) -> bool:
     """
     Quema subtítulos en el video.
@@ -355,6 +478,7 @@ def burn_subtitles(
         video_path: Video de entrada
         subtitle_path: Archivo de subtítulos (ASS, SRT)
         output_path: Video de salida
+        profile: Perfil de codificación (default: publish)
         
     Returns:
         True si exitoso
@@ -372,7 +496,7 @@ def burn_subtitles(
         "ffmpeg", "-y",
         "-i", video_path,
         "-vf", vf,
-        "-c:v", "libx264", "-preset", "medium", "-crf", "23",
+        *_encoder_args(profile, final=True),
         "-c:a", "copy",
         output_path
     ]
@@ -412,7 +536,8 @@ def create_color_video(
     width: int,
     height: int,
     duration: float,
-    color: str = "black"
+    color: str = "black",
+    profile: Optional[Dict] = None
 ) -> bool:
     """
     Crea un video de color sólido.
@@ -423,6 +548,7 @@ def create_color_video(
         height: Alto
         duration: Duración
         color: Color (black, white, red, #RRGGBB)
+        profile: Perfil de codificación (default: publish)
         
     Returns:
         True si exitoso
@@ -433,7 +559,7 @@ def create_color_video(
         "ffmpeg", "-y",
         "-f", "lavfi",
         "-i", f"color=c={color}:s={width}x{height}:d={duration}:r=30",
-        "-c:v", "libx264", "-preset", "fast",
+        *_encoder_args(profile),
         output_path
     ]
     
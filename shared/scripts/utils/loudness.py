@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Loudness
+Medición de sonoridad (EBU R128) cacheada por contenido.
+
+- Una pasada de loudnorm en modo análisis por archivo: LUFS integrados,
+  true peak, LRA y umbral
+- Caché en disco por hash del contenido (namespace "loudness" de la
+  caché de medios): cada pista de la biblioteca se mide una sola vez,
+  aunque se copie o renombre
+- Las medidas alimentan loudnorm en dos pasadas (modo lineal, sin
+  compresión dinámica) y el cálculo exacto de ganancias de la mezcla
+"""
+
+import os
+import json
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from .media_cache import MediaCache
+except ImportError:
+    from media_cache import MediaCache
+
+
+# Objetivos por defecto: TikTok/Reels/Shorts normalizan alrededor de -14 LUFS
+DEFAULT_TARGET_LUFS = -14.0
+DEFAULT_TRUE_PEAK = -1.5
+DEFAULT_LRA = 11.0
+
+_HASH_BLOCK = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Loudness:
+    """Medidas de loudnorm de un archivo"""
+    integrated: float   # LUFS integrados
+    true_peak: float    # dBTP
+    lra: float          # LU
+    threshold: float    # LUFS (umbral de gating)
+
+    def gain_to(self, target: float, true_peak: Optional[float] = DEFAULT_TRUE_PEAK) -> float:
+        """
+        Ganancia lineal (dB) para llevar el archivo a target LUFS.
+
+        Args:
+            target: LUFS objetivo
+            true_peak: Límite de true peak (None = sin límite)
+
+        Returns:
+            Ganancia en dB (acotada para no superar el true peak)
+        """
+        gain = target - self.integrated
+        if true_peak is not None:
+            gain = min(gain, true_peak - self.true_peak)
+        return round(gain, 2)
+
+
+def loudnorm_filter(
+    measured: Optional[Loudness],
+    target: float = DEFAULT_TARGET_LUFS,
+    true_peak: float = DEFAULT_TRUE_PEAK,
+    lra: float = DEFAULT_LRA
+) -> str:
+    """
+    Filtro loudnorm: segunda pasada lineal con medidas, o una pasada sin ellas.
+
+    Args:
+        measured: Medidas del archivo (None = loudnorm dinámico de una pasada)
+        target: LUFS objetivo
+        true_peak: dBTP máximo
+        lra: Rango de sonoridad objetivo
+
+    Returns:
+        Cadena del filtro
+    """
+    # El modo lineal exige un LRA objetivo >= el medido (si no, loudnorm pasa a dinámico)
+    if measured is not None:
+        lra = min(50.0, max(lra, measured.lra))
+    base = f"loudnorm=I={target}:TP={true_peak}:LRA={lra}"
+    if measured is None:
+        return base
+    return (
+        f"{base}:measured_I={measured.integrated}:measured_TP={measured.true_peak}"
+        f":measured_LRA={measured.lra}:measured_thresh={measured.threshold}"
+        f":linear=true"
+    )
+
+
+def _parse_loudnorm(stderr: str) -> Optional[Loudness]:
+    """Extrae el bloque JSON que loudnorm imprime al final del stderr"""
+    start = stderr.rfind("{")
+    end = stderr.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        data = json.loads(stderr[start:end + 1])
+        values = (
+            float(data["input_i"]), float(data["input_tp"]),
+            float(data["input_lra"]), float(data["input_thresh"])
+        )
+    except (ValueError, KeyError):
+        return None
+    # Silencio total: -inf no sirve para calcular ganancias
+    if any(v != v or v in (float("inf"), float("-inf")) for v in values):
+        return None
+    return Loudness(*values)
+
+
+def measure(path: str) -> Optional[Loudness]:
+    """
+    Mide la sonoridad del primer stream de audio (sin caché).
+
+    Args:
+        path: Archivo de audio o video
+
+    Returns:
+        Loudness o None si no se pudo medir
+    """
+    try:
+        result = subprocess.run([
+            "ffmpeg", "-hide_banner", "-nostats",
+            "-i", str(path),
+            "-map", "0:a:0",
+            "-af", f"loudnorm=I={DEFAULT_TARGET_LUFS}:TP={DEFAULT_TRUE_PEAK}"
+                   f":LRA={DEFAULT_LRA}:print_format=json",
+            "-f", "null", "-"
+        ], capture_output=True, text=True, timeout=300)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    if result.returncode != 0:
+        return None
+    return _parse_loudnorm(result.stderr)
+
+
+class LoudnessAnalyzer:
+    """Medidas de sonoridad cacheadas por hash del contenido"""
+
+    # Hashes recordados por (ruta, mtime, tamaño) para no releer el archivo
+    _HASHES_MAX_ENTRIES = 4096
+
+    def __init__(self, cache: Optional[MediaCache] = None):
+        """
+        Inicializa el analizador.
+
+        Args:
+            cache: Caché de medios (default: namespace "loudness")
+        """
+        self.cache = cache or MediaCache(namespace="loudness")
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """SHA-256 del contenido (memorizado mientras el archivo no cambie)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stat_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            digest = self._hashes.get(stat_key)
+            if digest:
+                self._hashes.move_to_end(stat_key)
+                return digest
+
+        sha = hashlib.sha256()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                    sha.update(block)
+        except OSError:
+            return None
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._hashes[stat_key] = digest
+            while len(self._hashes) > self._HASHES_MAX_ENTRIES:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def analyze(self, path: str) -> Optional[Loudness]:
+        """
+        Medidas de un archivo: de la caché o midiendo una vez.
+
+        Args:
+            path: Archivo de audio o video
+
+        Returns:
+            Loudness o None si no se pudo medir
+        """
+        digest = self.content_hash(str(path))
+        if digest is None:
+            return None
+        key = MediaCache.make_key("loudness", digest)
+
+        cached = self.cache.get(key, ".json")
+        if cached:
+            try:
+                with open(cached, "r", encoding="utf-8") as f:
+                    return Loudness(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                pass
+
+        measured = measure(str(path))
+        if measured is not None:
+            with self.cache.open_for_write(key, ".json") as f:
+                f.write(json.dumps(asdict(measured)).encode("utf-8"))
+        return measured
+
+    def analyze_many(
+        self,
+        paths: Iterable[str],
+        max_workers: int = 4
+    ) -> Dict[str, Optional[Loudness]]:
+        """
+        Mide muchos archivos en paralelo (ej. toda la biblioteca de música).
+
+        Args:
+            paths: Rutas a medir
+            max_workers: ffmpeg simultáneos
+
+        Returns:
+            Diccionario ruta -> Loudness (None si falla)
+        """
+        paths = [str(p) for p in paths]
+        if not paths:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+            return dict(zip(paths, pool.map(self.analyze, paths)))
+
+
+_analyzer: Optional[LoudnessAnalyzer] = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> LoudnessAnalyzer:
+    """Analizador compartido del proceso"""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = LoudnessAnalyzer()
+        return _analyzer
+
+
+def analyze_loudness(path: str) -> Optional[Loudness]:
+    """Medidas cacheadas de un archivo con el analizador compartido"""
+    return get_analyzer().analyze(path)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Media Cache
+Caché persistente en disco para archivos multimedia reutilizables.
+
+Características:
+- Claves por contenido (hash SHA-256 de los parámetros que identifican el archivo)
+- Límite de tamaño configurable con expulsión LRU
+- Escrituras atómicas (archivo temporal + os.replace)
+- Estadísticas de aciertos/fallos
+
+Seguro para varios procesos: el orden LRU se guarda en el mtime de cada
+archivo, sin índice compartido que pueda corromperse.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Iterator, BinaryIO
+
+
+# Raíz por defecto: <repo>/.cache (sobreescribible con MEDIA_CACHE_DIR)
+DEFAULT_CACHE_ROOT = Path(
+    os.getenv("MEDIA_CACHE_DIR") or Path(__file__).parents[3] / ".cache"
+)
+DEFAULT_MAX_SIZE_MB = float(os.getenv("MEDIA_CACHE_MAX_MB", "4096"))
+
+
+class MediaCache:
+    """Caché de archivos en disco con límite de tamaño y expulsión LRU"""
+
+    TMP_SUFFIX = ".tmp"
+
+    def __init__(
+        self,
+        namespace: str = "media",
+        cache_dir: Optional[str] = None,
+        max_size_mb: Optional[float] = None
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            namespace: Subdirectorio de la caché (pexels, tts, ...)
+            cache_dir: Directorio raíz (default: <repo>/.cache o MEDIA_CACHE_DIR)
+            max_size_mb: Tamaño máximo en MB (default: MEDIA_CACHE_MAX_MB o 4096)
+        """
+        root = Path(cache_dir) if cache_dir else DEFAULT_CACHE_ROOT
+        self.cache_dir = root / namespace
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_size_bytes = int(
+            (max_size_mb if max_size_mb is not None else DEFAULT_MAX_SIZE_MB) * 1024 * 1024
+        )
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._size_bytes = self._scan_size()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """
+        Genera una clave estable a partir de los parámetros que identifican un archivo.
+
+        Args:
+            *parts: Valores serializables a JSON (id, resolución, url, ...)
+
+        Returns:
+            Hash hexadecimal SHA-256
+        """
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, suffix: str = "") -> Path:
+        """Ruta donde vive (o viviría) una entrada de la caché"""
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = "") -> Optional[Path]:
+        """
+        Busca una entrada en la caché.
+
+        Args:
+            key: Clave (de make_key)
+            suffix: Extensión del archivo (.mp4, .jpg, ...)
+
+        Returns:
+            Ruta al archivo cacheado o None si no existe
+        """
+        path = self.path_for(key, suffix)
+
+        if path.exists():
+            try:
+                os.utime(path)  # Marcar como usado recientemente
+            except OSError:
+                pass
+            with self._lock:
+                self._hits += 1
+            return path
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, src_path: str, suffix: str = "", move: bool = False) -> Path:
+        """
+        Guarda un archivo existente en la caché de forma atómica.
+
+        Args:
+            key: Clave de la entrada
+            src_path: Archivo a guardar
+            suffix: Extensión del archivo
+            move: Mover en lugar de copiar
+
+        Returns:
+            Ruta al archivo dentro de la caché
+        """
+        path = self.path_for(key, suffix)
+        tmp = self._tmp_path(path)
+
+        try:
+            if move:
+                shutil.move(src_path, tmp)
+            else:
+                shutil.copyfile(src_path, tmp)
+            self._publish(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+        return path
+
+    @contextmanager
+    def open_for_write(self, key: str, suffix: str = "") -> Iterator[BinaryIO]:
+        """
+        Abre una entrada para escritura. El archivo solo aparece en la caché
+        si el bloque termina sin excepciones.
+
+        Args:
+            key: Clave de la entrada
+            suffix: Extensión del archivo
+
+        Yields:
+            Archivo binario abierto para escritura
+        """
+        path = self.path_for(key, suffix)
+        tmp = self._tmp_path(path)
+
+        try:
+            with open(tmp, "wb") as f:
+                yield f
+            self._publish(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def materialize(self, cached_path: Path, output_path: str, link: bool = True) -> str:
+        """
+        Expone un archivo cacheado en otra ruta (hardlink si es posible, copia si no).
+
+        Args:
+            cached_path: Ruta dentro de la caché
+            output_path: Ruta destino
+            link: Permitir hardlink (False = copia independiente, si el destino
+                se va a sobrescribir en el sitio)
+
+        Returns:
+            Ruta destino
+        """
+        out = Path(output_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.unlink(missing_ok=True)
+
+        if link:
+            try:
+                os.link(cached_path, out)
+                return str(out)
+            except OSError:
+                pass
+
+        shutil.copyfile(cached_path, out)
+
+        return str(out)
+
+    def evict(self) -> int:
+        """
+        Expulsa las entradas menos usadas hasta quedar bajo el límite de tamaño.
+
+        Returns:
+            Número de archivos eliminados
+        """
+        entries = []
+        total = 0
+        for f in self.cache_dir.rglob("*"):
+            if not f.is_file() or f.name.endswith(self.TMP_SUFFIX):
+                continue
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+
+        removed = 0
+        if total > self.max_size_bytes:
+            entries.sort(key=lambda e: e[0])
+            for _, size, f in entries:
+                if total <= self.max_size_bytes:
+                    break
+                try:
+                    f.unlink()
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._size_bytes = total
+            self._evictions += removed
+
+        return removed
+
+    def clear(self):
+        """Vacía completamente la caché"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._size_bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Estadísticas de uso de la caché.
+
+        Returns:
+            Diccionario con hits, misses, hit_rate, tamaño y expulsiones
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+                "size_mb": round(self._size_bytes / (1024 * 1024), 2),
+                "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2),
+                "path": str(self.cache_dir)
+            }
+
+    def _tmp_path(self, path: Path) -> str:
+        """Crea un archivo temporal único junto al destino final"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=self.TMP_SUFFIX, dir=path.parent
+        )
+        os.close(fd)
+        return tmp
+
+    def _publish(self, tmp: str, path: Path):
+        """Mueve atómicamente el temporal a su ruta final y aplica el límite"""
+        size = Path(tmp).stat().st_size
+
+        with self._lock:
+            # Al sobrescribir, el archivo anterior deja de ocupar espacio
+            try:
+                size -= path.stat().st_size
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._size_bytes += size
+            over_limit = self._size_bytes > self.max_size_bytes
+
+        if over_limit:
+            self.evict()
+
+    def _scan_size(self) -> int:
+        """Calcula el tamaño actual de la caché en disco"""
+        total = 0
+        for f in self.cache_dir.rglob("*"):
+            if f.is_file() and not f.name.endswith(self.TMP_SUFFIX):
+                try:
+                    total += f.stat().st_size
+                except OSError:
+                    pass
+        return total
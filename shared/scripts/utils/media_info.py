@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Media Info
+Servicio compartido de metadatos multimedia (ffprobe).
+
+- Una sola llamada a ffprobe por archivo (formato + todos los streams)
+- Caché en memoria por (ruta, mtime, tamaño): un archivo modificado se vuelve a leer
+- probe_many() lanza varios ffprobe en paralelo
+- MediaInfo: objeto estructurado usado por todos los módulos
+"""
+
+import os
+import json
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Metadatos de un archivo multimedia"""
+    path: str
+    duration: float = 0.0
+    size_bytes: int = 0
+    bitrate: int = 0
+    format_name: str = ""
+    # Video (primer stream)
+    video_codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: float = 0.0
+    pix_fmt: Optional[str] = None
+    time_base: Optional[str] = None
+    sar: Optional[str] = None
+    profile: Optional[str] = None
+    level: Optional[int] = None
+    # Audio (primer stream)
+    audio_codec: Optional[str] = None
+    sample_rate: int = 0
+    channels: Optional[int] = None
+    audio_bitrate: int = 0
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def size_mb(self) -> float:
+        return round(self.size_bytes / (1024 * 1024), 2)
+
+    def video_dict(self) -> Dict:
+        """Formato de ffmpeg_utils.get_video_info"""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "duration": self.duration,
+            "fps": round(self.fps, 2),
+            "codec": self.video_codec,
+            "pix_fmt": self.pix_fmt,
+            "time_base": self.time_base,
+            "sar": self.sar,
+            "profile": self.profile,
+            "level": self.level,
+            "size_bytes": self.size_bytes,
+            "size_mb": self.size_mb,
+            "bitrate": self.bitrate
+        }
+
+    def audio_dict(self) -> Dict:
+        """Formato de ffmpeg_utils.get_audio_info"""
+        return {
+            "duration": self.duration,
+            "codec": self.audio_codec,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "bitrate": self.audio_bitrate,
+            "size_mb": self.size_mb
+        }
+
+
+_CACHE_MAX_ENTRIES = 4096
+_cache: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Convierte '30000/1001' a float"""
+    if not rate:
+        return 0.0
+    if "/" in rate:
+        num, den = rate.split("/", 1)
+        try:
+            return float(num) / float(den) if float(den) > 0 else 0.0
+        except ValueError:
+            return 0.0
+    try:
+        return float(rate)
+    except ValueError:
+        return 0.0
+
+
+def _to_int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _run_ffprobe(path: str) -> Optional[MediaInfo]:
+    """Ejecuta ffprobe una vez y construye el MediaInfo"""
+    try:
+        result = subprocess.run([
+            "ffprobe", "-v", "error",
+            "-show_format", "-show_streams",
+            "-of", "json",
+            path
+        ], capture_output=True, text=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    if result.returncode != 0:
+        return None
+
+    try:
+        data = json.loads(result.stdout)
+    except ValueError:
+        return None
+
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    duration = _to_float(fmt.get("duration"))
+    if not duration:
+        duration = _to_float(video.get("duration") or audio.get("duration"))
+
+    return MediaInfo(
+        path=path,
+        duration=duration,
+        size_bytes=_to_int(fmt.get("size")),
+        bitrate=_to_int(fmt.get("bit_rate")),
+        format_name=fmt.get("format_name", ""),
+        video_codec=video.get("codec_name"),
+        width=video.get("width"),
+        height=video.get("height"),
+        fps=_parse_rate(video.get("r_frame_rate")),
+        pix_fmt=video.get("pix_fmt"),
+        time_base=video.get("time_base"),
+        sar=video.get("sample_aspect_ratio"),
+        profile=video.get("profile"),
+        level=video.get("level"),
+        audio_codec=audio.get("codec_name"),
+        sample_rate=_to_int(audio.get("sample_rate")),
+        channels=audio.get("channels"),
+        audio_bitrate=_to_int(audio.get("bit_rate"))
+    )
+
+
+def _cache_key(path: str) -> Optional[Tuple[str, int, int]]:
+    """Clave (ruta absoluta, mtime_ns, tamaño) o None si no existe"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def probe(path: str, use_cache: bool = True) -> Optional[MediaInfo]:
+    """
+    Obtiene los metadatos de un archivo.
+
+    Args:
+        path: Ruta al archivo
+        use_cache: Reutilizar el resultado si el archivo no ha cambiado
+
+    Returns:
+        MediaInfo o None si no se puede leer
+    """
+    path = str(path)
+    key = _cache_key(path)
+    if key is None:
+        return None
+
+    if use_cache:
+        with _cache_lock:
+            info = _cache.get(key)
+            if info is not None:
+                _cache.move_to_end(key)
+                return info
+
+    info = _run_ffprobe(path)
+
+    if info is not None:
+        with _cache_lock:
+            _cache[key] = info
+            _cache.move_to_end(key)
+            while len(_cache) > _CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+
+    return info
+
+
+def probe_many(
+    paths: Iterable[str],
+    max_workers: int = 8
+) -> Dict[str, Optional[MediaInfo]]:
+    """
+    Obtiene metadatos de muchos archivos en paralelo.
+
+    Args:
+        paths: Rutas a analizar
+        max_workers: ffprobe simultáneos
+
+    Returns:
+        Diccionario ruta -> MediaInfo (None si falla)
+    """
+    paths = [str(p) for p in paths]
+    if not paths:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths)))) as pool:
+        return dict(zip(paths, pool.map(probe, paths)))
+
+
+def get_duration(path: str, default: float = 0.0) -> float:
+    """
+    Duración de un archivo en segundos.
+
+    Args:
+        path: Ruta al archivo
+        default: Valor si no se puede leer
+
+    Returns:
+        Duración en segundos
+    """
+    info = probe(path)
+    if info is None or info.duration <= 0:
+        return default
+    return info.duration
+
+
+def invalidate(path: Optional[str] = None):
+    """Olvida los metadatos cacheados de un archivo (o de todos)"""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+            return
+        target = os.path.abspath(str(path))
+        for key in [k for k in _cache if k[0] == target]:
+            del _cache[key]
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Subtitle Cues
+Modelo común de cues y lectura/escritura rápida de SRT, VTT y ASS.
+
+- CueList: inicio/fin en arrays de floats y el texto en un único buffer
+  con offsets (sin un objeto por cue)
+- Parsers en streaming línea a línea: toleran CRLF, BOM, varias líneas
+  en blanco seguidas, índices ausentes y el VTT de edge-tts
+- Writers que construyen el archivo en un solo buffer (join), lineales
+  en el número de cues incluso en guiones de 10 minutos
+- convert_many(): conversión de muchos archivos en una llamada
+"""
+
+import re
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# HH:MM:SS,mmm (SRT) | HH:MM:SS.mmm / MM:SS.mmm (VTT)
+_TIMING = re.compile(
+    r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})"
+)
+_VTT_TAG = re.compile(r"</?[^>]+>")
+
+
+def parse_time(value: str) -> float:
+    """HH:MM:SS,mmm | HH:MM:SS.mmm | MM:SS.mmm -> segundos"""
+    clock, _, frac = value.strip().replace(",", ".").partition(".")
+    seconds = 0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds + (int(frac.ljust(3, "0")[:3]) / 1000 if frac else 0.0)
+
+
+def _split_ms(seconds: float) -> Tuple[int, int, int, int]:
+    """segundos -> (h, m, s, ms)"""
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return h, m, s, ms
+
+
+def srt_time(seconds: float) -> str:
+    """Segundos -> HH:MM:SS,mmm"""
+    return "%02d:%02d:%02d,%03d" % _split_ms(seconds)
+
+
+def vtt_time(seconds: float) -> str:
+    """Segundos -> HH:MM:SS.mmm"""
+    return "%02d:%02d:%02d.%03d" % _split_ms(seconds)
+
+
+def ass_time(seconds: float) -> str:
+    """Segundos -> tiempo ASS (H:MM:SS.cc)"""
+    cs = int(round(max(0.0, seconds) * 100))
+    h, cs = divmod(cs, 360000)
+    m, cs = divmod(cs, 6000)
+    s, cs = divmod(cs, 100)
+    return f"{h}:{m:02d}:{s:02d}.{cs:02d}"
+
+
+# Tabla de escape ASS: una sola pasada con str.translate
+ASS_ESCAPE = str.maketrans({"\\": "\\\\", "{": "\\{", "}": "\\}", "\n": "\\N"})
+
+
+def escape_ass(text: str) -> str:
+    """Escapa caracteres especiales de ASS (los saltos de línea pasan a \\N)"""
+    return text.translate(ASS_ESCAPE)
+
+
+class CueList:
+    """Cues de subtítulos en arrays paralelos (inicio, fin, offsets de texto)"""
+
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        # El texto del cue i es buffer[offsets[i]:offsets[i + 1]]
+        self.offsets = array("q", [0])
+        self._parts: List[str] = []
+        self._buffer = ""
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        buffer = self.buffer
+        offsets = self.offsets
+        for i in range(len(self.starts)):
+            yield self.starts[i], self.ends[i], buffer[offsets[i]:offsets[i + 1]]
+
+    @property
+    def buffer(self) -> str:
+        """Texto de todos los cues concatenado"""
+        if self._parts:
+            self._buffer += "".join(self._parts)
+            self._parts = []
+        return self._buffer
+
+    @property
+    def duration(self) -> float:
+        """Fin del último cue"""
+        return max(self.ends) if len(self.ends) else 0.0
+
+    def text(self, index: int) -> str:
+        """Texto de un cue"""
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def append(self, start: float, end: float, text: str):
+        """Añade un cue"""
+        self.starts.append(start)
+        self.ends.append(max(start, end))
+        self._parts.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+
+    def extend(self, other: "CueList", offset: float = 0.0):
+        """Añade los cues de otra lista desplazados offset segundos"""
+        for start, end, text in other:
+            self.append(start + offset, end + offset, text)
+
+    def shift(self, offset: float):
+        """Desplaza todos los cues offset segundos"""
+        for i in range(len(self.starts)):
+            self.starts[i] += offset
+            self.ends[i] += offset
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[str, float, float]]) -> "CueList":
+        """Crea la lista desde (texto, inicio, fin)"""
+        cues = cls()
+        for text, start, end in segments:
+            cues.append(start, end, text)
+        return cues
+
+
+def _lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """Líneas sin fin de línea (acepta texto completo o un iterable de líneas)"""
+    if isinstance(source, str):
+        source = source.splitlines()
+    first = True
+    for line in source:
+        line = line.rstrip("\r\n")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        yield line
+
+
+def parse_srt(source: Union[str, Iterable[str]]) -> CueList:
+    """
+    Parsea SRT (o VTT sin cabecera) en streaming.
+
+    Un cue empieza en una línea de tiempos y termina en la siguiente línea
+    en blanco; índices numéricos y líneas en blanco extra se ignoran.
+
+    Args:
+        source: Contenido o iterable de líneas (ej. un archivo abierto)
+
+    Returns:
+        CueList
+    """
+    cues = CueList()
+    timing = None
+    text: List[str] = []
+
+    for line in _lines(source):
+        match = _TIMING.match(line)
+        if match:
+            if timing and text:
+                cues.append(timing[0], timing[1], "\n".join(text))
+            timing = (parse_time(match.group(1)), parse_time(match.group(2)))
+            text = []
+        elif not line.strip():
+            if timing and text:
+                cues.append(timing[0], timing[1], "\n".join(text))
+            timing = None
+            text = []
+        elif timing:
+            text.append(line.strip())
+
+    if timing and text:
+        cues.append(timing[0], timing[1], "\n".join(text))
+
+    return cues
+
+
+def parse_vtt(source: Union[str, Iterable[str]], strip_tags: bool = True) -> CueList:
+    """
+    Parsea WebVTT en streaming (cabecera, NOTE/STYLE/REGION, ids y ajustes de cue).
+
+    Args:
+        source: Contenido o iterable de líneas
+        strip_tags: Quitar etiquetas <c>, <v>, <00:00:01.000>...
+
+    Returns:
+        CueList
+    """
+    cues = CueList()
+    timing = None
+    text: List[str] = []
+
+    for line in _lines(source):
+        if not line.strip():
+            if timing and text:
+                cues.append(timing[0], timing[1], "\n".join(text))
+            timing = None
+            text = []
+            continue
+
+        if timing is None:
+            # Antes de los tiempos: cabecera, bloques NOTE/STYLE/REGION o id del cue
+            match = _TIMING.match(line)
+            if match:
+                timing = (parse_time(match.group(1)), parse_time(match.group(2)))
+            continue
+
+        text.append(_VTT_TAG.sub("", line).strip() if strip_tags else line.strip())
+
+    if timing and text:
+        cues.append(timing[0], timing[1], "\n".join(text))
+
+    return cues
+
+
+def read_cues(path: str) -> CueList:
+    """
+    Lee un SRT o VTT (por extensión o por la cabecera WEBVTT).
+
+    Args:
+        path: Ruta al archivo
+
+    Returns:
+        CueList
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        first = f.readline()
+        f.seek(0)
+        if path.lower().endswith(".vtt") or first.startswith("WEBVTT"):
+            return parse_vtt(f)
+        return parse_srt(f)
+
+
+def to_srt(cues: CueList) -> str:
+    """Contenido SRT (numerado desde 1)"""
+    out = []
+    for i, (start, end, text) in enumerate(cues, 1):
+        out.append(f"{i}\n{srt_time(start)} --> {srt_time(end)}\n{text}\n\n")
+    return "".join(out)
+
+
+def to_vtt(cues: CueList) -> str:
+    """Contenido WebVTT"""
+    out = ["WEBVTT\n\n"]
+    for start, end, text in cues:
+        out.append(f"{vtt_time(start)} --> {vtt_time(end)}\n{text}\n\n")
+    return "".join(out)
+
+
+def to_ass(
+    cues: CueList,
+    header: str,
+    style: str = "Default",
+    escape: bool = True,
+    transform: Optional[Callable[[str], str]] = None
+) -> str:
+    """
+    Contenido ASS: cabecera + una línea Dialogue por cue.
+
+    Args:
+        cues: Cues a escribir
+        header: Cabecera ASS (Script Info, estilos y Format de [Events])
+        style: Estilo de los eventos
+        escape: Escapar el texto (False si ya trae etiquetas ASS)
+        transform: Función aplicada al texto ya escapado (resaltados)
+
+    Returns:
+        Contenido ASS
+    """
+    out = [header if header.endswith("\n") else header + "\n"]
+    prefix = f",{style},,0,0,0,,"
+    for start, end, text in cues:
+        if escape:
+            text = escape_ass(text)
+        if transform:
+            text = transform(text)
+        out.append(f"Dialogue: 0,{ass_time(start)},{ass_time(end)}{prefix}{text}\n")
+    return "".join(out)
+
+
+WRITERS = {"srt": to_srt, "vtt": to_vtt, "ass": to_ass}
+
+
+def write_cues(cues: CueList, path: str, fmt: Optional[str] = None, **kwargs) -> str:
+    """
+    Escribe cues en srt, vtt o ass (por defecto según la extensión).
+
+    Args:
+        cues: Cues a escribir
+        path: Ruta de salida
+        fmt: srt | vtt | ass
+        **kwargs: Opciones del writer (header, style... para ASS)
+
+    Returns:
+        Ruta escrita
+    """
+    fmt = (fmt or Path(path).suffix.lstrip(".")).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Formato de subtítulos desconocido: {fmt}")
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(WRITERS[fmt](cues, **kwargs))
+    return path
+
+
+def convert_many(
+    paths: Iterable[str],
+    fmt: str = "ass",
+    output_dir: Optional[str] = None,
+    **kwargs
+) -> Dict[str, Optional[str]]:
+    """
+    Convierte muchos SRT/VTT en una llamada.
+
+    Args:
+        paths: Archivos de entrada
+        fmt: Formato de salida (srt | vtt | ass)
+        output_dir: Directorio de salida (default: junto a cada entrada)
+        **kwargs: Opciones del writer (header, style... para ASS)
+
+    Returns:
+        Dict entrada -> salida (None si falló)
+    """
+    results: Dict[str, Optional[str]] = {}
+    for path in paths:
+        source = Path(path)
+        target = (Path(output_dir) if output_dir else source.parent) / f"{source.stem}.{fmt}"
+        try:
+            results[path] = write_cues(read_cues(path), str(target), fmt, **kwargs)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"⚠️ No se pudo convertir {path}: {e}")
+            results[path] = None
+    return results
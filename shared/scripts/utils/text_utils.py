@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Text Utilities
+Funciones de texto compartidas (división en oraciones y en bloques).
+"""
+
+import re
+from typing import List
+
+
+def split_into_sentences(text: str) -> List[str]:
+    """
+    Divide texto en oraciones.
+
+    Args:
+        text: Texto completo
+
+    Returns:
+        Lista de oraciones (sin vacías)
+    """
+    # Limpiar y normalizar
+    text = text.strip()
+    text = re.sub(r'\s+', ' ', text)
+
+    # Dividir por puntuación
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def chunk_sentences(sentences: List[str], max_chars: int) -> List[str]:
+    """
+    Agrupa oraciones consecutivas en bloques de hasta max_chars caracteres.
+
+    Una oración más larga que max_chars forma un bloque propio (nunca se
+    corta a mitad de frase).
+
+    Args:
+        sentences: Oraciones en orden
+        max_chars: Tamaño máximo orientativo de cada bloque
+
+    Returns:
+        Lista de bloques de texto
+    """
+    chunks = []
+    current = ""
+
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+
+    return chunks
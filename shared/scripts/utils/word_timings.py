@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Word Timings
+Tiempos por palabra de una narración y eventos de subtítulos a partir de ellos.
+
+Las marcas WordBoundary de Edge-TTS se guardan en arrays compactos
+(inicio, fin, palabra) junto al SRT (<narración>.words.json). Con ellas se
+generan subtítulos por grupos de palabras o karaoke (\\k) alineados con la
+voz real, sin repartir la duración a partes iguales ni re-alinear con
+herramientas externas. Si no hay marcas (CLI de edge-tts), se estiman
+repartiendo cada cue del SRT por longitud de palabra.
+"""
+
+import re
+import json
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .subtitle_cues import CueList, read_cues, escape_ass
+except ImportError:
+    from subtitle_cues import CueList, read_cues, escape_ass
+
+# Unidades de 100 ns de Edge-TTS por segundo
+TICKS_PER_SECOND = 10_000_000
+
+# Fin de frase / pausa: un grupo de palabras no cruza estos signos
+_BREAK_AFTER = re.compile(r"[.!?…:;,]$")
+
+
+def words_path_for(srt_path: str) -> str:
+    """Ruta del archivo de tiempos por palabra asociado a un SRT"""
+    return str(Path(srt_path).with_suffix(".words.json"))
+
+
+class WordTimings:
+    """Tiempos por palabra en arrays paralelos (segundos)"""
+
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.words: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[Tuple[float, float, str]]:
+        return zip(self.starts, self.ends, self.words)
+
+    @property
+    def duration(self) -> float:
+        """Fin de la última palabra"""
+        return self.ends[-1] if self.words else 0.0
+
+    def append(self, start: float, end: float, word: str):
+        """Añade una palabra"""
+        self.starts.append(start)
+        self.ends.append(max(start, end))
+        self.words.append(word)
+
+    def extend(self, other: "WordTimings", offset: float = 0.0):
+        """Añade las palabras de otra narración desplazadas offset segundos"""
+        for start, end, word in other:
+            self.append(start + offset, end + offset, word)
+
+    @classmethod
+    def from_boundaries(cls, boundaries: List[Tuple[int, int, str]]) -> "WordTimings":
+        """
+        Crea los tiempos desde marcas WordBoundary de Edge-TTS.
+
+        Args:
+            boundaries: Lista (offset, duración, texto) en unidades de 100 ns
+
+        Returns:
+            WordTimings
+        """
+        timings = cls()
+        for offset, duration, text in boundaries:
+            start = offset / TICKS_PER_SECOND
+            timings.append(start, start + duration / TICKS_PER_SECOND, text)
+        return timings
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[str, float, float]]) -> "WordTimings":
+        """
+        Estima tiempos por palabra repartiendo cada segmento por longitud.
+
+        Args:
+            segments: Lista (texto, inicio, fin) en segundos
+
+        Returns:
+            WordTimings (aproximados)
+        """
+        timings = cls()
+        for text, start, end in segments:
+            words = text.split()
+            total = sum(len(w) + 1 for w in words)
+            if not total:
+                continue
+            position = start
+            for word in words:
+                span = (end - start) * (len(word) + 1) / total
+                timings.append(position, position + span, word)
+                position += span
+        return timings
+
+    @classmethod
+    def from_text(cls, text: str, duration: float) -> "WordTimings":
+        """Estimación sin marcas: el texto repartido en duration por longitud"""
+        return cls.from_segments([(text, 0.0, duration)])
+
+    @classmethod
+    def from_srt(cls, srt_path: str) -> "WordTimings":
+        """
+        Estimación desde un SRT (cada cue repartido entre sus palabras).
+
+        Args:
+            srt_path: Ruta al SRT
+
+        Returns:
+            WordTimings (aproximados)
+        """
+        return cls.from_segments(
+            (text, start, end) for start, end, text in read_cues(srt_path)
+        )
+
+    @classmethod
+    def for_narration(cls, srt_path: str) -> Optional["WordTimings"]:
+        """
+        Tiempos de una narración: marcas reales si existen, si no estimados del SRT.
+
+        Args:
+            srt_path: SRT generado por TTSGenerator
+
+        Returns:
+            WordTimings o None si no hay SRT
+        """
+        words_path = words_path_for(srt_path)
+        if Path(words_path).exists():
+            try:
+                return cls.load(words_path)
+            except (OSError, ValueError, KeyError):
+                pass
+        if Path(srt_path).exists():
+            return cls.from_srt(srt_path)
+        return None
+
+    def save(self, path: str) -> str:
+        """Guarda los tiempos como JSON compacto (ms)"""
+        data = {
+            "starts": [round(s * 1000) for s in self.starts],
+            "ends": [round(e * 1000) for e in self.ends],
+            "words": self.words
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "WordTimings":
+        """Carga tiempos guardados con save()"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        timings = cls()
+        timings.starts = array("d", (ms / 1000 for ms in data["starts"]))
+        timings.ends = array("d", (ms / 1000 for ms in data["ends"]))
+        timings.words = list(data["words"])
+        if not len(timings.starts) == len(timings.ends) == len(timings.words):
+            raise ValueError(f"Tiempos por palabra inconsistentes: {path}")
+        return timings
+
+    def groups(self, max_words: int = 3, max_gap: float = 0.4) -> List[Tuple[int, int]]:
+        """
+        Agrupa palabras consecutivas para mostrarlas juntas.
+
+        Un grupo se cierra al llegar a max_words, tras puntuación o ante
+        una pausa mayor que max_gap.
+
+        Args:
+            max_words: Palabras máximas por grupo
+            max_gap: Pausa (s) que fuerza un grupo nuevo
+
+        Returns:
+            Lista de rangos (inicio, fin exclusivo) de índices
+        """
+        ranges = []
+        first = 0
+        for i, word in enumerate(self.words):
+            last = i == len(self.words) - 1
+            if (
+                last
+                or i + 1 - first >= max_words
+                or _BREAK_AFTER.search(word)
+                or self.starts[i + 1] - self.ends[i] > max_gap
+            ):
+                ranges.append((first, i + 1))
+                first = i + 1
+        return ranges
+
+    def ass_events(
+        self,
+        mode: str = "words",
+        max_words: int = 3,
+        max_gap: float = 0.4,
+        transform: Optional[Callable[[str], str]] = None
+    ) -> CueList:
+        """
+        Eventos de subtítulos ASS desde los tiempos por palabra.
+
+        Modos:
+            words: un evento por grupo, visible mientras se pronuncia
+            karaoke: igual, con \\k por palabra (la palabra dicha cambia de
+                     SecondaryColour a PrimaryColour)
+
+        Args:
+            mode: words | karaoke
+            max_words: Palabras máximas por evento
+            max_gap: Pausa (s) que fuerza un evento nuevo
+            transform: Función aplicada a cada palabra ya escapada (resaltado)
+
+        Returns:
+            CueList con el texto ya en ASS (escribir con to_ass(..., escape=False))
+        """
+        if mode not in ("words", "karaoke"):
+            raise ValueError(f"Modo de subtítulos por palabra desconocido: {mode}")
+
+        events = CueList()
+        for first, stop in self.groups(max_words, max_gap):
+            start = self.starts[first]
+            # Mantener el grupo hasta que empiece el siguiente (sin parpadeos)
+            end = self.starts[stop] if stop < len(self.words) else self.ends[stop - 1]
+            if end - self.ends[stop - 1] > max_gap:
+                end = self.ends[stop - 1]
+
+            parts = []
+            for i in range(first, stop):
+                word = escape_ass(self.words[i])
+                if transform:
+                    word = transform(word)
+                if mode == "karaoke":
+                    # \k en centésimas: desde el inicio de esta palabra al de la siguiente
+                    until = self.starts[i + 1] if i + 1 < stop else end
+                    word = f"{{\\k{max(1, round((until - self.starts[i]) * 100))}}}{word}"
+                parts.append(word)
+
+            events.append(start, end, " ".join(parts))
+        return events
+
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Job Workspace
+Directorios de trabajo aislados por trabajo de render.
+
+Cada trabajo obtiene un directorio con nombre único, de modo que varios
+renders pueden ejecutarse a la vez en la misma máquina sin pisarse los
+intermedios (clips, subtítulos, listas de concat...). La limpieza solo
+borra el directorio del propio trabajo.
+
+Opcionalmente el directorio se crea en tmpfs (/dev/shm) para mantener
+los intermedios pequeños fuera del disco.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+
+TMPFS_ROOT = Path("/dev/shm") / "automated-content"
+
+
+def _tmpfs_available(min_free_mb: float) -> bool:
+    """True si /dev/shm existe, es escribible y tiene espacio suficiente"""
+    shm = TMPFS_ROOT.parent
+    if not shm.is_dir() or not os.access(shm, os.W_OK):
+        return False
+    try:
+        free_mb = shutil.disk_usage(shm).free / (1024 * 1024)
+    except OSError:
+        return False
+    return free_mb >= min_free_mb
+
+
+class JobWorkspace:
+    """Directorio temporal único para un trabajo"""
+
+    def __init__(
+        self,
+        base_dir: Union[str, Path],
+        job_id: str = "job",
+        use_tmpfs: bool = False,
+        tmpfs_min_free_mb: float = 512,
+        keep: bool = False
+    ):
+        """
+        Crea el directorio de trabajo.
+
+        Args:
+            base_dir: Directorio base en disco (ej. <output>/.temp)
+            job_id: Identificador del trabajo (prefijo del nombre)
+            use_tmpfs: Usar /dev/shm si está disponible
+            tmpfs_min_free_mb: Espacio libre mínimo en tmpfs para usarlo
+            keep: No borrar el directorio al limpiar (depuración)
+        """
+        root = Path(base_dir)
+        self.in_tmpfs = False
+
+        if use_tmpfs and _tmpfs_available(tmpfs_min_free_mb):
+            root = TMPFS_ROOT
+            self.in_tmpfs = True
+
+        root.mkdir(parents=True, exist_ok=True)
+
+        prefix = re.sub(r"[^A-Za-z0-9_.-]+", "_", job_id)[:40] or "job"
+        self.path = Path(tempfile.mkdtemp(prefix=f"{prefix}-", dir=root))
+        self.keep = keep
+
+    def file(self, name: str) -> str:
+        """Ruta (str) a un archivo dentro del workspace"""
+        return str(self.path / name)
+
+    def cleanup(self):
+        """Elimina el directorio del trabajo (y solo ese)"""
+        if not self.keep:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "JobWorkspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+
+    def __truediv__(self, name: str) -> Path:
+        return self.path / name
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+def make_workspace(
+    base_dir: Union[str, Path],
+    job_id: str = "job",
+    use_tmpfs: Optional[bool] = None
+) -> JobWorkspace:
+    """
+    Crea un workspace; use_tmpfs por defecto se lee de USE_TMPFS=true.
+
+    Args:
+        base_dir: Directorio base en disco
+        job_id: Identificador del trabajo
+        use_tmpfs: Forzar (o no) el uso de /dev/shm
+
+    Returns:
+        JobWorkspace creado
+    """
+    if use_tmpfs is None:
+        use_tmpfs = os.getenv("USE_TMPFS", "false").lower() == "true"
+    return JobWorkspace(base_dir, job_id, use_tmpfs=use_tmpfs)
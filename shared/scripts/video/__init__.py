@@ -2,3 +2,9 @@
 from .pexels_client import PexelsClient, get_pexels_client
 from .video_generator import VideoGenerator, ShortVideoGenerator, VideoStyle, create_short
 from .subtitle_generator import SubtitleGenerator, create_subtitles
+from .subtitle_overlays import SubtitleOverlays, OverlayPlan
+from .subtitle_styles import StyleRegistry, SubtitleStyle, get_style, load_style
+from .background_engine import BackgroundEngine
+from .background_library import BackgroundLibrary
+from .ken_burns import KenBurnsRenderer
+from .clip_ingest import ClipIngest
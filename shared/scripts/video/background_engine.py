@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Background Engine
+Fondos procedurales rápidos (gradiente animado y campo de estrellas).
+
+En lugar de evaluar geq con random() en cada píxel de cada frame, se
+genera una sola imagen semilla (con NumPy si está instalado, si no con
+un único frame de FFmpeg) y se anima con filtros baratos:
+
+- animated: gradiente que deriva lentamente (crop sobre una imagen
+  algo mayor) + grano temporal con el filtro noise
+- space: campo de estrellas que se desplaza en vertical (crop sobre la
+  semilla apilada dos veces, sin saltos) + leve parpadeo con noise
+
+Ambos movimientos son periódicos, así que el resultado se puede usar
+como loop continuo.
+"""
+
+import random
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    from ..utils.encoder_profiles import get_profile, intermediate_profile, video_args
+except ImportError:
+    from utils.encoder_profiles import get_profile, intermediate_profile, video_args
+
+
+class BackgroundEngine:
+    """Generador de fondos procedurales"""
+
+    # Paletas (color superior, color inferior) por estilo
+    PALETTES = {
+        "animated": {
+            "deep_blue": ("0x1a0a2e", "0x16213e"),  # Azul oscuro
+            "ocean": ("0x1e3a5f", "0x0f4c75"),      # Azul medio
+            "purple": ("0x2d132c", "0x801336"),     # Púrpura
+            "night": ("0x1b1b2f", "0x162447"),      # Azul noche
+        },
+        "space": {
+            "deep_space": ("0x050510", "0x0a0a1f"),
+        }
+    }
+
+    # Periodo del movimiento en segundos (el video es un loop perfecto de este largo)
+    PERIODS = {
+        "animated": 20.0,
+        "space": 30.0
+    }
+
+    # Margen extra de la semilla del gradiente para poder desplazarse
+    DRIFT_MARGIN = 1.15
+
+    # Densidad de estrellas (fracción de píxeles)
+    STAR_DENSITY = 0.0008
+
+    def __init__(
+        self,
+        fps: int = 30,
+        profile: Optional[Dict] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Inicializa el motor.
+
+        Args:
+            fps: Frames por segundo de salida
+            profile: Perfil de codificación (default: publish, como intermedio)
+            seed: Semilla aleatoria (None = aleatoria)
+        """
+        self.fps = fps
+        self.profile = intermediate_profile(profile or get_profile())
+        self.rng = random.Random(seed)
+
+    def random_palette(self, style: str) -> str:
+        """Elige una paleta al azar para el estilo"""
+        return self.rng.choice(sorted(self.PALETTES[style]))
+
+    def render(
+        self,
+        style: str,
+        duration: float,
+        width: int,
+        height: int,
+        output: str,
+        work_dir: Path,
+        palette: Optional[str] = None,
+        period: Optional[float] = None
+    ) -> bool:
+        """
+        Renderiza un fondo procedural.
+
+        Args:
+            style: animated | space
+            duration: Duración en segundos
+            width: Ancho
+            height: Alto
+            output: Video de salida
+            work_dir: Directorio para la imagen semilla
+            palette: Nombre de la paleta (default: aleatoria)
+            period: Periodo del movimiento (default: PERIODS[style])
+
+        Returns:
+            True si exitoso
+        """
+        if style not in self.PALETTES:
+            raise ValueError(f"Estilo de fondo desconocido: {style}")
+
+        palette = palette if palette in self.PALETTES[style] else self.random_palette(style)
+        colors = self.PALETTES[style][palette]
+        period = period or self.PERIODS[style]
+
+        seed_path = Path(work_dir) / f"seed_{style}_{palette}_{width}x{height}.ppm"
+        if style == "space":
+            ok = self._render_star_seed(colors, width, height, seed_path)
+        else:
+            ok = self._render_gradient_seed(colors, width, height, seed_path)
+
+        if not ok:
+            return False
+
+        cmd = [
+            "ffmpeg", "-y",
+            "-loop", "1", "-framerate", str(self.fps),
+            "-i", str(seed_path),
+            "-vf", self._animation_filter(style, width, height, period),
+            "-t", str(duration),
+            *video_args(self.profile),
+            "-an",
+            output
+        ]
+
+        result = subprocess.run(cmd, capture_output=True)
+        return result.returncode == 0
+
+    def _animation_filter(self, style: str, width: int, height: int, period: float) -> str:
+        """Filtro de animación (crop periódico + grano)"""
+        if style == "space":
+            # La semilla son dos copias apiladas: desplazar una altura completa no tiene salto
+            return (
+                f"crop={width}:{height}:0:'{height}-mod(t*{height / period:.4f},{height})',"
+                f"format=yuv420p,noise=c0s=4:c0f=t"
+            )
+
+        return (
+            f"crop={width}:{height}:"
+            f"'(iw-ow)/2*(1+sin(2*PI*t/{period}))':"
+            f"'(ih-oh)/2*(1+cos(2*PI*t/{period}))',"
+            f"format=yuv420p,noise=alls=14:allf=t"
+        )
+
+    @staticmethod
+    def _rgb(color: str) -> Tuple[int, int, int]:
+        """'0xRRGGBB' -> (r, g, b)"""
+        value = int(color.replace("#", "0x"), 16)
+        return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+    def _drift_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Tamaño de la semilla del gradiente (par)"""
+        return (
+            int(width * self.DRIFT_MARGIN) // 2 * 2,
+            int(height * self.DRIFT_MARGIN) // 2 * 2
+        )
+
+    def _render_gradient_seed(
+        self,
+        colors: Tuple[str, str],
+        width: int,
+        height: int,
+        seed_path: Path
+    ) -> bool:
+        """Imagen con gradiente vertical entre los dos colores"""
+        w, h = self._drift_size(width, height)
+        top, bottom = self._rgb(colors[0]), self._rgb(colors[1])
+
+        if HAS_NUMPY:
+            ramp = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None]
+            column = np.array(top, np.float32) + (np.array(bottom, np.float32) - np.array(top, np.float32)) * ramp
+            frame = np.broadcast_to(column[:, None, :], (h, w, 3))
+            return self._write_ppm(frame.round().astype(np.uint8), seed_path)
+
+        r, g, b = [f"{a}+({z}-{a})*Y/H" for a, z in zip(top, bottom)]
+        return self._render_seed_frame(
+            f"color=c=black:s={w}x{h}:d=1,format=rgb24,geq=r='{r}':g='{g}':b='{b}'",
+            seed_path
+        )
+
+    def _render_star_seed(
+        self,
+        colors: Tuple[str, str],
+        width: int,
+        height: int,
+        seed_path: Path
+    ) -> bool:
+        """Campo de estrellas (dos copias apiladas para scroll continuo)"""
+        base = self._rgb(colors[0])
+
+        if HAS_NUMPY:
+            rng = np.random.default_rng(self.rng.randrange(2 ** 32))
+            frame = np.empty((height, width, 3), np.uint8)
+            frame[:] = base
+
+            count = int(width * height * self.STAR_DENSITY)
+            ys = rng.integers(0, height, count)
+            xs = rng.integers(0, width, count)
+            brightness = rng.integers(120, 256, count)
+            # Tinte azulado como en el fondo original
+            frame[ys, xs] = np.stack([brightness * 0.9, brightness * 0.9, brightness], axis=1).astype(np.uint8)
+
+            # Algunas estrellas grandes (2x2)
+            big = rng.random(count) < 0.1
+            frame[np.minimum(ys[big] + 1, height - 1), xs[big]] = 255
+            frame[ys[big], np.minimum(xs[big] + 1, width - 1)] = 255
+
+            return self._write_ppm(np.vstack([frame, frame]), seed_path)
+
+        # Máscara de estrellas en gris (un random por píxel) sobre el color base
+        r, g, b = base
+        return self._render_seed_frame(
+            f"color=c=black:s={width}x{height}:d=1,format=gray,"
+            f"geq=lum='if(lt(random(1),{self.STAR_DENSITY}),255,0)',format=rgb24,"
+            f"lutrgb=r='max(val,{r})':g='max(val,{g})':b='max(val,{b})',"
+            f"split[a][b];[a][b]vstack[out0]",
+            seed_path
+        )
+
+    @staticmethod
+    def _write_ppm(frame, seed_path: Path) -> bool:
+        """Escribe un array HxWx3 uint8 como PPM (sin dependencias de imagen)"""
+        height, width = frame.shape[:2]
+        with open(seed_path, 'wb') as f:
+            f.write(f"P6\n{width} {height}\n255\n".encode("ascii"))
+            f.write(np.ascontiguousarray(frame).tobytes())
+        return True
+
+    @staticmethod
+    def _render_seed_frame(graph: str, seed_path: Path) -> bool:
+        """Renderiza un único frame con FFmpeg (geq sobre un solo frame es barato)"""
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "lavfi", "-i", graph,
+            "-frames:v", "1", "-update", "1",
+            str(seed_path)
+        ]
+
+        result = subprocess.run(cmd, capture_output=True)
+        return result.returncode == 0
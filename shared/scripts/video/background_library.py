@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Background Library
+Biblioteca persistente de fondos procedurales en loop.
+
+Cada combinación (estilo, paleta, resolución, fps, perfil) se renderiza
+una sola vez como un loop perfecto de un periodo de movimiento, con GOP
+fijo y cerrado, y se guarda en la caché de medios. Después cada video
+solo necesita repetir el loop con -stream_loop y recortarlo con -t por
+stream copy: el fondo pasa de ser una codificación a un recorte casi
+gratuito.
+"""
+
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from .background_engine import BackgroundEngine
+    from ..utils.media_cache import MediaCache
+    from ..utils.encoder_profiles import get_profile, intermediate_profile, video_args
+except ImportError:
+    from background_engine import BackgroundEngine
+    from utils.media_cache import MediaCache
+    from utils.encoder_profiles import get_profile, intermediate_profile, video_args
+
+
+class BackgroundLibrary:
+    """Loops de fondo pre-renderizados y reutilizables"""
+
+    def __init__(
+        self,
+        engine: Optional[BackgroundEngine] = None,
+        cache: Optional[MediaCache] = None,
+        profile: Optional[Dict] = None
+    ):
+        """
+        Inicializa la biblioteca.
+
+        Args:
+            engine: Motor de fondos (default: uno nuevo con el perfil dado)
+            cache: Caché de medios (default: namespace "backgrounds")
+            profile: Perfil de codificación (default: publish)
+        """
+        self.profile = intermediate_profile(profile or get_profile())
+        self.engine = engine or BackgroundEngine(profile=self.profile)
+        self.cache = cache or MediaCache(namespace="backgrounds")
+
+    def _loop_key(self, style: str, palette: str, width: int, height: int) -> str:
+        """Clave del loop: todo lo que cambia los píxeles o el bitstream"""
+        return MediaCache.make_key(
+            "bg-loop", style, palette, width, height,
+            self.engine.fps, self.engine.PERIODS[style],
+            self.profile.get("codec"), self.profile.get("preset"),
+            self.profile.get("crf"), self.profile.get("pix_fmt")
+        )
+
+    def get_loop(
+        self,
+        style: str,
+        width: int,
+        height: int,
+        palette: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Obtiene (o genera la primera vez) el loop de un fondo.
+
+        Args:
+            style: animated | space
+            width: Ancho
+            height: Alto
+            palette: Paleta (default: aleatoria)
+
+        Returns:
+            Ruta al loop en caché o None si falla el render
+        """
+        if palette not in self.engine.PALETTES[style]:
+            palette = self.engine.random_palette(style)
+
+        key = self._loop_key(style, palette, width, height)
+        cached = self.cache.get(key, ".mp4")
+        if cached:
+            return cached
+
+        print(f"   🎨 Pre-renderizando loop de fondo {style}/{palette} {width}x{height}...")
+
+        # GOP de 1 segundo, cerrado: cualquier corte y la repetición van por stream copy
+        engine = BackgroundEngine(
+            fps=self.engine.fps,
+            profile={**self.profile, "gop": self.engine.fps},
+            seed=self.engine.rng.randrange(2 ** 32)
+        )
+
+        with tempfile.TemporaryDirectory(prefix="bg-loop-") as tmp:
+            loop_path = str(Path(tmp) / "loop.mp4")
+            period = engine.PERIODS[style]
+
+            if not engine.render(style, period, width, height, loop_path, Path(tmp), palette, period):
+                return None
+
+            return self.cache.put(key, loop_path, ".mp4", move=True)
+
+    def render(
+        self,
+        style: str,
+        duration: float,
+        width: int,
+        height: int,
+        output: str,
+        palette: Optional[str] = None
+    ) -> bool:
+        """
+        Crea un fondo de la duración pedida repitiendo el loop de la biblioteca.
+
+        Args:
+            style: animated | space
+            duration: Duración en segundos
+            width: Ancho
+            height: Alto
+            output: Video de salida
+            palette: Paleta (default: aleatoria)
+
+        Returns:
+            True si exitoso
+        """
+        loop = self.get_loop(style, width, height, palette)
+        if not loop:
+            return False
+
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+
+        # Stream copy (el loop tiene GOP cerrado); si falla, recodificar el recorte
+        for codec_args in (["-c", "copy"], video_args(self.profile)):
+            cmd = [
+                "ffmpeg", "-y",
+                "-stream_loop", "-1",
+                "-i", str(loop),
+                "-t", str(duration),
+                *codec_args,
+                "-an",
+                output
+            ]
+
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode == 0:
+                return True
+
+        return False
+
+    def stats(self) -> Dict:
+        """Estadísticas de la caché de loops"""
+        return self.cache.stats()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Clip Ingest
+Normalización única de clips de stock al entrar en la caché de medios.
+
+Los clips de Pexels llegan con fps, resolución, pix_fmt y GOP arbitrarios.
+Al descargarlos se convierten una sola vez al formato intermedio del
+proyecto (resolución objetivo, 30 fps, yuv420p, GOP fijo y cerrado, sin
+B-frames, timescale común) y se guardan en la caché. Como todos los clips
+normalizados comparten parámetros, el montaje final puede encadenarlos
+con el demuxer concat (con outpoint por clip) sin volver a escalar ni
+recortar cada uno en cada render.
+"""
+
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from ..utils.media_cache import MediaCache
+    from ..utils.encoder_profiles import get_profile, intermediate_profile, video_args
+except ImportError:
+    from utils.media_cache import MediaCache
+    from utils.encoder_profiles import get_profile, intermediate_profile, video_args
+
+
+class ClipIngest:
+    """Normalizador de clips con caché"""
+
+    # Timescale común para que el concat por stream copy no reajuste tiempos
+    TIMESCALE = 15360
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        fps: int = 30,
+        max_seconds: float = 30.0,
+        profile: Optional[Dict] = None,
+        cache: Optional[MediaCache] = None,
+        timeout: float = 300
+    ):
+        """
+        Inicializa el normalizador.
+
+        Args:
+            width: Ancho objetivo
+            height: Alto objetivo
+            fps: Frames por segundo objetivo
+            max_seconds: Duración máxima conservada de cada clip
+            profile: Perfil de codificación (default: publish, como intermedio)
+            cache: Caché de medios (default: namespace "clips")
+            timeout: Segundos máximos de recodificación por clip
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.max_seconds = max_seconds
+        self.timeout = timeout
+        # GOP de 1 segundo, cerrado y sin B-frames
+        self.profile = {
+            **intermediate_profile(profile or get_profile()),
+            "gop": fps,
+            "bframes": 0
+        }
+        self.cache = cache or MediaCache(namespace="clips")
+
+    def _key(self, source_key: Tuple) -> str:
+        """Clave del clip normalizado: origen + formato intermedio"""
+        return MediaCache.make_key(
+            "normalized", *source_key,
+            self.width, self.height, self.fps, self.max_seconds,
+            self.profile.get("codec"), self.profile.get("preset"),
+            self.profile.get("crf"), self.profile.get("pix_fmt")
+        )
+
+    def get(self, source_key: Tuple, output_path: Optional[str] = None) -> Optional[str]:
+        """
+        Busca un clip ya normalizado.
+
+        Args:
+            source_key: Identidad del origen (ej. ("pexels", id, url))
+            output_path: Dónde exponerlo (hardlink/copia); None = ruta en caché
+
+        Returns:
+            Ruta al clip normalizado o None si no está en caché
+        """
+        cached = self.cache.get(self._key(source_key), ".mp4")
+        if not cached:
+            return None
+        if output_path:
+            return self.cache.materialize(cached, output_path)
+        return str(cached)
+
+    def normalize(
+        self,
+        src_path: str,
+        source_key: Tuple,
+        output_path: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Normaliza un clip (o lo reutiliza de la caché).
+
+        Args:
+            src_path: Clip original descargado
+            source_key: Identidad del origen (ej. ("pexels", id, url))
+            output_path: Dónde exponerlo (hardlink/copia); None = ruta en caché
+
+        Returns:
+            Ruta al clip normalizado o None si falla
+        """
+        cached = self.get(source_key, output_path)
+        if cached:
+            return cached
+
+        w, h = self.width, self.height
+        fd, tmp = tempfile.mkstemp(prefix="ingest-", suffix=".mp4")
+        os.close(fd)
+
+        try:
+            cmd = [
+                "ffmpeg", "-y",
+                "-i", src_path,
+                "-t", str(self.max_seconds),
+                "-vf", (
+                    f"scale={w}:{h}:force_original_aspect_ratio=increase,"
+                    f"crop={w}:{h},setsar=1,fps={self.fps},format=yuv420p"
+                ),
+                *video_args(self.profile),
+                "-video_track_timescale", str(self.TIMESCALE),
+                "-an",
+                "-movflags", "+faststart",
+                tmp
+            ]
+
+            try:
+                result = subprocess.run(cmd, capture_output=True, timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                print(f"⚠️ Normalización de {Path(src_path).name} superó {self.timeout}s")
+                return None
+            if result.returncode != 0:
+                return None
+
+            cached = self.cache.put(self._key(source_key), tmp, ".mp4", move=True)
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+
+        if output_path:
+            return self.cache.materialize(cached, output_path)
+        return str(cached)
+
+    @staticmethod
+    def write_concat_list(clips: List[str], segment: float, list_path: str) -> str:
+        """
+        Escribe una lista para el demuxer concat con un outpoint por clip.
+
+        Args:
+            clips: Clips normalizados
+            segment: Segundos a usar de cada clip
+            list_path: Archivo de lista a escribir
+
+        Returns:
+            Ruta de la lista
+        """
+        lines = ["ffconcat version 1.0"]
+        for clip in clips:
+            lines.append(f"file '{clip}'")
+            lines.append(f"outpoint {segment:.3f}")
+
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        return list_path
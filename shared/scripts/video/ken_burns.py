@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Ken Burns Renderer
+Efecto Ken Burns sobre imágenes en una sola invocación de FFmpeg.
+
+- Cada imagen se escala solo lo que necesita el zoom máximo (más un
+  pequeño margen de sobremuestreo para que el movimiento no tiemble),
+  en lugar de llevarla a 8000 px de ancho
+- Todas las imágenes van en un único filtergraph (zoompan por imagen +
+  xfade entre ellas) y se codifican una sola vez
+- Zoom máximo, curva de easing y duración del fundido configurables
+"""
+
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from ..utils.encoder_profiles import get_profile, intermediate_profile, video_args
+except ImportError:
+    from utils.encoder_profiles import get_profile, intermediate_profile, video_args
+
+
+class KenBurnsRenderer:
+    """Renderizador de Ken Burns con fundidos"""
+
+    # Curvas de easing: p = progreso 0..1 del segmento
+    EASINGS = {
+        "linear": "{p}",
+        "ease_in": "pow({p},2)",
+        "ease_out": "1-pow(1-{p},2)",
+        "ease_in_out": "(1-cos(PI*{p}))/2"
+    }
+
+    def __init__(
+        self,
+        fps: int = 30,
+        max_zoom: float = 1.25,
+        easing: str = "ease_in_out",
+        crossfade: float = 0.6,
+        oversample: float = 1.5,
+        transition: str = "fade",
+        profile: Optional[Dict] = None
+    ):
+        """
+        Inicializa el renderizador.
+
+        Args:
+            fps: Frames por segundo
+            max_zoom: Zoom máximo (1.25 = 25% de acercamiento)
+            easing: linear | ease_in | ease_out | ease_in_out
+            crossfade: Duración del fundido entre imágenes (0 = corte)
+            oversample: Margen de resolución sobre el zoom máximo (suaviza el movimiento)
+            transition: Transición de xfade (fade, smoothleft, circleopen...)
+            profile: Perfil de codificación (default: publish, como intermedio)
+        """
+        if easing not in self.EASINGS:
+            raise ValueError(f"Easing desconocido: {easing} (opciones: {', '.join(self.EASINGS)})")
+
+        self.fps = fps
+        self.max_zoom = max(1.0, max_zoom)
+        self.easing = easing
+        self.crossfade = max(0.0, crossfade)
+        self.oversample = max(1.0, oversample)
+        self.transition = transition
+        self.profile = intermediate_profile(profile or get_profile())
+
+    def render(
+        self,
+        images: List[str],
+        duration: float,
+        width: int,
+        height: int,
+        output: str
+    ) -> bool:
+        """
+        Renderiza las imágenes con Ken Burns y fundidos.
+
+        Args:
+            images: Rutas a las imágenes (en orden)
+            duration: Duración total en segundos
+            width: Ancho de salida
+            height: Alto de salida
+            output: Video de salida
+
+        Returns:
+            True si exitoso
+        """
+        if not images:
+            return False
+
+        n = len(images)
+        # El fundido no puede comerse más de la mitad de un segmento
+        fade = min(self.crossfade, duration / n / 2) if n > 1 else 0.0
+        segment = (duration + (n - 1) * fade) / n
+        frames = max(2, round(segment * self.fps))
+
+        inputs = []
+        filters = []
+        for i, image in enumerate(images):
+            inputs.extend(["-i", image])
+            filters.append(f"[{i}:v]{self._segment_filter(i, frames, width, height)}[k{i}]")
+
+        filters.extend(self._join_filters(n, segment, fade))
+
+        cmd = [
+            "ffmpeg", "-y",
+            *inputs,
+            "-filter_complex", ";".join(filters),
+            "-map", "[kbout]",
+            "-t", str(duration),
+            *video_args(self.profile),
+            "-an",
+            output
+        ]
+
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        result = subprocess.run(cmd, capture_output=True)
+        return result.returncode == 0
+
+    def _segment_filter(self, index: int, frames: int, width: int, height: int) -> str:
+        """scale (justo lo necesario) + zoompan con easing para una imagen"""
+        factor = self.max_zoom * self.oversample
+        src_w = int(width * factor) // 2 * 2
+        src_h = int(height * factor) // 2 * 2
+
+        progress = f"(on/{frames - 1})"
+        eased = self.EASINGS[self.easing].format(p=progress)
+        span = self.max_zoom - 1.0
+
+        # Alternar acercamiento y alejamiento
+        if index % 2 == 0:
+            zoom = f"1+{span:.4f}*({eased})"
+        else:
+            zoom = f"{self.max_zoom:.4f}-{span:.4f}*({eased})"
+
+        return (
+            f"scale={src_w}:{src_h}:force_original_aspect_ratio=increase,"
+            f"crop={src_w}:{src_h},setsar=1,"
+            f"zoompan=z='{zoom}':d={frames}:"
+            f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':"
+            f"s={width}x{height}:fps={self.fps},"
+            f"format=yuv420p"
+        )
+
+    def _join_filters(self, count: int, segment: float, fade: float) -> List[str]:
+        """Une los segmentos con xfade (o concat si no hay fundido)"""
+        if count == 1:
+            return ["[k0]null[kbout]"]
+
+        if fade <= 0:
+            labels = "".join(f"[k{i}]" for i in range(count))
+            return [f"{labels}concat=n={count}:v=1:a=0[kbout]"]
+
+        filters = []
+        previous = "k0"
+        for i in range(1, count):
+            label = "kbout" if i == count - 1 else f"x{i}"
+            offset = i * (segment - fade)
+            filters.append(
+                f"[{previous}][k{i}]xfade=transition={self.transition}:"
+                f"duration={fade:.3f}:offset={offset:.3f}[{label}]"
+            )
+            previous = label
+
+        return filters
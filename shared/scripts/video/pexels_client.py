@@ -12,9 +12,23 @@ Documentación: https://www.pexels.com/api/documentation/
 """
 
 import os
+import sys
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable, Any
+
+try:
+    from ..utils.media_cache import MediaCache
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import MediaCache
+
+try:
+    from .pexels_quota import SearchCache, RequestBudget, default_search_cache, default_budget
+except ImportError:
+    from pexels_quota import SearchCache, RequestBudget, default_search_cache, default_budget
 
 
 class PexelsClient:
@@ -22,13 +36,32 @@ class PexelsClient:
     
     BASE_URL = "https://api.pexels.com"
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        media_cache: Optional[MediaCache] = None,
+        use_cache: bool = True,
+        cache_max_mb: Optional[float] = None,
+        search_cache: Optional[SearchCache] = None,
+        budget: Optional[RequestBudget] = None,
+        use_quota: bool = True,
+        max_quota_wait: float = 120.0,
+        pool_size: int = 16
+    ):
         """
         Inicializa el cliente de Pexels.
         
         Args:
             api_key: API key de Pexels. Si no se proporciona, 
                      busca en variable de entorno PEXELS_API_KEY
+            media_cache: Caché de descargas a usar (default: caché "pexels" compartida)
+            use_cache: Si False, descarga siempre sin caché
+            cache_max_mb: Límite de tamaño de la caché por defecto en MB
+            search_cache: Caché TTL de búsquedas (default: persistente en .cache)
+            budget: Presupuesto de requests (default: límites de global.json)
+            use_quota: Si False, desactiva caché de búsquedas y presupuesto
+            max_quota_wait: Segundos máximos esperando cuota antes de aplazar
+            pool_size: Conexiones keep-alive por host (descargas concurrentes)
         """
         self.api_key = api_key or os.getenv("PEXELS_API_KEY")
         
@@ -51,6 +84,25 @@ class PexelsClient:
             )
         
         self.headers = {"Authorization": self.api_key}
+        
+        # Sesión compartida con pool de conexiones keep-alive (thread-safe para GET)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Caché persistente de descargas (clave: id + rendition)
+        if media_cache is not None:
+            self.media_cache = media_cache
+        elif use_cache:
+            self.media_cache = MediaCache("pexels", max_size_mb=cache_max_mb)
+        else:
+            self.media_cache = None
+        
+        # Caché de búsquedas y presupuesto de cuota (200/h, 20.000/mes)
+        self.search_cache = search_cache or (default_search_cache() if use_quota else None)
+        self.budget = budget or (default_budget() if use_quota else None)
+        self.max_quota_wait = max_quota_wait
     
     def search_videos(
         self,
@@ -81,16 +133,7 @@ class PexelsClient:
             "page": page
         }
         
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/videos/search",
-                headers=self.headers,
-                params=params,
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
+        def parse(data: Dict) -> List[Dict]:
             videos = []
             for video in data.get("videos", []):
                 # Buscar mejor archivo de video
@@ -106,8 +149,10 @@ class PexelsClient:
                         "user_url": video.get("user", {}).get("url"),
                         "pexels_url": video.get("url")
                     })
-            
             return videos
+        
+        try:
+            return self._api_get("/videos/search", params, parse) or []
             
         except requests.RequestException as e:
             print(f"Error buscando videos en Pexels: {e}")
@@ -142,16 +187,7 @@ class PexelsClient:
             "page": page
         }
         
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/v1/search",
-                headers=self.headers,
-                params=params,
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
+        def parse(data: Dict) -> List[Dict]:
             images = []
             for photo in data.get("photos", []):
                 src = photo.get("src", {})
@@ -172,8 +208,10 @@ class PexelsClient:
                     "pexels_url": photo.get("url"),
                     "alt": photo.get("alt", "")
                 })
-            
             return images
+        
+        try:
+            return self._api_get("/v1/search", params, parse) or []
             
         except requests.RequestException as e:
             print(f"Error buscando imágenes en Pexels: {e}")
@@ -181,16 +219,7 @@ class PexelsClient:
     
     def get_curated_videos(self, count: int = 10, page: int = 1) -> List[Dict]:
         """Obtiene videos populares/curados"""
-        try:
-            response = requests.get(
-                f"{self.BASE_URL}/videos/popular",
-                headers=self.headers,
-                params={"per_page": min(count, 80), "page": page},
-                timeout=15
-            )
-            response.raise_for_status()
-            data = response.json()
-            
+        def parse(data: Dict) -> List[Dict]:
             videos = []
             for video in data.get("videos", []):
                 best_file = self._get_best_video_file(video, "portrait")
@@ -202,8 +231,11 @@ class PexelsClient:
                         "height": best_file.get("height"),
                         "duration": video.get("duration")
                     })
-            
             return videos
+        
+        try:
+            params = {"per_page": min(count, 80), "page": page}
+            return self._api_get("/videos/popular", params, parse) or []
             
         except requests.RequestException as e:
             print(f"Error obteniendo videos curados: {e}")
@@ -213,7 +245,8 @@ class PexelsClient:
         self,
         video: Dict,
         output_path: str,
-        timeout: int = 120
+        timeout: int = 120,
+        deadline: Optional[float] = None
     ) -> Optional[str]:
         """
         Descarga un video.
@@ -222,6 +255,7 @@ class PexelsClient:
             video: Diccionario con info del video (de search_videos)
             output_path: Ruta donde guardar el video
             timeout: Timeout en segundos
+            deadline: Instante límite (time.monotonic()) para toda la descarga
             
         Returns:
             Path al archivo descargado o None si falla
@@ -230,27 +264,17 @@ class PexelsClient:
         if not url:
             return None
         
-        try:
-            response = requests.get(url, stream=True, timeout=timeout)
-            response.raise_for_status()
-            
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            return output_path
-            
-        except requests.RequestException as e:
-            print(f"Error descargando video: {e}")
-            return None
+        key = MediaCache.make_key(
+            "video", video.get("id"), video.get("width"), video.get("height"), url
+        )
+        return self._download(url, output_path, timeout, key, ".mp4", "video", deadline)
     
     def download_image(
         self,
         image: Dict,
         output_path: str,
-        timeout: int = 60
+        timeout: int = 60,
+        deadline: Optional[float] = None
     ) -> Optional[str]:
         """
         Descarga una imagen.
@@ -259,6 +283,7 @@ class PexelsClient:
             image: Diccionario con info de imagen (de search_images)
             output_path: Ruta donde guardar
             timeout: Timeout en segundos
+            deadline: Instante límite (time.monotonic()) para toda la descarga
             
         Returns:
             Path al archivo descargado o None si falla
@@ -267,22 +292,142 @@ class PexelsClient:
         if not url:
             return None
         
-        try:
-            response = requests.get(url, stream=True, timeout=timeout)
+        key = MediaCache.make_key("image", image.get("id"), url)
+        return self._download(url, output_path, timeout, key, ".jpg", "imagen", deadline)
+    
+    def _api_get(
+        self,
+        endpoint: str,
+        params: Dict,
+        parse: Callable[[Dict], Any],
+        timeout: int = 15
+    ) -> Optional[Any]:
+        """
+        GET a la API con caché de búsquedas y control de cuota.
+        
+        Si no hay cuota disponible tras esperar max_quota_wait, el request
+        se aplaza: se devuelve la última respuesta cacheada (aunque esté
+        caducada) o None.
+        
+        Args:
+            endpoint: Ruta del endpoint (ej. /videos/search)
+            params: Parámetros de la query
+            parse: Función que transforma el JSON en el resultado cacheable
+            timeout: Timeout en segundos
+            
+        Returns:
+            Resultado de parse() o None si se aplazó
+        """
+        key = SearchCache.make_key(endpoint, params)
+        
+        if self.search_cache:
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        for attempt in range(2):
+            if self.budget and not self.budget.acquire(self.max_quota_wait):
+                print(f"⏳ Cuota de Pexels agotada, request aplazado: {endpoint}")
+                if self.search_cache:
+                    return self.search_cache.get(key, allow_stale=True)
+                return None
+            
+            response = self.session.get(
+                f"{self.BASE_URL}{endpoint}",
+                headers=self.headers,
+                params=params,
+                timeout=timeout
+            )
+            
+            if self.budget:
+                self.budget.update_from_headers(response.headers)
+                
+                # 429: esperar lo que indique Retry-After y reintentar una vez
+                if response.status_code == 429 and attempt == 0:
+                    try:
+                        retry_after = float(response.headers.get("Retry-After", 60))
+                    except ValueError:
+                        retry_after = 60.0
+                    self.budget.block_for(retry_after)
+                    continue
+            
             response.raise_for_status()
+            result = parse(response.json())
+            
+            if self.search_cache:
+                self.search_cache.set(key, result)
+            
+            return result
+        
+        response.raise_for_status()
+        return None
+    
+    def quota_stats(self) -> Dict:
+        """Estado de la caché de búsquedas y del presupuesto de requests"""
+        return {
+            "search_cache": self.search_cache.stats() if self.search_cache else None,
+            "budget": self.budget.stats() if self.budget else None
+        }
+    
+    def cache_stats(self) -> Dict:
+        """Estadísticas de la caché de descargas (hits, misses, tamaño)"""
+        if not self.media_cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.media_cache.stats()}
+    
+    def _download(
+        self,
+        url: str,
+        output_path: str,
+        timeout: int,
+        cache_key: str,
+        suffix: str,
+        kind: str,
+        deadline: Optional[float] = None
+    ) -> Optional[str]:
+        """Descarga un archivo pasando por la caché de medios si está activa"""
+        try:
+            if self.media_cache:
+                cached = self.media_cache.get(cache_key, suffix)
+                
+                if not cached:
+                    with self.media_cache.open_for_write(cache_key, suffix) as f:
+                        self._stream_to(url, f, timeout, deadline)
+                    cached = self.media_cache.path_for(cache_key, suffix)
+                
+                return self.media_cache.materialize(cached, output_path)
             
             Path(output_path).parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            try:
+                with open(output_path, 'wb') as f:
+                    self._stream_to(url, f, timeout, deadline)
+            except BaseException:
+                Path(output_path).unlink(missing_ok=True)
+                raise
             
             return output_path
             
-        except requests.RequestException as e:
-            print(f"Error descargando imagen: {e}")
+        except (requests.RequestException, OSError) as e:
+            print(f"Error descargando {kind}: {e}")
             return None
     
+    def _stream_to(
+        self,
+        url: str,
+        f,
+        timeout: int,
+        deadline: Optional[float] = None
+    ):
+        """Vuelca una descarga en streaming a un archivo abierto, respetando el deadline"""
+        with self.session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            
+            for chunk in response.iter_content(chunk_size=256 * 1024):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"deadline superado descargando {url}")
+                f.write(chunk)
+    
     def _get_best_video_file(
         self,
         video: Dict,
@@ -320,7 +465,7 @@ class PexelsClient:
     def test_connection(self) -> bool:
         """Prueba la conexión con la API"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.BASE_URL}/videos/popular",
                 headers=self.headers,
                 params={"per_page": 1},
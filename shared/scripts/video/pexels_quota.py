@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Pexels Quota
+Caché de búsquedas y control de cuota para la API de Pexels.
+
+Incluye:
+- SearchCache: caché TTL de respuestas (memoria + JSON persistente opcional,
+  escrito en lotes)
+- RequestBudget: token bucket con los límites de /config/global.json,
+  sincronizado con las cabeceras X-Ratelimit-* de Pexels
+
+El estado del presupuesto y la caché de búsquedas se comparten entre
+procesos (varias cuentas con la misma API key) mediante archivos JSON
+protegidos con flock.
+"""
+
+import os
+import sys
+import json
+import atexit
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    from ..utils.media_cache import DEFAULT_CACHE_ROOT
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import DEFAULT_CACHE_ROOT
+
+
+GLOBAL_CONFIG_PATH = Path(__file__).parents[3] / "config" / "global.json"
+
+
+def _write_json_atomic(path: Path, data: Dict):
+    """Escribe JSON en disco de forma atómica"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """flock exclusivo sobre <path>.lock (sin efecto en Windows)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SearchCache:
+    """Caché TTL de respuestas de búsqueda"""
+
+    def __init__(
+        self,
+        ttl: float = 6 * 3600,
+        persist_path: Optional[str] = None,
+        max_entries: int = 2000,
+        save_interval: float = 30.0
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            ttl: Segundos que una respuesta se considera fresca
+            persist_path: Archivo JSON para persistir entre ejecuciones (opcional)
+            max_entries: Máximo de entradas guardadas
+            save_interval: Segundos mínimos entre escrituras a disco (las
+                entradas nuevas se acumulan y se vuelcan juntas; flush() al salir)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self.persist_path = Path(persist_path) if persist_path else None
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+
+        if self.persist_path:
+            if self.persist_path.exists():
+                self._entries.update(self._load())
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict) -> str:
+        """Clave estable para un endpoint + parámetros"""
+        normalized = {k: str(v).strip().lower() for k, v in params.items()}
+        return f"{endpoint}?{json.dumps(normalized, sort_keys=True)}"
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Obtiene una respuesta cacheada.
+
+        Args:
+            key: Clave (de make_key)
+            allow_stale: Devolver también entradas caducadas
+
+        Returns:
+            Respuesta cacheada o None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry and (allow_stale or time.time() - entry[0] < self.ttl):
+                self.hits += 1
+                return entry[1]
+
+            if not allow_stale:
+                self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Guarda una respuesta (a disco en el siguiente volcado, si está configurado)"""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._prune()
+            self._dirty = True
+            due = time.monotonic() - self._last_save >= self.save_interval
+
+        if self.persist_path and due:
+            self.flush()
+
+    def flush(self):
+        """Vuelca a disco las entradas pendientes (fusionando con otros procesos)"""
+        if not self.persist_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                self._last_save = time.monotonic()
+            try:
+                self._save()
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"⚠️ No se pudo persistir la caché de búsquedas: {e}")
+
+    def stats(self) -> Dict:
+        """Estadísticas de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _prune(self):
+        """Elimina las entradas más antiguas si se supera el máximo"""
+        if len(self._entries) > self.max_entries:
+            ordered = sorted(self._entries.items(), key=lambda kv: kv[1][0])
+            for key, _ in ordered[:len(self._entries) - self.max_entries]:
+                del self._entries[key]
+
+    def _load(self) -> Dict[str, Tuple[float, Any]]:
+        """Lee las entradas persistidas"""
+        try:
+            with open(self.persist_path, encoding="utf-8") as f:
+                raw = json.load(f)
+            return {k: (float(v[0]), v[1]) for k, v in raw.items()}
+        except (OSError, ValueError, TypeError, IndexError):
+            return {}
+
+    def _save(self):
+        """Fusiona con lo que haya en disco (otros procesos) y guarda, bajo flock"""
+        with _file_lock(self.persist_path):
+            on_disk = self._load() if self.persist_path.exists() else {}
+            with self._lock:
+                for key, entry in on_disk.items():
+                    current = self._entries.get(key)
+                    if current is None or current[0] < entry[0]:
+                        self._entries[key] = entry
+                self._prune()
+                data = {k: [ts, v] for k, (ts, v) in self._entries.items()}
+
+            _write_json_atomic(self.persist_path, data)
+
+
+class RequestBudget:
+    """
+    Token bucket para la cuota de Pexels.
+
+    - Límite horario: capacidad rate_limit_hour, recarga continua
+    - Límite mensual: contador local corregido con X-Ratelimit-Remaining/Reset
+    """
+
+    def __init__(
+        self,
+        rate_limit_hour: int = 200,
+        rate_limit_month: int = 20000,
+        state_path: Optional[str] = None
+    ):
+        """
+        Inicializa el presupuesto.
+
+        Args:
+            rate_limit_hour: Requests permitidos por hora
+            rate_limit_month: Requests permitidos por mes
+            state_path: Archivo JSON compartido entre procesos (opcional)
+        """
+        self.rate_limit_hour = rate_limit_hour
+        self.rate_limit_month = rate_limit_month
+        self.refill_per_second = rate_limit_hour / 3600.0
+        self.state_path = Path(state_path) if state_path else None
+
+        self._lock = threading.Lock()
+        self._state = self._initial_state()
+
+    @classmethod
+    def from_config(
+        cls,
+        config_path: Optional[str] = None,
+        state_path: Optional[str] = None
+    ) -> "RequestBudget":
+        """
+        Crea el presupuesto con los límites de apis.pexels en global.json.
+
+        Args:
+            config_path: Ruta a global.json (default: /config/global.json)
+            state_path: Archivo de estado compartido
+        """
+        limits = {}
+        path = Path(config_path) if config_path else GLOBAL_CONFIG_PATH
+        try:
+            with open(path, encoding="utf-8") as f:
+                limits = json.load(f).get("apis", {}).get("pexels", {})
+        except (OSError, ValueError):
+            pass
+
+        return cls(
+            rate_limit_hour=int(limits.get("rate_limit_hour") or 200),
+            rate_limit_month=int(limits.get("rate_limit_month") or 20000),
+            state_path=state_path
+        )
+
+    def acquire(self, max_wait: float = 120.0) -> bool:
+        """
+        Reserva un request, esperando a que se recargue el bucket si hace falta.
+
+        Args:
+            max_wait: Segundos máximos de espera antes de aplazar
+
+        Returns:
+            True si se puede hacer el request, False si hay que aplazarlo
+        """
+        deadline = time.monotonic() + max_wait
+
+        while True:
+            with self._state_locked() as state:
+                now = time.time()
+                self._refill(state, now)
+
+                if self._month_exhausted(state, now):
+                    return False
+
+                blocked = state.get("blocked_until", 0.0) - now
+
+                if blocked <= 0 and state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    state["month_used"] += 1
+                    if state["month_remaining"] is not None:
+                        state["month_remaining"] -= 1
+                    return True
+
+                wait = max(0.0, (1 - state["tokens"]) / self.refill_per_second)
+                wait = max(wait, blocked)
+
+            if time.monotonic() + wait > deadline:
+                return False
+
+            time.sleep(min(wait, 5.0))
+
+    def update_from_headers(self, headers: Dict):
+        """
+        Sincroniza el estado con las cabeceras de respuesta de Pexels.
+
+        Args:
+            headers: Cabeceras HTTP (X-Ratelimit-Limit/Remaining/Reset)
+        """
+        remaining = headers.get("X-Ratelimit-Remaining")
+        reset = headers.get("X-Ratelimit-Reset")
+
+        if remaining is None and reset is None:
+            return
+
+        with self._state_locked() as state:
+            if remaining is not None:
+                try:
+                    state["month_remaining"] = int(remaining)
+                except ValueError:
+                    pass
+            if reset is not None:
+                try:
+                    state["month_reset"] = float(reset)
+                except ValueError:
+                    pass
+
+    def block_for(self, seconds: float):
+        """Vacía el bucket tras un 429 (Retry-After) para no insistir"""
+        with self._state_locked() as state:
+            state["tokens"] = 0.0
+            state["blocked_until"] = time.time() + max(0.0, seconds)
+
+    def stats(self) -> Dict:
+        """Estado actual del presupuesto"""
+        with self._state_locked() as state:
+            self._refill(state, time.time())
+            return {
+                "tokens": round(state["tokens"], 2),
+                "rate_limit_hour": self.rate_limit_hour,
+                "rate_limit_month": self.rate_limit_month,
+                "month_used": state["month_used"],
+                "month_remaining": state["month_remaining"],
+                "month_reset": state["month_reset"]
+            }
+
+    def _initial_state(self) -> Dict:
+        """Estado inicial: bucket lleno"""
+        now = time.time()
+        return {
+            "tokens": float(self.rate_limit_hour),
+            "updated": now,
+            "blocked_until": 0.0,
+            "month": time.strftime("%Y-%m", time.gmtime(now)),
+            "month_used": 0,
+            "month_remaining": None,
+            "month_reset": None
+        }
+
+    def _refill(self, state: Dict, now: float):
+        """Recarga tokens según el tiempo transcurrido"""
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(
+            float(self.rate_limit_hour),
+            state["tokens"] + elapsed * self.refill_per_second
+        )
+        state["updated"] = now
+
+        # Nuevo mes: reiniciar contador local
+        month = time.strftime("%Y-%m", time.gmtime(now))
+        if state["month"] != month:
+            state["month"] = month
+            state["month_used"] = 0
+
+    def _month_exhausted(self, state: Dict, now: float) -> bool:
+        """True si la cuota mensual está agotada"""
+        reset = state.get("month_reset")
+        if reset and now >= reset:
+            state["month_remaining"] = None
+            state["month_reset"] = None
+            state["month_used"] = 0
+
+        if state["month_remaining"] is not None:
+            return state["month_remaining"] <= 0
+        return state["month_used"] >= self.rate_limit_month
+
+    @contextmanager
+    def _state_locked(self) -> Iterator[Dict]:
+        """Bloquea y carga el estado (compartido en disco si hay state_path)"""
+        with self._lock:
+            if not self.state_path:
+                yield self._state
+                return
+
+            with _file_lock(self.state_path):
+                try:
+                    with open(self.state_path, encoding="utf-8") as f:
+                        self._state = {**self._initial_state(), **json.load(f)}
+                except (OSError, ValueError):
+                    pass
+
+                yield self._state
+                _write_json_atomic(self.state_path, self._state)
+
+
+def default_search_cache(ttl: float = 6 * 3600, persist: bool = True) -> SearchCache:
+    """Caché de búsquedas compartida en .cache/pexels_search.json"""
+    path = DEFAULT_CACHE_ROOT / "pexels_search.json" if persist else None
+    return SearchCache(ttl=ttl, persist_path=str(path) if path else None)
+
+
+def default_budget() -> RequestBudget:
+    """Presupuesto con límites de global.json y estado en .cache/pexels_budget.json"""
+    return RequestBudget.from_config(state_path=str(DEFAULT_CACHE_ROOT / "pexels_budget.json"))
@@ -8,79 +8,58 @@ Formato ASS soporta estilos avanzados:
 - Colores y efectos
 - Posicionamiento preciso
 - Animaciones
+
+Con los tiempos por palabra de la narración (utils.word_timings) genera
+subtítulos por grupos de palabras o karaoke alineados con la voz.
 """
 
 import re
+import sys
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+try:
+    from ..utils.text_utils import split_into_sentences
+    from ..utils.word_timings import WordTimings
+    from ..utils.subtitle_cues import CueList
+    from .subtitle_styles import PRESETS, get_style
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.text_utils import split_into_sentences
+    from utils.word_timings import WordTimings
+    from utils.subtitle_cues import CueList
+    from subtitle_styles import PRESETS, get_style
+
 
 class SubtitleGenerator:
     """Generador de subtítulos ASS para videos verticales"""
     
-    # Estilos predefinidos
-    STYLES = {
-        "default": {
-            "fontname": "Montserrat",
-            "fontsize": 72,
-            "primary_color": "&H00FFFFFF",  # Blanco
-            "outline_color": "&H00000000",  # Negro
-            "back_color": "&H80000000",     # Negro semi-transparente
-            "bold": 1,
-            "outline": 4,
-            "shadow": 2,
-            "alignment": 2,  # Centro inferior
-            "margin_v": 400
-        },
-        "bold_center": {
-            "fontname": "Impact",
-            "fontsize": 80,
-            "primary_color": "&H00FFFFFF",
-            "outline_color": "&H00000000",
-            "back_color": "&H00000000",
-            "bold": 1,
-            "outline": 5,
-            "shadow": 3,
-            "alignment": 5,  # Centro
-            "margin_v": 50
-        },
-        "minimal": {
-            "fontname": "Arial",
-            "fontsize": 64,
-            "primary_color": "&H00FFFFFF",
-            "outline_color": "&H00000000",
-            "back_color": "&H00000000",
-            "bold": 0,
-            "outline": 2,
-            "shadow": 1,
-            "alignment": 2,
-            "margin_v": 300
-        },
-        "neon": {
-            "fontname": "Bebas Neue",
-            "fontsize": 76,
-            "primary_color": "&H0000FFFF",  # Cyan
-            "outline_color": "&H00FF00FF",  # Magenta
-            "back_color": "&H00000000",
-            "bold": 1,
-            "outline": 3,
-            "shadow": 0,
-            "alignment": 5,
-            "margin_v": 50
-        }
-    }
+    # Estilos predefinidos (registro compartido, ver subtitle_styles)
+    STYLES = PRESETS
     
-    def __init__(self, style: str = "default", custom_style: Optional[dict] = None):
+    def __init__(
+        self,
+        style: str = "default",
+        custom_style: Optional[dict] = None,
+        effects: Optional[dict] = None,
+        keywords: Optional[List[str]] = None
+    ):
         """
         Inicializa el generador.
         
         Args:
             style: Nombre del estilo predefinido
             custom_style: Diccionario con estilos personalizados
+            effects: Efectos por palabra (color, pop, emoji); None = sin efectos
+            keywords: Palabras a resaltar (con effects)
         """
         self.style = self.STYLES.get(style, self.STYLES["default"]).copy()
         if custom_style:
             self.style.update(custom_style)
+        
+        # Cabecera y reglas compiladas una vez (compartidas entre generadores)
+        self.compiled = get_style(style, custom_style, effects, keywords or ())
+        self.effects = effects
     
     def from_text(
         self,
@@ -108,20 +87,11 @@ class SubtitleGenerator:
         # Calcular timing
         time_per_fragment = duration / len(fragments) if fragments else duration
         
-        # Generar ASS
-        ass_content = self._generate_ass_header()
-        
+        cues = CueList()
         for i, fragment in enumerate(fragments):
-            start = i * time_per_fragment
-            end = (i + 1) * time_per_fragment
-            ass_content += self._create_dialogue_line(fragment, start, end)
+            cues.append(i * time_per_fragment, (i + 1) * time_per_fragment, fragment)
         
-        # Guardar
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
-        
-        return output_path
+        return self._write(cues, output_path)
     
     def from_lines(
         self,
@@ -142,18 +112,11 @@ class SubtitleGenerator:
         """
         time_per_line = duration / len(lines) if lines else duration
         
-        ass_content = self._generate_ass_header()
-        
+        cues = CueList()
         for i, line in enumerate(lines):
-            start = i * time_per_line
-            end = (i + 1) * time_per_line
-            ass_content += self._create_dialogue_line(line.strip(), start, end)
+            cues.append(i * time_per_line, (i + 1) * time_per_line, line.strip())
         
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
-        
-        return output_path
+        return self._write(cues, output_path)
     
     def from_script(
         self,
@@ -195,62 +158,60 @@ class SubtitleGenerator:
         Returns:
             Ruta al archivo generado
         """
-        ass_content = self._generate_ass_header()
+        return self._write(CueList.from_segments(segments), output_path)
+    
+    def from_word_timings(
+        self,
+        timings: WordTimings,
+        output_path: str,
+        mode: str = "words",
+        words_per_group: int = 3
+    ) -> str:
+        """
+        Genera subtítulos alineados con la voz desde tiempos por palabra.
         
-        for text, start, end in segments:
-            ass_content += self._create_dialogue_line(text, start, end)
+        Args:
+            timings: Tiempos por palabra (WordTimings.for_narration(srt))
+            output_path: Ruta de salida
+            mode: words (grupos de palabras) | karaoke (\\k por palabra)
+            words_per_group: Palabras máximas por evento
+            
+        Returns:
+            Ruta al archivo generado
+        """
+        # Efectos por palabra antes de añadir las etiquetas \k
+        transform = self.compiled.decorate if self.effects is not None else None
+        return self._write(
+            timings.ass_events(mode, words_per_group, transform=transform),
+            output_path,
+            style="Karaoke" if mode == "karaoke" else "Default",
+            escape=False,
+            decorate=False
+        )
+    
+    def _write(
+        self,
+        cues: CueList,
+        output_path: str,
+        style: str = "Default",
+        escape: bool = True,
+        decorate: bool = True
+    ) -> str:
+        """Escribe los cues como ASS con el estilo (y efectos, si hay) del generador"""
+        decorate = decorate and self.effects is not None
         
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
-        
+            f.write(self.compiled.render(cues, style, escape, decorate))
         return output_path
     
     def _generate_ass_header(self) -> str:
-        """Genera el header del archivo ASS"""
-        s = self.style
-        
-        return f"""[Script Info]
-Title: Short Video Subtitles
-ScriptType: v4.00+
-PlayResX: 1080
-PlayResY: 1920
-WrapStyle: 0
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,{s['fontname']},{s['fontsize']},{s['primary_color']},&H000000FF,{s['outline_color']},{s['back_color']},{s['bold']},0,0,0,100,100,0,0,1,{s['outline']},{s['shadow']},{s['alignment']},50,50,{s['margin_v']},1
-
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-    
-    def _create_dialogue_line(self, text: str, start: float, end: float) -> str:
-        """Crea una línea de diálogo ASS"""
-        start_str = self._format_time(start)
-        end_str = self._format_time(end)
-        
-        # Escapar caracteres especiales de ASS
-        text = text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}")
-        
-        return f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{text}\n"
-    
-    def _format_time(self, seconds: float) -> str:
-        """Convierte segundos a formato ASS (H:MM:SS.cc)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = seconds % 60
-        return f"{hours}:{minutes:02d}:{secs:05.2f}"
+        """Cabecera del archivo ASS (compilada por el registro de estilos)"""
+        return self.compiled.header
     
     def _split_into_sentences(self, text: str) -> List[str]:
         """Divide texto en oraciones"""
-        # Limpiar y normalizar
-        text = text.strip()
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Dividir por puntuación
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        return [s.strip() for s in sentences if s.strip()]
+        return split_into_sentences(text)
     
     def _split_into_fragments(
         self,
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Subtitle Overlays
+Subtítulos pre-rasterizados como overlays PNG con transparencia.
+
+El filtro ass= da forma y rasteriza el texto en cada frame de la
+codificación final; con fuentes grandes y contorno grueso es una parte
+importante del tiempo de encode. Aquí cada evento distinto se rasteriza
+una sola vez (una única llamada a FFmpeg para todos los que falten) a un
+PNG RGBA y se guarda en la caché de medios por (cabecera, estilo, texto,
+resolución): hooks y CTAs repetidos se reutilizan entre videos.
+
+En la codificación final cada evento es un overlay con
+enable='gte(t,inicio)*lt(t,fin)'. Los eventos animados (\\t, \\k, \\move,
+\\fad...) o que se solapan con otro se quedan en un ASS residual que
+sigue pasando por libass.
+"""
+
+import re
+import sys
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from ..utils.media_cache import MediaCache
+    from ..utils.subtitle_cues import parse_time, ass_time
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.media_cache import MediaCache
+    from utils.subtitle_cues import parse_time, ass_time
+
+
+# Etiquetas ASS que cambian el evento con el tiempo (no caben en un PNG)
+ANIMATED_TAGS = re.compile(r"\\(?:t\(|[kK][fo]?\d|move\(|fade?\()")
+
+# Bloques de override y saltos ASS (para saber si un evento pinta algo)
+_INVISIBLE = re.compile(r"\{[^}]*\}|\\[Nnh]")
+
+# Versión de las entradas cacheadas (sube si cambia cómo se rasteriza)
+_CACHE_VERSION = 2
+
+# Campos de Dialogue: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+_DIALOGUE = "Dialogue:"
+
+
+class OverlayPlan:
+    """Overlays de un ASS listos para componer en un filter_complex"""
+
+    def __init__(
+        self,
+        images: List[str],
+        placements: List[Tuple[int, float, float]],
+        residual_ass: Optional[str] = None
+    ):
+        """
+        Args:
+            images: PNGs distintos (uno por evento único)
+            placements: (índice de imagen, inicio, fin) por evento
+            residual_ass: ASS con los eventos animados (None si no hay)
+        """
+        self.images = images
+        self.placements = placements
+        self.residual_ass = residual_ass
+
+    def input_args(self) -> List[str]:
+        """Argumentos -i de los PNGs (en el orden de images)"""
+        args = []
+        for image in self.images:
+            args.extend(["-i", image])
+        return args
+
+    def filters(self, source: str, output: str, first_input: int) -> List[str]:
+        """
+        Filtros que componen los overlays (y el ASS residual) sobre un video.
+
+        Args:
+            source: Etiqueta del video base (sin corchetes)
+            output: Etiqueta de salida (sin corchetes)
+            first_input: Índice de input del primer PNG
+
+        Returns:
+            Lista de filtros para el filter_complex
+        """
+        filters = []
+
+        # Una etiqueta por aparición; split solo para imágenes repetidas
+        uses: Dict[int, List[str]] = {}
+        for n, (image, _, _) in enumerate(self.placements):
+            uses.setdefault(image, []).append(f"ov{n}")
+        for image, labels in uses.items():
+            if len(labels) == 1:
+                filters.append(f"[{first_input + image}:v]null[{labels[0]}]")
+            else:
+                outs = "".join(f"[{label}]" for label in labels)
+                filters.append(f"[{first_input + image}:v]split={len(labels)}{outs}")
+
+        current = source
+        last = len(self.placements) - 1
+        for n, (_, start, end) in enumerate(self.placements):
+            target = output if n == last and not self.residual_ass else f"sub{n}"
+            filters.append(
+                f"[{current}][ov{n}]overlay=0:0:"
+                f"enable='gte(t,{start:.3f})*lt(t,{end:.3f})'[{target}]"
+            )
+            current = target
+
+        if self.residual_ass:
+            filters.append(f"[{current}]ass={self.residual_ass}[{output}]")
+        elif not self.placements:
+            filters.append(f"[{current}]null[{output}]")
+
+        return filters
+
+
+class SubtitleOverlays:
+    """Rasterizador de eventos ASS a PNGs cacheados"""
+
+    def __init__(self, width: int, height: int, cache: Optional[MediaCache] = None):
+        """
+        Inicializa el rasterizador.
+
+        Args:
+            width: Ancho del video final
+            height: Alto del video final
+            cache: Caché de medios (default: namespace "subtitle_overlays")
+        """
+        self.width = width
+        self.height = height
+        self.cache = cache or MediaCache(namespace="subtitle_overlays")
+
+    def plan(self, ass_path: str, work_dir: Path) -> Optional[OverlayPlan]:
+        """
+        Prepara los overlays de un ASS (rasterizando solo los que falten en caché).
+
+        Args:
+            ass_path: Subtítulos ASS
+            work_dir: Directorio del trabajo (ASS residual y temporales)
+
+        Returns:
+            OverlayPlan o None si no se pudo rasterizar (usar ass= directamente)
+        """
+        header, events = self._read_ass(ass_path)
+        if not events:
+            return None
+
+        static, animated = self._split(events)
+        if not static:
+            return None
+
+        # Eventos únicos por contenido (todo menos los tiempos)
+        keys: Dict[str, int] = {}
+        unique: List[Tuple[str, List[str]]] = []
+        placements = []
+        for start, end, fields in static:
+            key = MediaCache.make_key(
+                "sub-overlay", _CACHE_VERSION, header, fields, self.width, self.height
+            )
+            if key not in keys:
+                keys[key] = len(unique)
+                unique.append((key, fields))
+            placements.append((keys[key], start, end))
+
+        images = self._rasterize(header, unique)
+        if images is None:
+            return None
+
+        residual = None
+        if animated:
+            residual = str(Path(work_dir) / f"{Path(ass_path).stem}_animated.ass")
+            with open(residual, 'w', encoding='utf-8') as f:
+                f.write(header)
+                for start, end, fields in animated:
+                    f.write(self._dialogue(fields, start, end))
+
+        return OverlayPlan(images, placements, residual)
+
+    def _rasterize(
+        self,
+        header: str,
+        unique: List[Tuple[str, List[str]]]
+    ) -> Optional[List[str]]:
+        """
+        PNG de cada evento único: de la caché o rasterizado ahora.
+
+        Los que faltan se renderizan juntos: el evento k ocupa el segundo
+        [k, k+1) de un ASS temporal y FFmpeg saca un frame por segundo
+        sobre un lienzo transparente (ass con alpha=1: sin él libass no
+        toca el canal alfa y el PNG queda vacío). Un frame sin ningún
+        píxel opaco no se cachea y se vuelve a ass=.
+        """
+        images: List[Optional[str]] = []
+        missing = []
+        for key, fields in unique:
+            cached = self.cache.get(key, ".png")
+            images.append(str(cached) if cached else None)
+            if not cached:
+                missing.append((len(images) - 1, key, fields))
+
+        if not missing:
+            return images
+
+        with tempfile.TemporaryDirectory(prefix="subs_") as tmp:
+            tmp_dir = Path(tmp)
+            ass_path = tmp_dir / "events.ass"
+            with open(ass_path, 'w', encoding='utf-8') as f:
+                f.write(header)
+                for k, (_, _, fields) in enumerate(missing):
+                    f.write(self._dialogue(fields, float(k), k + 1.0))
+
+            cmd = [
+                "ffmpeg", "-y",
+                "-f", "lavfi",
+                "-i", f"color=c=black@0.0:s={self.width}x{self.height}:r=1:d={len(missing)}",
+                "-vf", f"format=rgba,ass={ass_path}:alpha=1",
+                "-frames:v", str(len(missing)),
+                "-start_number", "0",
+                "-pix_fmt", "rgba",
+                str(tmp_dir / "%05d.png")
+            ]
+            result = subprocess.run(cmd, capture_output=True)
+            if result.returncode != 0:
+                print("⚠️ No se pudieron rasterizar los subtítulos, se usa ass=")
+                return None
+
+            frames = [tmp_dir / f"{k:05d}.png" for k in range(len(missing))]
+            if not all(frame.exists() for frame in frames):
+                return None
+            if not self._has_alpha(frames):
+                print("⚠️ Subtítulos rasterizados sin opacidad, se usa ass=")
+                return None
+
+            for frame, (index, key, _) in zip(frames, missing):
+                images[index] = str(self.cache.put(key, str(frame), ".png", move=True))
+
+        return images
+
+    def _has_alpha(self, frames: List[Path]) -> bool:
+        """True si todos los PNGs tienen algún píxel con alfa distinto de cero"""
+        frame_size = self.width * self.height
+        cmd = [
+            "ffmpeg", "-v", "error",
+            "-start_number", "0",
+            "-i", str(frames[0].parent / "%05d.png"),
+            "-frames:v", str(len(frames)),
+            "-vf", "format=rgba,alphaextract",
+            "-pix_fmt", "gray",
+            "-f", "rawvideo", "-"
+        ]
+        result = subprocess.run(cmd, capture_output=True)
+        if result.returncode != 0 or len(result.stdout) < frame_size * len(frames):
+            return False
+
+        data = result.stdout
+        return all(
+            data[k * frame_size:(k + 1) * frame_size].strip(b"\x00")
+            for k in range(len(frames))
+        )
+
+    @staticmethod
+    def _read_ass(ass_path: str) -> Tuple[str, List[Tuple[float, float, List[str]]]]:
+        """Cabecera (hasta el Format de [Events]) y eventos (inicio, fin, campos)"""
+        header = []
+        events = []
+        with open(ass_path, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                if line.startswith(_DIALOGUE):
+                    fields = line[len(_DIALOGUE):].strip().split(",", 9)
+                    if len(fields) == 10:
+                        start, end = parse_time(fields[1]), parse_time(fields[2])
+                        events.append((start, end, [fields[0]] + fields[3:]))
+                elif not events:
+                    header.append(line)
+
+        text = "".join(header)
+        return (text if text.endswith("\n") else text + "\n"), events
+
+    @staticmethod
+    def _split(
+        events: List[Tuple[float, float, List[str]]]
+    ) -> Tuple[List[Tuple[float, float, List[str]]], List[Tuple[float, float, List[str]]]]:
+        """Separa eventos estáticos de los animados o solapados (quedan en libass)"""
+        static = []
+        animated = []
+        ordered = sorted(events, key=lambda e: e[0])
+        for i, event in enumerate(ordered):
+            start, end, fields = event
+            overlaps = (
+                (i > 0 and ordered[i - 1][1] > start)
+                or (i + 1 < len(ordered) and ordered[i + 1][0] < end)
+            )
+            if overlaps or ANIMATED_TAGS.search(fields[-1]):
+                animated.append(event)
+            elif end > start and _INVISIBLE.sub("", fields[-1]).strip():
+                # Los eventos sin texto visible no pintan nada (ni se rasterizan)
+                static.append(event)
+        return static, animated
+
+    @staticmethod
+    def _dialogue(fields: List[str], start: float, end: float) -> str:
+        """Línea Dialogue con los campos originales y tiempos nuevos"""
+        return (
+            f"{_DIALOGUE} {fields[0]},{ass_time(start)},{ass_time(end)},"
+            f"{','.join(fields[1:])}\n"
+        )
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Subtitle Styles
+Registro de estilos de subtítulos compilados una sola vez.
+
+Cada estilo compila al crearse:
+- La cabecera ASS completa (estilos Default y Karaoke)
+- Una única regex de resaltado: palabras en MAYÚSCULAS + palabras clave
+  (configuradas o extraídas de los hooks de analytics/insights.json)
+- Los efectos por palabra (color, "pop" de escala, emoji)
+
+decorate() aplica todos los efectos en una sola pasada sobre el texto de
+cada cue, y render() sobre toda la CueList. Los estilos se cargan por
+nombre desde la sección "video"/"subtitles" de config.json.
+"""
+
+import re
+import sys
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from ..utils.subtitle_cues import CueList, to_ass
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.subtitle_cues import CueList, to_ass
+
+
+# Presets: parámetros de estilo ASS (colores en &HAABBGGRR)
+PRESETS: Dict[str, Dict] = {
+    "default": {
+        "fontname": "Montserrat",
+        "fontsize": 72,
+        "primary_color": "&H00FFFFFF",  # Blanco
+        "outline_color": "&H00000000",  # Negro
+        "back_color": "&H80000000",     # Negro semi-transparente
+        "bold": 1,
+        "outline": 4,
+        "shadow": 2,
+        "alignment": 2,  # Centro inferior
+        "margin_v": 400
+    },
+    "bold_center": {
+        "fontname": "Impact",
+        "fontsize": 80,
+        "primary_color": "&H00FFFFFF",
+        "outline_color": "&H00000000",
+        "back_color": "&H00000000",
+        "bold": 1,
+        "outline": 5,
+        "shadow": 3,
+        "alignment": 5,  # Centro
+        "margin_v": 50
+    },
+    "minimal": {
+        "fontname": "Arial",
+        "fontsize": 64,
+        "primary_color": "&H00FFFFFF",
+        "outline_color": "&H00000000",
+        "back_color": "&H00000000",
+        "bold": 0,
+        "outline": 2,
+        "shadow": 1,
+        "alignment": 2,
+        "margin_v": 300
+    },
+    "neon": {
+        "fontname": "Bebas Neue",
+        "fontsize": 76,
+        "primary_color": "&H0000FFFF",  # Cyan
+        "outline_color": "&H00FF00FF",  # Magenta
+        "back_color": "&H00000000",
+        "bold": 1,
+        "outline": 3,
+        "shadow": 0,
+        "alignment": 5,
+        "margin_v": 50
+    },
+    # Estilo histórico de tiktok_producer.py
+    "viral": {
+        "fontname": "Montserrat ExtraBold",
+        "fontsize": 72,
+        "primary_color": "&H00FFFFFF",
+        "outline_color": "&H00000000",
+        "back_color": "&H80000000",
+        "bold": 1,
+        "outline": 4,
+        "shadow": 0,
+        "alignment": 2,
+        "margin_v": 400
+    }
+}
+
+# Efectos por defecto: resaltar MAYÚSCULAS en amarillo, sin pop ni emojis
+DEFAULT_EFFECTS = {
+    "color": "&H00FFFF&",          # Color de palabras resaltadas (BGR)
+    "karaoke_color": "&H0000FFFF", # Palabra ya pronunciada en modo karaoke
+    "uppercase": True,             # Resaltar palabras en MAYÚSCULAS
+    "pop": False,                  # Escala 120% -> 100% al aparecer
+    "pop_scale": 120,
+    "pop_ms": 150,
+    "emoji": {}                    # palabra -> emoji añadido detrás
+}
+
+INSIGHTS_MIN_WORD = 5
+
+_STYLE_FORMAT = (
+    "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+    "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+    "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding"
+)
+
+
+def hook_keywords(insights_path: str, min_length: int = INSIGHTS_MIN_WORD) -> Set[str]:
+    """
+    Palabras clave de los hooks con buen rendimiento (analytics/insights.json).
+
+    Admite successful_hooks (TikTok) y patterns.hooks.best_performing
+    (YouTube), como textos o como objetos con "text"/"hook".
+
+    Args:
+        insights_path: Ruta a insights.json
+        min_length: Longitud mínima de palabra (descarta artículos, etc.)
+
+    Returns:
+        Conjunto de palabras en minúsculas
+    """
+    try:
+        with open(insights_path, "r", encoding="utf-8") as f:
+            insights = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return set()
+
+    hooks = list(insights.get("successful_hooks") or [])
+    patterns = insights.get("patterns")
+    if isinstance(patterns, dict):
+        hooks += (patterns.get("hooks") or {}).get("best_performing") or []
+
+    words = set()
+    for hook in hooks:
+        text = (hook.get("text") or hook.get("hook") or "") if isinstance(hook, dict) else str(hook)
+        for word in re.findall(r"\w+", text.lower()):
+            if len(word) >= min_length and not word.isdigit():
+                words.add(word)
+    return words
+
+
+class SubtitleStyle:
+    """Estilo compilado: cabecera ASS + reglas de resaltado"""
+
+    def __init__(
+        self,
+        name: str,
+        params: Dict,
+        effects: Optional[Dict] = None,
+        keywords: Iterable[str] = (),
+        play_res: tuple = (1080, 1920)
+    ):
+        """
+        Compila un estilo.
+
+        Args:
+            name: Nombre del estilo
+            params: Parámetros ASS (ver PRESETS)
+            effects: Efectos por palabra (ver DEFAULT_EFFECTS)
+            keywords: Palabras a resaltar además de las MAYÚSCULAS
+            play_res: Resolución de referencia del script ASS
+        """
+        self.name = name
+        self.params = dict(params)
+        self.effects = {**DEFAULT_EFFECTS, **(effects or {})}
+        self.keywords = frozenset(k.lower() for k in keywords if k)
+        self.emoji = {k.lower(): v for k, v in (self.effects.get("emoji") or {}).items()}
+
+        self.header = self._compile_header(play_res)
+        self.pattern = self._compile_pattern()
+        self._open, self._close = self._compile_tags()
+
+    def _compile_header(self, play_res: tuple) -> str:
+        """Cabecera ASS (Script Info + estilos Default/Karaoke + Format de eventos)"""
+        s = self.params
+        tail = (
+            f"{s['outline_color']},{s['back_color']},{s['bold']},0,0,0,100,100,0,0,1,"
+            f"{s['outline']},{s['shadow']},{s['alignment']},50,50,{s['margin_v']},1"
+        )
+        karaoke = self.effects["karaoke_color"]
+
+        return (
+            "[Script Info]\n"
+            f"Title: {self.name} subtitles\n"
+            "ScriptType: v4.00+\n"
+            f"PlayResX: {play_res[0]}\n"
+            f"PlayResY: {play_res[1]}\n"
+            "WrapStyle: 0\n"
+            "\n"
+            "[V4+ Styles]\n"
+            f"{_STYLE_FORMAT}\n"
+            f"Style: Default,{s['fontname']},{s['fontsize']},{s['primary_color']},&H000000FF,{tail}\n"
+            f"Style: Karaoke,{s['fontname']},{s['fontsize']},{karaoke},{s['primary_color']},{tail}\n"
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
+
+    def _compile_pattern(self) -> Optional[re.Pattern]:
+        """Una sola regex para MAYÚSCULAS, palabras clave y palabras con emoji"""
+        alternatives = []
+        if self.effects.get("uppercase", True):
+            alternatives.append(r"(?P<upper>\b[A-ZÁÉÍÓÚÑÜ]{2,}\b)")
+
+        words = self.keywords | set(self.emoji)
+        if words:
+            # Las más largas primero para que no gane un prefijo
+            joined = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+            alternatives.append(rf"(?P<word>\b(?i:{joined})\b)")
+
+        return re.compile("|".join(alternatives)) if alternatives else None
+
+    def _compile_tags(self) -> tuple:
+        """Etiquetas ASS de apertura/cierre de una palabra resaltada"""
+        tags = [f"\\c{self.effects['color']}"]
+        if self.effects.get("pop"):
+            scale = int(self.effects.get("pop_scale", 120))
+            ms = int(self.effects.get("pop_ms", 150))
+            tags.append(f"\\fscx{scale}\\fscy{scale}\\t(0,{ms},\\fscx100\\fscy100)")
+        # \r vuelve al estilo del evento (también al color de karaoke)
+        return "{" + "".join(tags) + "}", "{\\r}"
+
+    def decorate(self, text: str) -> str:
+        """
+        Aplica los efectos por palabra a un texto ya escapado (una pasada).
+
+        Args:
+            text: Texto del cue (ASS escapado)
+
+        Returns:
+            Texto con etiquetas ASS
+        """
+        if not self.pattern:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+    def _replace(self, match: re.Match) -> str:
+        word = match.group(0)
+        lowered = word.lower()
+        highlight = match.group("upper") if "upper" in self.pattern.groupindex else None
+        highlight = highlight or lowered in self.keywords
+
+        out = f"{self._open}{word}{self._close}" if highlight else word
+        emoji = self.emoji.get(lowered)
+        return f"{out} {emoji}" if emoji else out
+
+    def render(
+        self,
+        cues: CueList,
+        style: str = "Default",
+        escape: bool = True,
+        decorate: bool = True
+    ) -> str:
+        """
+        Documento ASS completo de una lista de cues (efectos en una pasada).
+
+        Args:
+            cues: Cues a escribir
+            style: Default | Karaoke
+            escape: False si el texto ya trae etiquetas ASS
+            decorate: False si los efectos ya se aplicaron por palabra
+                      (WordTimings.ass_events(transform=style.decorate))
+
+        Returns:
+            Contenido ASS
+        """
+        transform = self.decorate if decorate else None
+        return to_ass(cues, self.header, style=style, escape=escape, transform=transform)
+
+
+class StyleRegistry:
+    """Estilos compilados por (nombre, ajustes), reutilizados entre llamadas"""
+
+    def __init__(self, presets: Optional[Dict[str, Dict]] = None):
+        self.presets = {name: dict(p) for name, p in (presets or PRESETS).items()}
+        self._compiled: Dict[str, SubtitleStyle] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Nombres de estilos disponibles"""
+        return list(self.presets)
+
+    def register(self, name: str, params: Dict, base: str = "default"):
+        """Añade (o redefine) un preset a partir de otro"""
+        with self._lock:
+            preset = {**self.presets.get(base, PRESETS["default"]), **params}
+            if self.presets.get(name) == preset:
+                return
+            self.presets[name] = preset
+            self._compiled = {k: v for k, v in self._compiled.items() if not k.startswith(f"{name}|")}
+
+    def get(
+        self,
+        name: str = "default",
+        overrides: Optional[Dict] = None,
+        effects: Optional[Dict] = None,
+        keywords: Iterable[str] = ()
+    ) -> SubtitleStyle:
+        """
+        Obtiene un estilo compilado (se compila la primera vez).
+
+        Args:
+            name: Preset (default, bold_center, minimal, neon, viral...)
+            overrides: Ajustes de parámetros ASS
+            effects: Efectos por palabra
+            keywords: Palabras a resaltar
+
+        Returns:
+            SubtitleStyle
+        """
+        if name not in self.presets:
+            print(f"⚠️ Estilo de subtítulos desconocido: {name} - usando default")
+            name = "default"
+
+        keywords = sorted(set(keywords))
+        key = f"{name}|" + json.dumps([overrides, effects, keywords], sort_keys=True, ensure_ascii=False)
+
+        with self._lock:
+            style = self._compiled.get(key)
+            if style is None:
+                style = SubtitleStyle(name, {**self.presets[name], **(overrides or {})}, effects, keywords)
+                self._compiled[key] = style
+            return style
+
+    def from_config(self, config: Dict, insights_path: Optional[str] = None) -> SubtitleStyle:
+        """
+        Estilo descrito por un config.json de plataforma.
+
+        Usa video.subtitle_style y la sección opcional "subtitles" (ver from_section).
+
+        Args:
+            config: Config de plataforma ya cargado
+            insights_path: analytics/insights.json de la plataforma
+
+        Returns:
+            SubtitleStyle
+        """
+        subtitles = config.get("subtitles") or {}
+        name = (config.get("video") or {}).get("subtitle_style") or subtitles.get("style") or "default"
+        return self.from_section(name, subtitles, insights_path)
+
+    def from_section(
+        self,
+        name: str,
+        subtitles: Optional[Dict] = None,
+        insights_path: Optional[str] = None
+    ) -> SubtitleStyle:
+        """
+        Estilo a partir de un nombre y la sección "subtitles" de un config.
+
+        La sección admite:
+            styles: {nombre: ajustes} (presets nuevos, con "base" opcional,
+                    o ajustes de un preset existente)
+            keywords: palabras a resaltar
+            effects: color, pop, emoji... (ver DEFAULT_EFFECTS)
+            use_insights: añadir palabras de los hooks de insights.json (default True)
+
+        Args:
+            name: Preset a usar
+            subtitles: Sección "subtitles"
+            insights_path: analytics/insights.json de la plataforma
+
+        Returns:
+            SubtitleStyle
+        """
+        subtitles = subtitles or {}
+
+        # Nombres nuevos = presets propios; nombres existentes = ajustes del preset
+        styles = subtitles.get("styles") or {}
+        for style_name, params in styles.items():
+            if style_name not in PRESETS:
+                base = params.get("base", "default")
+                self.register(style_name, {k: v for k, v in params.items() if k != "base"}, base)
+
+        keywords = set(subtitles.get("keywords") or [])
+        if insights_path and subtitles.get("use_insights", True):
+            keywords |= hook_keywords(insights_path)
+
+        overrides = styles.get(name) if name in PRESETS else None
+        return self.get(name, overrides, subtitles.get("effects"), keywords)
+
+
+_registry = StyleRegistry()
+
+
+def get_style(
+    name: str = "default",
+    overrides: Optional[Dict] = None,
+    effects: Optional[Dict] = None,
+    keywords: Iterable[str] = ()
+) -> SubtitleStyle:
+    """Estilo compilado del registro compartido"""
+    return _registry.get(name, overrides, effects, keywords)
+
+
+def style_from_section(
+    name: str,
+    subtitles: Optional[Dict] = None,
+    insights_path: Optional[str] = None
+) -> SubtitleStyle:
+    """Estilo del registro compartido desde la sección "subtitles" de un config"""
+    return _registry.from_section(name, subtitles, insights_path)
+
+
+def load_style(config_path: str, insights_path: Optional[str] = None) -> SubtitleStyle:
+    """
+    Estilo de un config.json de plataforma.
+
+    Args:
+        config_path: Ruta al config.json
+        insights_path: insights.json (default: ../analytics/insights.json junto al config)
+
+    Returns:
+        SubtitleStyle
+    """
+    with open(config_path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if insights_path is None:
+        candidate = Path(config_path).resolve().parents[1] / "analytics" / "insights.json"
+        insights_path = str(candidate) if candidate.exists() else None
+
+    return _registry.from_config(config, insights_path)
@@ -8,11 +8,19 @@ Soporta múltiples fuentes de visuales:
 - Imágenes con efecto Ken Burns
 - Fondos animados generados con FFmpeg
 - Fondos espaciales con estrellas
+
+Para previsualizar rápido, generate_streaming() compone los fondos sin
+material externo (animated, space) mientras la narración se sintetiza:
+el MP3 de Edge-TTS entra por una tubería al ffmpeg final, que empieza a
+codificar de inmediato y termina cuando acaba el audio.
 """
 
 import os
+import sys
+import asyncio
 import subprocess
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional, Literal
 from enum import Enum
@@ -21,9 +29,39 @@ from enum import Enum
 try:
     from .pexels_client import PexelsClient
     from .subtitle_generator import SubtitleGenerator
+    from .background_library import BackgroundLibrary
+    from .ken_burns import KenBurnsRenderer
+    from .clip_ingest import ClipIngest
+    from .subtitle_overlays import SubtitleOverlays, OverlayPlan
 except ImportError:
     from pexels_client import PexelsClient
     from subtitle_generator import SubtitleGenerator
+    from background_library import BackgroundLibrary
+    from ken_burns import KenBurnsRenderer
+    from clip_ingest import ClipIngest
+    from subtitle_overlays import SubtitleOverlays, OverlayPlan
+
+try:
+    from ..utils.workspace import make_workspace
+    from ..utils.media_info import get_duration
+    from ..utils.media_cache import MediaCache
+    from ..utils.ffmpeg_utils import loop_video
+    from ..utils.word_timings import WordTimings
+    from ..utils.encoder_profiles import (
+        get_profile, intermediate_profile, video_args, audio_args, scaled_resolution
+    )
+    from ..audio.tts_generator import run_sync, estimate_duration
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).parents[1]))
+    from utils.workspace import make_workspace
+    from utils.media_info import get_duration
+    from utils.media_cache import MediaCache
+    from utils.ffmpeg_utils import loop_video
+    from utils.word_timings import WordTimings
+    from utils.encoder_profiles import (
+        get_profile, intermediate_profile, video_args, audio_args, scaled_resolution
+    )
+    from audio.tts_generator import run_sync, estimate_duration
 
 
 class VideoStyle(Enum):
@@ -48,7 +86,12 @@ class VideoGenerator:
     def __init__(
         self,
         pexels_api_key: Optional[str] = None,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        use_tmpfs: Optional[bool] = None,
+        encoder_profile: str = "publish",
+        encoder_profiles: Optional[Dict] = None,
+        ken_burns: Optional[Dict] = None,
+        subtitle_render: str = "ass"
     ):
         """
         Inicializa el generador.
@@ -56,6 +99,11 @@ class VideoGenerator:
         Args:
             pexels_api_key: API key de Pexels (opcional si está en config)
             output_dir: Directorio de salida
+            use_tmpfs: Intermedios en /dev/shm (None = variable USE_TMPFS)
+            encoder_profile: draft | publish | archive
+            encoder_profiles: Ajustes por perfil (sección "encoding" del config)
+            ken_burns: Opciones del efecto Ken Burns (max_zoom, easing, crossfade...)
+            subtitle_render: ass (libass en cada frame) | overlay (PNGs pre-rasterizados)
         """
         self.pexels_client = None
         if pexels_api_key:
@@ -74,6 +122,22 @@ class VideoGenerator:
         
         self.temp_dir = self.output_dir / ".temp"
         self.temp_dir.mkdir(exist_ok=True)
+        self.use_tmpfs = use_tmpfs
+        
+        # Perfil final y perfil para intermedios (fondos, segmentos)
+        self.encoder = get_profile(encoder_profile, encoder_profiles)
+        self.intermediate = intermediate_profile(self.encoder)
+        
+        # Biblioteca de fondos procedurales en loop (fallback sin Pexels)
+        self.backgrounds = BackgroundLibrary(profile=self.encoder)
+        self.ken_burns = KenBurnsRenderer(profile=self.encoder, **(ken_burns or {}))
+        
+        # Clips de stock normalizados (compartidos entre resoluciones)
+        self.clip_cache = MediaCache(namespace="clips")
+        
+        # Eventos de subtítulos rasterizados (modo overlay, compartidos entre videos)
+        self.subtitle_render = subtitle_render
+        self.overlay_cache = MediaCache(namespace="subtitle_overlays")
     
     def generate(
         self,
@@ -84,7 +148,9 @@ class VideoGenerator:
         subtitle_text: Optional[str] = None,
         subtitle_path: Optional[str] = None,
         resolution: str = "shorts",
-        duration: Optional[float] = None
+        duration: Optional[float] = None,
+        narration_srt: Optional[str] = None,
+        subtitle_mode: str = "words"
     ) -> Dict:
         """
         Genera un video completo.
@@ -98,50 +164,74 @@ class VideoGenerator:
             subtitle_path: Ruta a archivo de subtítulos existente
             resolution: shorts | landscape | square
             duration: Duración forzada (default: duración del audio)
+            narration_srt: SRT de TTSGenerator (subtítulos alineados a la voz)
+            subtitle_mode: words | karaoke (con narration_srt)
             
         Returns:
             Diccionario con información del video generado
         """
         # Obtener resolución
         width, height = self.RESOLUTIONS.get(resolution, self.RESOLUTIONS["shorts"])
+        width, height = scaled_resolution(self.encoder, width, height)
         
         # Obtener duración
         if duration is None:
-            duration = self._get_duration(audio_path)
+            duration = get_duration(audio_path)
+            if duration <= 0:
+                return {"success": False, "error": f"No se pudo leer la duración de {audio_path}"}
         
         # Seleccionar estilo
         if style == VideoStyle.AUTO:
             style = self._select_best_style(keywords)
         
-        # Generar fondo según estilo
-        bg_video = self._generate_background(
-            style=style,
-            keywords=keywords or [],
-            duration=duration,
-            width=width,
-            height=height
-        )
-        
-        if not bg_video:
-            return {"success": False, "error": "No se pudo generar fondo"}
-        
-        # Generar subtítulos si hay texto
-        if subtitle_text and not subtitle_path:
-            subtitle_path = str(self.temp_dir / "subs.ass")
-            gen = SubtitleGenerator()
-            gen.from_text(subtitle_text, duration, subtitle_path)
-        
-        # Componer video final
-        result = self._compose_final_video(
-            background=bg_video,
-            audio=audio_path,
-            subtitles=subtitle_path,
-            output=output_path,
-            duration=duration
-        )
-        
-        # Limpiar temporales
-        self._cleanup_temp()
+        # Workspace aislado para los intermedios de este video
+        workspace = make_workspace(self.temp_dir, Path(output_path).stem, self.use_tmpfs)
+        
+        try:
+            # Generar fondo según estilo
+            bg_video = self._generate_background(
+                style=style,
+                keywords=keywords or [],
+                duration=duration,
+                width=width,
+                height=height,
+                work_dir=workspace.path
+            )
+            
+            if not bg_video:
+                return {"success": False, "error": "No se pudo generar fondo"}
+            
+            # Subtítulos alineados a la voz si hay tiempos de la narración
+            timings = WordTimings.for_narration(narration_srt) if narration_srt else None
+            if timings and not subtitle_path:
+                subtitle_path = workspace.file("subs.ass")
+                SubtitleGenerator().from_word_timings(timings, subtitle_path, subtitle_mode)
+            
+            # Generar subtítulos si hay texto
+            if subtitle_text and not subtitle_path:
+                subtitle_path = workspace.file("subs.ass")
+                gen = SubtitleGenerator()
+                gen.from_text(subtitle_text, duration, subtitle_path)
+            
+            # Overlays pre-rasterizados en lugar de ass= (si se pueden preparar)
+            overlays = None
+            if subtitle_path and self.subtitle_render == "overlay":
+                overlays = SubtitleOverlays(width, height, self.overlay_cache).plan(
+                    subtitle_path, workspace.path
+                )
+            
+            # Componer video final
+            result = self._compose_final_video(
+                background=bg_video,
+                audio=audio_path,
+                subtitles=subtitle_path,
+                output=output_path,
+                duration=duration,
+                overlays=overlays
+            )
+        finally:
+            # Limpiar temporales (solo los de este video)
+            workspace.cleanup()
         
         if result:
             size_mb = Path(output_path).stat().st_size / (1024 * 1024)
@@ -156,27 +246,201 @@ class VideoGenerator:
         
         return {"success": False, "error": "Error al componer video"}
     
+    def generate_streaming(
+        self,
+        text: str,
+        output_path: str,
+        tts,
+        style: VideoStyle = VideoStyle.SPACE,
+        subtitle_path: Optional[str] = None,
+        narration_path: Optional[str] = None,
+        resolution: str = "shorts",
+        max_duration: Optional[float] = None
+    ) -> Dict:
+        """
+        Genera un video narrando el texto en streaming (modo previsualización).
+        
+        El fondo en loop y el audio de TTS se codifican a la vez: no se
+        espera a tener el MP3 completo ni a medir su duración. Los
+        subtítulos solo se queman si ya existen (subtitle_path), porque los
+        tiempos de la narración no se conocen hasta el final.
+        
+        Args:
+            text: Texto a narrar
+            output_path: Ruta de salida del video
+            tts: TTSGenerator a usar
+            style: animated | space (fondos sin descargas)
+            subtitle_path: Subtítulos ASS ya generados (opcional)
+            narration_path: Dónde guardar también el MP3 (opcional)
+            resolution: shorts | landscape | square
+            max_duration: Cota de duración (default: el doble de la estimada del texto)
+            
+        Returns:
+            Diccionario con información del video generado
+        """
+        # agenerate_streaming ya corta en tts.timeout + cota; esto es la red de seguridad
+        limit = self._streaming_limit(text, tts, max_duration)[1]
+        try:
+            return run_sync(self.agenerate_streaming(
+                text, output_path, tts, style, subtitle_path,
+                narration_path, resolution, max_duration
+            ), timeout=limit + 30)
+        except TimeoutError:
+            Path(output_path).unlink(missing_ok=True)
+            return {"success": False, "error": f"Streaming sin terminar tras {limit + 30:.0f}s"}
+    
+    @staticmethod
+    def _streaming_limit(text: str, tts, max_duration: Optional[float]):
+        """
+        Cota de duración del video y tiempo máximo del streaming.
+        
+        La estimación no es una cota real (números leídos, pausas largas):
+        margen 2x. El streaming puede tardar lo que dura la narración más
+        el timeout de la síntesis.
+        
+        Returns:
+            Tupla (cota en segundos, tiempo máximo en segundos)
+        """
+        bound = max_duration or 2 * estimate_duration(text, tts.rate)
+        return bound, tts.timeout + bound
+    
+    async def agenerate_streaming(
+        self,
+        text: str,
+        output_path: str,
+        tts,
+        style: VideoStyle = VideoStyle.SPACE,
+        subtitle_path: Optional[str] = None,
+        narration_path: Optional[str] = None,
+        resolution: str = "shorts",
+        max_duration: Optional[float] = None
+    ) -> Dict:
+        """
+        Versión asíncrona de generate_streaming().
+        
+        Returns:
+            Diccionario con información del video generado
+        """
+        if style not in (VideoStyle.ANIMATED, VideoStyle.SPACE):
+            return {"success": False, "error": f"Streaming solo admite animated/space, no {style.value}"}
+        
+        width, height = self.RESOLUTIONS.get(resolution, self.RESOLUTIONS["shorts"])
+        width, height = scaled_resolution(self.encoder, width, height)
+        
+        # El loop cacheado de la biblioteca: sin render previo del fondo
+        loop = await asyncio.get_running_loop().run_in_executor(
+            None, self.backgrounds.get_loop, style.value, width, height
+        )
+        if not loop:
+            return {"success": False, "error": "No se pudo generar fondo"}
+        
+        # -shortest corta al acabar el audio; -t es solo una salvaguarda
+        bound, limit = self._streaming_limit(text, tts, max_duration)
+        vf_str = f"ass={subtitle_path}" if subtitle_path else "null"
+        
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        cmd = [
+            "ffmpeg", "-y",
+            "-stream_loop", "-1", "-i", str(loop),
+            "-f", "mp3", "-i", "pipe:0",
+            "-filter_complex", f"[0:v]{vf_str}[v]",
+            "-map", "[v]",
+            "-map", "1:a",
+            *video_args(self.encoder),
+            *audio_args(self.encoder),
+            "-t", f"{bound:.3f}",
+            "-shortest",
+            "-movflags", "+faststart",
+            output_path
+        ]
+        
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        
+        stream = tts.astream(text, save_path=narration_path)
+        streamed = 0
+        truncated = False
+        timed_out = False
+        
+        async def feed():
+            nonlocal streamed
+            async for data in stream:
+                proc.stdin.write(data)
+                await proc.stdin.drain()
+                streamed += len(data)
+            proc.stdin.close()
+            await proc.wait()
+        
+        try:
+            await asyncio.wait_for(feed(), limit)
+        except asyncio.TimeoutError:
+            # TTS atascado: ffmpeg seguiría esperando en pipe:0
+            timed_out = True
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg terminó (cota -t o error) antes que la narración
+            truncated = True
+        except Exception as e:
+            print(f"Error TTS en streaming: {e}")
+        finally:
+            await stream.aclose()
+            proc.stdin.close()
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+        
+        if timed_out:
+            Path(output_path).unlink(missing_ok=True)
+            return {"success": False, "error": f"Streaming sin terminar tras {limit:.0f}s"}
+        
+        if truncated:
+            Path(output_path).unlink(missing_ok=True)
+            return {
+                "success": False,
+                "error": f"La narración superó la cota de {bound:.1f}s y quedó cortada"
+            }
+        
+        if proc.returncode != 0 or not streamed or not Path(output_path).exists():
+            return {"success": False, "error": "Error al componer video en streaming"}
+        
+        size_mb = Path(output_path).stat().st_size / (1024 * 1024)
+        return {
+            "success": True,
+            "output": output_path,
+            "duration": get_duration(output_path),
+            "size_mb": round(size_mb, 2),
+            "style": style.value,
+            "resolution": f"{width}x{height}",
+            "streamed": True,
+            "narration": narration_path if narration_path and Path(narration_path).exists() else None
+        }
+    
     def _generate_background(
         self,
         style: VideoStyle,
         keywords: List[str],
         duration: float,
         width: int,
-        height: int
+        height: int,
+        work_dir: Path
     ) -> Optional[str]:
         """Genera el fondo según el estilo seleccionado"""
         
         if style == VideoStyle.STOCK_VIDEO:
-            return self._generate_stock_video_bg(keywords, duration, width, height)
+            return self._generate_stock_video_bg(keywords, duration, width, height, work_dir)
         
         elif style == VideoStyle.STOCK_IMAGES:
-            return self._generate_ken_burns_bg(keywords, duration, width, height)
+            return self._generate_ken_burns_bg(keywords, duration, width, height, work_dir)
         
         elif style == VideoStyle.ANIMATED:
-            return self._generate_animated_bg(duration, width, height)
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
         elif style == VideoStyle.SPACE:
-            return self._generate_space_bg(duration, width, height)
+            return self._generate_space_bg(duration, width, height, work_dir)
         
         return None
     
@@ -185,12 +449,13 @@ class VideoGenerator:
         keywords: List[str],
         duration: float,
         width: int,
-        height: int
+        height: int,
+        work_dir: Path
     ) -> Optional[str]:
         """Genera fondo con video de stock de Pexels"""
         if not self.pexels_client:
             print("⚠️ No hay API key de Pexels, usando fondo animado")
-            return self._generate_animated_bg(duration, width, height)
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
         # Buscar videos
         query = " ".join(keywords) if keywords else "abstract background"
@@ -206,42 +471,41 @@ class VideoGenerator:
                     break
         
         if not videos:
-            return self._generate_animated_bg(duration, width, height)
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
-        # Descargar video
         video = random.choice(videos)
-        local_path = str(self.temp_dir / f"pexels_{video['id']}.mp4")
-        
-        if not self.pexels_client.download_video(video, local_path):
-            return self._generate_animated_bg(duration, width, height)
-        
-        # Procesar para ajustar resolución y hacer loop
-        output = str(self.temp_dir / "bg_stock.mp4")
-        
-        cmd = [
-            "ffmpeg", "-y",
-            "-stream_loop", "-1",
-            "-i", local_path,
-            "-vf", f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1",
-            "-t", str(duration),
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            "-an",
-            output
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True)
-        return output if result.returncode == 0 else None
+        ingest = ClipIngest(width, height, profile=self.encoder, cache=self.clip_cache)
+        source_key = ("pexels", video.get("id"), video.get("url"))
+        clip_path = str(work_dir / f"clip_{video['id']}.mp4")
+        
+        # Clip normalizado a la resolución objetivo (de caché o al descargarlo)
+        normalized = ingest.get(source_key, clip_path)
+        if not normalized:
+            local_path = str(work_dir / f"pexels_{video['id']}.mp4")
+            if not self.pexels_client.download_video(video, local_path):
+                return self._generate_animated_bg(duration, width, height, work_dir)
+            
+            normalized = ingest.normalize(local_path, source_key, clip_path)
+            if not normalized:
+                return self._generate_animated_bg(duration, width, height, work_dir)
+        
+        # Loop hasta la duración: stream copy sobre el clip normalizado
+        output = str(work_dir / "bg_stock.mp4")
+        if loop_video(normalized, output, duration, profile=self.intermediate):
+            return output
+        return None
     
     def _generate_ken_burns_bg(
         self,
         keywords: List[str],
         duration: float,
         width: int,
-        height: int
+        height: int,
+        work_dir: Path
     ) -> Optional[str]:
         """Genera fondo con imágenes y efecto Ken Burns"""
         if not self.pexels_client:
-            return self._generate_animated_bg(duration, width, height)
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
         query = " ".join(keywords) if keywords else "nature landscape"
         orientation = "portrait" if height > width else "landscape"
@@ -252,122 +516,54 @@ class VideoGenerator:
         images = self.pexels_client.search_images(query, orientation=orientation, count=num_images)
         
         if len(images) < 2:
-            return self._generate_animated_bg(duration, width, height)
-        
-        # Descargar imágenes
-        image_paths = []
-        for i, img in enumerate(images[:num_images]):
-            local_path = str(self.temp_dir / f"img_{i}.jpg")
-            if self.pexels_client.download_image(img, local_path):
-                image_paths.append(local_path)
-        
-        if len(image_paths) < 2:
-            return self._generate_animated_bg(duration, width, height)
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
-        # Crear video con Ken Burns
-        output = str(self.temp_dir / "bg_kenburns.mp4")
-        time_per_image = duration / len(image_paths)
-        
-        # Crear videos individuales con efecto
-        segments = []
-        for i, img_path in enumerate(image_paths):
-            segment = str(self.temp_dir / f"segment_{i}.mp4")
-            
-            # Alternar zoom in/out
-            if i % 2 == 0:
-                zoom = f"zoompan=z='min(zoom+0.0015,1.5)':d={int(time_per_image*30)}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={width}x{height}"
-            else:
-                zoom = f"zoompan=z='if(lte(zoom,1.0),1.5,max(1.001,zoom-0.0015))':d={int(time_per_image*30)}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={width}x{height}"
-            
-            cmd = [
-                "ffmpeg", "-y",
-                "-loop", "1", "-i", img_path,
-                "-vf", f"scale=8000:-1,{zoom}",
-                "-t", str(time_per_image),
-                "-c:v", "libx264", "-pix_fmt", "yuv420p",
-                segment
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True)
-            if result.returncode == 0:
-                segments.append(segment)
+        # Descargar imágenes en paralelo (conservando el orden)
+        def download(item):
+            i, img = item
+            local_path = str(work_dir / f"img_{i}.jpg")
+            return local_path if self.pexels_client.download_image(img, local_path) else None
         
-        if not segments:
-            return self._generate_animated_bg(duration, width, height)
+        with ThreadPoolExecutor(max_workers=min(6, num_images)) as pool:
+            image_paths = [p for p in pool.map(download, enumerate(images[:num_images])) if p]
         
-        # Concatenar segmentos
-        list_file = str(self.temp_dir / "segments.txt")
-        with open(list_file, 'w') as f:
-            for seg in segments:
-                f.write(f"file '{seg}'\n")
+        if len(image_paths) < 2:
+            return self._generate_animated_bg(duration, width, height, work_dir)
         
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "concat", "-safe", "0",
-            "-i", list_file,
-            "-c:v", "libx264", "-preset", "fast",
-            output
-        ]
+        # Todas las imágenes en un solo filtergraph (zoompan + xfade), una codificación
+        output = str(work_dir / "bg_kenburns.mp4")
         
-        result = subprocess.run(cmd, capture_output=True)
-        return output if result.returncode == 0 else None
+        if self.ken_burns.render(image_paths, duration, width, height, output):
+            return output
+        return self._generate_animated_bg(duration, width, height, work_dir)
     
     def _generate_animated_bg(
         self,
         duration: float,
         width: int,
-        height: int
+        height: int,
+        work_dir: Path
     ) -> Optional[str]:
         """Genera fondo con gradiente animado"""
-        output = str(self.temp_dir / "bg_animated.mp4")
-        
-        # Colores para gradiente
-        colors = [
-            ("0x1a0a2e", "0x16213e"),  # Azul oscuro
-            ("0x1e3a5f", "0x0f4c75"),  # Azul medio
-            ("0x2d132c", "0x801336"),  # Púrpura
-            ("0x1b1b2f", "0x162447"),  # Azul noche
-        ]
-        c1, c2 = random.choice(colors)
+        output = str(work_dir / "bg_animated.mp4")
         
-        # Generar con gradiente animado + ruido
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "lavfi",
-            "-i", f"color=c={c1}:s={width}x{height}:d={duration}:r=30,format=rgb24,"
-                  f"geq=r='clip(r(X,Y)+random(1)*20,0,255)':"
-                  f"g='clip(g(X,Y)+random(1)*15,0,255)':"
-                  f"b='clip(b(X,Y)+random(1)*25,0,255)',format=yuv420p",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            output
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True)
-        return output if result.returncode == 0 else None
+        if self.backgrounds.render("animated", duration, width, height, output):
+            return output
+        return None
     
     def _generate_space_bg(
         self,
         duration: float,
         width: int,
-        height: int
+        height: int,
+        work_dir: Path
     ) -> Optional[str]:
         """Genera fondo espacial con estrellas"""
-        output = str(self.temp_dir / "bg_space.mp4")
+        output = str(work_dir / "bg_space.mp4")
         
-        # Fondo oscuro con estrellas
-        cmd = [
-            "ffmpeg", "-y",
-            "-f", "lavfi",
-            "-i", f"color=c=0x050510:s={width}x{height}:d={duration}:r=30,format=rgb24,"
-                  f"geq=r='if(lt(random(1),0.0008),255,r(X,Y)+random(1)*3)':"
-                  f"g='if(lt(random(1),0.0008),255,g(X,Y)+random(1)*2)':"
-                  f"b='if(lt(random(1),0.0008),255,b(X,Y)+random(1)*8)',format=yuv420p",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            output
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True)
-        return output if result.returncode == 0 else None
+        if self.backgrounds.render("space", duration, width, height, output):
+            return output
+        return None
     
     def _compose_final_video(
         self,
@@ -375,28 +571,32 @@ class VideoGenerator:
         audio: str,
         subtitles: Optional[str],
         output: str,
-        duration: float
+        duration: float,
+        overlays: Optional[OverlayPlan] = None
     ) -> bool:
-        """Compone el video final con audio y subtítulos"""
+        """Compone el video final con audio y subtítulos (ass= u overlays)"""
         
         Path(output).parent.mkdir(parents=True, exist_ok=True)
         
-        # Construir filtro
-        vf = []
-        if subtitles:
-            vf.append(f"ass={subtitles}")
+        inputs = ["-i", background, "-i", audio]
         
-        vf_str = ",".join(vf) if vf else "null"
+        # Construir filtro
+        if overlays:
+            inputs.extend(overlays.input_args())
+            filters = overlays.filters("0:v", "v", 2)
+        elif subtitles:
+            filters = [f"[0:v]ass={subtitles}[v]"]
+        else:
+            filters = ["[0:v]null[v]"]
         
         cmd = [
             "ffmpeg", "-y",
-            "-i", background,
-            "-i", audio,
-            "-filter_complex", f"[0:v]{vf_str}[v]",
+            *inputs,
+            "-filter_complex", ";".join(filters),
             "-map", "[v]",
             "-map", "1:a",
-            "-c:v", "libx264", "-preset", "medium", "-crf", "23",
-            "-c:a", "aac", "-b:a", "192k",
+            *video_args(self.encoder),
+            *audio_args(self.encoder),
             "-t", str(duration),
             "-movflags", "+faststart",
             output
@@ -410,24 +610,6 @@ class VideoGenerator:
         if self.pexels_client:
             return VideoStyle.STOCK_VIDEO
         return VideoStyle.SPACE
-    
-    def _get_duration(self, file_path: str) -> float:
-        """Obtiene duración de un archivo multimedia"""
-        result = subprocess.run([
-            "ffprobe", "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            file_path
-        ], capture_output=True, text=True)
-        return float(result.stdout.strip())
-    
-    def _cleanup_temp(self):
-        """Limpia archivos temporales"""
-        for f in self.temp_dir.glob("*"):
-            try:
-                f.unlink()
-            except:
-                pass
 
 
 # Alias para compatibilidad